@@ -17,6 +17,54 @@ class Settings(BaseSettings):
     hf_api_token: str = ""  # Optional Hugging Face token for higher rate limits
     ai_validation_enabled: bool = True  # Set to False to disable AI photo checks
     
+    # AI Validation sampling (trust policy)
+    validation_sampling_enabled: bool = True  # Set to False to validate every upload
+    validation_min_history: int = 20  # Clean accepts needed before a user is sampled
+    validation_ngo_min_history: int = 5  # Same, for NGO accounts
+    validation_min_sample_rate: float = 0.1  # Trusted users still get spot-checked
+    
+    # Uploaded images
+    uploads_dir: str = ""  # Empty = legacy treekin-frontend/public/assets/trees
+    media_max_age: int = 3600  # Cache lifetime (s) for images without content-addressed names
+    
+    # Idempotency-Key store for retried POSTs
+    idempotency_ttl_seconds: int = 86400
+    idempotency_max_entries: int = 10000
+    
+    # Shared feed page cache (0 disables)
+    feed_cache_ttl_seconds: int = 15
+    feed_cache_max_pages: int = 256
+    
+    # User summary cache (author/reporter/chat partner cards; 0 disables)
+    user_cache_ttl_seconds: int = 300
+    user_cache_max_entries: int = 10000
+    
+    # Cache backend for caches shared across workers: "memory" or "redis"
+    cache_backend: str = "memory"
+    redis_url: str = "redis://localhost:6379/0"
+    
+    # Live chat: "memory" (single worker) or "redis" (REDIS_URL) pub/sub between workers
+    chat_broker: str = "memory"
+    chat_socket_queue_size: int = 100  # Events a socket may fall behind before it is dropped
+    chat_presence_ttl_seconds: int = 60  # Presence of a crashed worker's users expires after this
+    
+    # Home timelines (fan-out on write)
+    fanout_max_followers: int = 5000  # Accounts/trees with more followers are merged in at read time
+    timeline_backfill_posts: int = 20  # Recent posts copied into a timeline on follow
+    
+    # Trending: score half-life, and how often buffered events are merged (0 = immediately)
+    trending_half_life_hours: float = 12.0
+    trending_flush_interval_seconds: float = 5.0
+    
+    # Engagement counters: buffered deltas flushed this often (0 = write through)
+    counter_flush_interval_seconds: float = 2.0
+    
+    # Background cleanup (deleted trees, orphaned image files)
+    background_jobs_enabled: bool = True
+    cleanup_interval_seconds: int = 60  # How often leftover deleted trees are purged
+    orphan_gc_interval_seconds: int = 3600  # How often disk is reconciled against the DB
+    orphan_min_age_seconds: int = 3600  # Unreferenced files younger than this are kept (uploads in flight)
+    
     # App
     app_name: str = "TreeKin"
     debug: bool = True
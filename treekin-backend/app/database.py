@@ -1,5 +1,7 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import DateTime, create_engine, text
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 import os
@@ -37,6 +39,35 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def dialect_insert(db):
+    """The INSERT construct of the session's dialect (for ON CONFLICT clauses)."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+# CURRENT_TIMESTAMP's text format (whole seconds)
+SQLITE_TIMESTAMP_FORMAT = "%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+
+
+class Timestamp(TypeDecorator):
+    """
+    DateTime(timezone=True) that SQLite stores in SQLITE_TIMESTAMP_FORMAT, so
+    server-default and Python-set values compare correctly as strings and
+    (created_at, id) keyset pages can range-scan plain column indexes.
+    Python-set values lose their fractional seconds on SQLite; id breaks ties.
+    """
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(sqlite.DATETIME(storage_format=SQLITE_TIMESTAMP_FORMAT))
+        return dialect.type_descriptor(DateTime(timezone=True))
+
+
 def get_db():
     """Dependency that provides database session."""
     db = SessionLocal()
@@ -49,5 +80,7 @@ def get_db():
 def init_db():
     """Initialize database - create all tables."""
     from . import models  # Import all models to register them
+    from .migrations import run_migrations
     Base.metadata.create_all(bind=engine)
+    run_migrations()
 
@@ -2,9 +2,18 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
 import os
 from .config import settings
 from .database import init_db
+from .services.storage import UPLOADS_DIR, UPLOADS_URL_PREFIX
+from .services.media import MediaFiles
+from .services.cleanup import cleanup_loop
+from .services.counters import counter_flush_loop, run_flush
+from .services import trending
+from .services.chat_hub import hub as chat_hub
+from .services.pagination import NEXT_CURSOR_HEADER
+from .services.idempotency import REPLAYED_HEADER
 from .routers import (
     auth_router,
     users_router,
@@ -13,11 +22,11 @@ from .routers import (
     carbon_router,
     chat_router,
     reports_router,
-    leaderboard_router
+    leaderboard_router,
+    search_router
 )
 
 # Ensure uploads directory exists (in frontend public folder)
-UPLOADS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "treekin-frontend", "public", "assets", "trees")
 os.makedirs(UPLOADS_DIR, exist_ok=True)
 
 
@@ -28,9 +37,22 @@ async def lifespan(app: FastAPI):
     print("[TreeKin] Starting API...")
     init_db()
     print("[TreeKin] Database tables created/verified")
+    await chat_hub.start()
+    background_tasks = []
+    if settings.background_jobs_enabled:
+        background_tasks.append(asyncio.create_task(cleanup_loop()))
+        if settings.counter_flush_interval_seconds > 0:
+            background_tasks.append(asyncio.create_task(counter_flush_loop()))
+        if settings.trending_flush_interval_seconds > 0:
+            background_tasks.append(asyncio.create_task(trending.trending_flush_loop()))
     yield
     # Shutdown
     print("[TreeKin] Shutting down API...")
+    for task in background_tasks:
+        task.cancel()
+    await chat_hub.stop()
+    run_flush()  # Don't drop buffered counter deltas
+    trending.run_flush()
 
 
 # Create FastAPI app
@@ -71,6 +93,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, REPLAYED_HEADER],
 )
 
 # Include routers
@@ -82,9 +105,11 @@ app.include_router(carbon_router, prefix="/api")
 app.include_router(chat_router, prefix="/api")
 app.include_router(reports_router, prefix="/api")
 app.include_router(leaderboard_router, prefix="/api")
+app.include_router(search_router, prefix="/api")
 
-# Note: Uploaded images are saved to treekin-frontend/public/assets/trees/
-# and served directly by Vite during development
+# Uploaded images: served by the backend (Range, ETags, immutable caching)
+# so they can sit behind a CDN instead of shipping with the frontend build
+app.mount(UPLOADS_URL_PREFIX, MediaFiles(directory=UPLOADS_DIR), name="media")
 
 
 @app.get("/")
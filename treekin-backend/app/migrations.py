@@ -0,0 +1,264 @@
+"""
+Startup data migrations.
+
+Run by init_db() after create_all(). There is no Alembic setup yet, so every
+step here must be idempotent and cheap once it has been applied.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import func, inspect, insert, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+
+def sync_schema(engine: Engine) -> None:
+    """
+    Add columns and indexes that create_all() skips on tables that already exist.
+
+    Only nullable (or server-defaulted) columns can be added this way, which is
+    what new columns on existing models should be anyway.
+    """
+    from .database import Base
+
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    print(f"[TreeKin] Cannot add NOT NULL column {table.name}.{column.name} automatically")
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                print(f"[TreeKin] Added column {table.name}.{column.name}")
+
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    """Parse the ISO / YYYY-MM-DD strings stored in the old JSON entries."""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            return datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            return None
+
+
+def _legacy_entry_to_row(tree_id: int, owner_id: int, entry: Any) -> Optional[Dict]:
+    """Map one Tree.images JSON entry (dict or bare URL) to a tree_images row."""
+    if isinstance(entry, str):
+        return {"tree_id": tree_id, "url": entry, "uploaded_by": owner_id}
+    if not isinstance(entry, dict) or not entry.get("url"):
+        return None
+
+    return {
+        "tree_id": tree_id,
+        "url": entry["url"],
+        "caption": entry.get("caption") or None,
+        "uploaded_by": entry.get("uploaded_by") or owner_id,
+        "taken_at": _parse_datetime(entry.get("uploaded_at")),
+        # /updates stored photo_lat/lng, /upload-image stored latitude/longitude
+        "photo_lat": entry.get("photo_lat", entry.get("latitude")),
+        "photo_lng": entry.get("photo_lng", entry.get("longitude")),
+        "ai_valid": entry.get("ai_valid"),
+        "ai_confidence": entry.get("ai_confidence"),
+        "ai_label": entry.get("ai_label") or None,
+    }
+
+
+def migrate_tree_images_json(db: Session) -> int:
+    """
+    One-time move of photos from the Tree.images JSON array into tree_images.
+
+    Each tree's entries are copied in array order (so ids preserve upload
+    order) and its JSON column is cleared in the same transaction, which is
+    what makes the step run only once per tree.
+    """
+    from .models.tree import Tree, TreeImage
+
+    trees = (
+        db.query(Tree.id, Tree.owner_id, Tree.legacy_images)
+        .filter(Tree.legacy_images.isnot(None))
+        .order_by(Tree.id)
+        .all()
+    )
+    if not trees:
+        return 0
+
+    moved = 0
+    for tree in trees:
+        rows = [
+            row for row in (
+                _legacy_entry_to_row(tree.id, tree.owner_id, entry)
+                for entry in (tree.legacy_images or [])
+            )
+            if row
+        ]
+        if rows:
+            db.execute(insert(TreeImage), rows)
+            moved += len(rows)
+        db.query(Tree).filter(Tree.id == tree.id).update(
+            {Tree.legacy_images: None}, synchronize_session=False
+        )
+
+    db.commit()
+    print(f"[TreeKin] Migrated {moved} photos from {len(trees)} trees into tree_images")
+    return moved
+
+
+def dedupe_likes(db: Session) -> int:
+    """
+    Drop duplicate (post_id, user_id) likes, keeping the oldest, so the
+    unique uq_likes_post_user index can be created. Runs before sync_schema()
+    and is a no-op once the index exists.
+    """
+    from .models.post import Like
+    from .services.counters import recount_counters
+
+    bind = db.get_bind()
+    inspector = inspect(bind)
+    if "likes" not in inspector.get_table_names():
+        return 0
+    if any(index["name"] == "uq_likes_post_user" for index in inspector.get_indexes("likes")):
+        return 0
+
+    keep = select(func.min(Like.id)).group_by(Like.post_id, Like.user_id)
+    removed = db.query(Like).filter(Like.id.not_in(keep)).delete(synchronize_session=False)
+    db.commit()
+    if removed:
+        # Duplicates inflated likes_count too
+        recount_counters(db)
+        print(f"[TreeKin] Removed {removed} duplicate likes")
+    return removed
+
+
+def canonicalize_chat_rooms(db: Session) -> int:
+    """
+    Store every chat room as (lower user id, higher user id) and merge rooms
+    that duplicate a pair (moving their messages to the oldest room), so the
+    unique uq_chat_rooms_pair index can be created. Runs before sync_schema()
+    and is a no-op once the index exists.
+    """
+    from .models.chat import ChatMessage, ChatRoom
+
+    bind = db.get_bind()
+    inspector = inspect(bind)
+    if "chat_rooms" not in inspector.get_table_names():
+        return 0
+    if any(index["name"] == "uq_chat_rooms_pair" for index in inspector.get_indexes("chat_rooms")):
+        return 0
+
+    rooms = ChatRoom.__table__
+    db.execute(
+        update(rooms)
+        .where(rooms.c.user1_id > rooms.c.user2_id)
+        .values(user1_id=rooms.c.user2_id, user2_id=rooms.c.user1_id)
+    )
+
+    duplicated = (
+        db.query(ChatRoom.user1_id, ChatRoom.user2_id)
+        .group_by(ChatRoom.user1_id, ChatRoom.user2_id)
+        .having(func.count(ChatRoom.id) > 1)
+        .all()
+    )
+    merged = 0
+    for user1_id, user2_id in duplicated:
+        pair = db.query(ChatRoom).filter(
+            ChatRoom.user1_id == user1_id, ChatRoom.user2_id == user2_id
+        ).order_by(ChatRoom.id).all()
+        keep, extra = pair[0], pair[1:]
+        latest = max(pair, key=lambda room: room.last_message_at or datetime.min)
+        keep.last_message, keep.last_message_at = latest.last_message, latest.last_message_at
+        extra_ids = [room.id for room in extra]
+        db.query(ChatMessage).filter(ChatMessage.room_id.in_(extra_ids)).update(
+            {ChatMessage.room_id: keep.id}, synchronize_session=False
+        )
+        db.query(ChatRoom).filter(ChatRoom.id.in_(extra_ids)).delete(synchronize_session=False)
+        merged += len(extra_ids)
+    db.commit()
+    if merged:
+        print(f"[TreeKin] Merged {merged} duplicate chat rooms")
+    return merged
+
+
+def canonicalize_timestamps(db: Session) -> int:
+    """
+    SQLite only: rewrite Timestamp columns written with fractional seconds
+    (before they were stored in SQLITE_TIMESTAMP_FORMAT) to whole seconds,
+    so they compare correctly against CURRENT_TIMESTAMP defaults as strings.
+    No-op on other databases and once every value is canonical.
+    """
+    from .database import Base, Timestamp
+
+    bind = db.get_bind()
+    if bind.dialect.name != "sqlite":
+        return 0
+
+    existing_tables = set(inspect(bind).get_table_names())
+    rewritten = 0
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        for column in table.columns:
+            if isinstance(column.type, Timestamp):
+                rewritten += db.execute(
+                    text(f"UPDATE {table.name} SET {column.name} = substr({column.name}, 1, 19) "
+                         f"WHERE length({column.name}) > 19")
+                ).rowcount
+    db.commit()
+    if rewritten:
+        print(f"[TreeKin] Rewrote {rewritten} timestamps to whole seconds")
+    return rewritten
+
+
+def backfill_chat_room_activity(db: Session) -> int:
+    """
+    Give rooms opened before last_message_at was set on creation their
+    creation time, so every room sorts (and pages) on last_message_at alone.
+    """
+    from .models.chat import ChatRoom
+
+    filled = db.query(ChatRoom).filter(ChatRoom.last_message_at.is_(None)).update(
+        {ChatRoom.last_message_at: ChatRoom.created_at}, synchronize_session=False
+    )
+    db.commit()
+    if filled:
+        print(f"[TreeKin] Set last_message_at on {filled} chat rooms without messages")
+    return filled
+
+
+def run_migrations() -> None:
+    """Apply all startup migrations."""
+    from .database import SessionLocal, engine
+    from .services.search import ensure_search_index
+
+    db = SessionLocal()
+    try:
+        dedupe_likes(db)
+        canonicalize_chat_rooms(db)
+    finally:
+        db.close()
+
+    sync_schema(engine)
+    ensure_search_index(engine)
+
+    db = SessionLocal()
+    try:
+        migrate_tree_images_json(db)
+        canonicalize_timestamps(db)
+        backfill_chat_room_activity(db)
+    finally:
+        db.close()
@@ -1,16 +1,22 @@
 # Database models package
 from .user import User
-from .tree import Tree, TreeEvent
+from .tree import Tree, TreeEvent, TreeImage
 from .post import Post, Comment, Like
 from .carbon import CarbonCredit, TreditTransaction, TreeSponsorship
 from .chat import ChatMessage, ChatRoom
 from .report import CivicReport, ReportVote
+from .validation import UserValidationStats
+from .follow import Follow, TimelineEntry
+from .trending import TrendingScore, TrendingCredit
 
 __all__ = [
     "User",
-    "Tree", "TreeEvent",
+    "Tree", "TreeEvent", "TreeImage",
     "Post", "Comment", "Like",
     "CarbonCredit", "TreditTransaction", "TreeSponsorship",
     "ChatMessage", "ChatRoom",
-    "CivicReport", "ReportVote"
+    "CivicReport", "ReportVote",
+    "UserValidationStats",
+    "Follow", "TimelineEntry",
+    "TrendingScore", "TrendingCredit"
 ]
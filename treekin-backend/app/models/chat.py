@@ -1,23 +1,32 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Index, CheckConstraint
 from sqlalchemy.sql import func
-from ..database import Base
+from ..database import Base, Timestamp
 
 
 class ChatRoom(Base):
     """Chat room between users."""
     
     __tablename__ = "chat_rooms"
+    __table_args__ = (
+        # One room per pair, stored as (lower id, higher id): resolving a
+        # room is a point lookup and concurrent first messages can't race
+        Index("uq_chat_rooms_pair", "user1_id", "user2_id", unique=True),
+        # A user's rooms by latest activity, one range scan per participant side
+        Index("ix_chat_rooms_user1_activity", "user1_id", "last_message_at", "id"),
+        Index("ix_chat_rooms_user2_activity", "user2_id", "last_message_at", "id"),
+        CheckConstraint("user1_id < user2_id", name="ck_chat_rooms_canonical_pair"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
-    # Two-user chat (can extend for group chats)
+    # Two-user chat (can extend for group chats); user1_id < user2_id
     user1_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     user2_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     last_message = Column(Text)
-    last_message_at = Column(DateTime(timezone=True))
+    last_message_at = Column(Timestamp)  # set when the room is opened, then on every message
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     
     def __repr__(self):
         return f"<ChatRoom {self.id}: Users {self.user1_id}-{self.user2_id}>"
@@ -27,6 +36,12 @@ class ChatMessage(Base):
     """Messages in chat rooms."""
     
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # Unread counts per room: the other participant's unread messages
+        Index("ix_chat_messages_room_sender_read", "room_id", "sender_id", "is_read"),
+        # History pages anchored on a message id, in either direction
+        Index("ix_chat_messages_room_id_id", "room_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     room_id = Column(Integer, ForeignKey("chat_rooms.id"), nullable=False)
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from ..database import Base, Timestamp
+
+
+class Follow(Base):
+    """A user following another user or a tree."""
+    
+    __tablename__ = "follows"
+    __table_args__ = (
+        # One follow per target; also "whom does X follow"
+        Index("uq_follows_follower_target", "follower_id", "target_type", "target_id", unique=True),
+        # "Who follows this user/tree" (fan-out on write)
+        Index("ix_follows_target", "target_type", "target_id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    follower_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    target_type = Column(String(10), nullable=False)  # "user" or "tree"
+    target_id = Column(Integer, nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<Follow {self.follower_id} -> {self.target_type} {self.target_id}>"
+
+
+class TimelineEntry(Base):
+    """A post delivered to one user's home timeline (fan-out on write)."""
+    
+    __tablename__ = "timeline_entries"
+    __table_args__ = (
+        # A home feed page is one range scan of this index
+        Index("ix_timeline_entries_user_created_post", "user_id", "created_at", "post_id"),
+        Index("uq_timeline_entries_user_post", "user_id", "post_id", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(Timestamp, nullable=False)  # the post's created_at
+    
+    def __repr__(self):
+        return f"<TimelineEntry post {self.post_id} for User {self.user_id}>"
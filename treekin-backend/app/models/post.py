@@ -1,13 +1,17 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-from ..database import Base
+from ..database import Base, Timestamp
 
 
 class Post(Base):
     """Social posts for trees."""
     
     __tablename__ = "posts"
+    __table_args__ = (
+        # Keyset pagination, newest first
+        Index("ix_posts_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     tree_id = Column(Integer, ForeignKey("trees.id", ondelete="CASCADE"), nullable=False)
@@ -25,7 +29,7 @@ class Post(Base):
     verification_votes = Column(Integer, default=0)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
@@ -42,6 +46,10 @@ class Comment(Base):
     """Comments on posts."""
     
     __tablename__ = "comments"
+    __table_args__ = (
+        # A post's comments in either order, keyset-paginated
+        Index("ix_comments_post_id_created_at", "post_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
@@ -49,7 +57,7 @@ class Comment(Base):
     
     content = Column(Text, nullable=False)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     
     # Relationships
     post = relationship("Post", back_populates="comments")
@@ -63,6 +71,10 @@ class Like(Base):
     """Likes on posts."""
     
     __tablename__ = "likes"
+    __table_args__ = (
+        # One like per user per post; the like toggle relies on it
+        Index("uq_likes_post_user", "post_id", "user_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
-from ..database import Base
+from ..database import Base, Timestamp
 import enum
 
 
@@ -24,6 +24,10 @@ class CivicReport(Base):
     """Geo-tagged civic reports for environmental issues."""
     
     __tablename__ = "civic_reports"
+    __table_args__ = (
+        # Keyset pagination, newest first
+        Index("ix_civic_reports_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     reporter_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -51,7 +55,7 @@ class CivicReport(Base):
     resolution_notes = Column(Text)
     resolved_at = Column(DateTime(timezone=True))
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     def __repr__(self):
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Enum, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Enum, JSON, Index
+from sqlalchemy import select, event
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
-from ..database import Base
+from sqlalchemy.orm import Session, relationship, column_property, with_loader_criteria
+from ..database import Base, Timestamp
 import enum
 
 
@@ -33,6 +34,10 @@ class Tree(Base):
     """Tree model for tracking planted/adopted trees."""
     
     __tablename__ = "trees"
+    __table_args__ = (
+        # Keyset pagination, newest first
+        Index("ix_trees_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False)
@@ -66,13 +71,19 @@ class Tree(Base):
     carbon_credits = Column(Float, default=0.0)
     total_tredits_earned = Column(Float, default=0.0)
     
+    # Social
+    followers_count = Column(Integer, default=0)
+    
     # Media
     main_image_url = Column(String(500))
-    images = Column(JSON, default=list)  # List of image URLs
+    # Pre-tree_images JSON array of photos; only read by the one-time migration
+    legacy_images = Column("images", JSON(none_as_null=True))
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set by delete_tree; the row and its data are purged in the background
+    deleted_at = Column(DateTime(timezone=True), index=True)
     
     # Relationships
     owner = relationship("User", foreign_keys=[owner_id])
@@ -81,6 +92,7 @@ class Tree(Base):
     posts = relationship("Post", back_populates="tree", cascade="all, delete-orphan")
     carbon_records = relationship("CarbonCredit", back_populates="tree", cascade="all, delete-orphan")
     events = relationship("TreeEvent", back_populates="tree", cascade="all, delete-orphan")
+    photos = relationship("TreeImage", back_populates="tree", cascade="all, delete-orphan", order_by="TreeImage.id")
     
     def __repr__(self):
         return f"<Tree {self.name}>"
@@ -103,3 +115,77 @@ class TreeEvent(Base):
     
     # Relationships
     tree = relationship("Tree", back_populates="events")
+
+
+class TreeImage(Base):
+    """A photo of a tree (growth update or upload), one row per image."""
+    
+    __tablename__ = "tree_images"
+    __table_args__ = (
+        # Timeline reads and per-tree counts
+        Index("ix_tree_images_tree_id_id", "tree_id", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tree_id = Column(Integer, ForeignKey("trees.id", ondelete="CASCADE"), nullable=False)
+    
+    url = Column(String(500), nullable=False)
+    caption = Column(Text)
+    uploaded_by = Column(Integer, ForeignKey("users.id"), index=True)
+    taken_at = Column(DateTime(timezone=True))  # Date the user says the photo was taken
+    
+    # Where the photo was taken (EXIF or client GPS)
+    photo_lat = Column(Float)
+    photo_lng = Column(Float)
+    
+    # AI validation verdict
+    ai_valid = Column(Boolean)
+    ai_confidence = Column(Float)
+    ai_label = Column(String(100))
+    
+    # Content hashes (exact and perceptual) for duplicate detection
+    sha256 = Column(String(64), index=True)
+    phash = Column(String(16), index=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    tree = relationship("Tree", back_populates="photos")
+    
+    def __repr__(self):
+        return f"<TreeImage {self.id} of Tree {self.tree_id}>"
+
+
+# Photo count and newest photo, loaded with every Tree query as correlated
+# subqueries over the (tree_id, id) index so listings never touch the photos.
+Tree.image_count = column_property(
+    select(func.count(TreeImage.id))
+    .where(TreeImage.tree_id == Tree.id)
+    .correlate_except(TreeImage)
+    .scalar_subquery()
+)
+Tree.latest_image_url = column_property(
+    select(TreeImage.url)
+    .where(TreeImage.tree_id == Tree.id)
+    .order_by(TreeImage.id.desc())
+    .limit(1)
+    .correlate_except(TreeImage)
+    .scalar_subquery()
+)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _hide_deleted_trees(execute_state):
+    """
+    Keep trees awaiting background purge out of every ORM query.
+    Opt out with .execution_options(include_deleted=True).
+    """
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(Tree, Tree.deleted_at.is_(None), include_aliases=True)
+        )
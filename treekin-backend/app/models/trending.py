@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class TrendingScore(Base):
+    """
+    Time-decayed engagement score of a post or tree (see services/trending.py).
+
+    rank_key is log2 of the score scaled to a fixed epoch, so ordering by it
+    ranks by the current decayed score without rewriting every row as time passes.
+    """
+    
+    __tablename__ = "trending_scores"
+    __table_args__ = (
+        # Top-N per kind is one backwards index scan
+        Index("ix_trending_scores_kind_rank", "kind", "rank_key"),
+    )
+    
+    kind = Column(String(10), primary_key=True)  # "post" or "tree"
+    item_id = Column(Integer, primary_key=True)
+    rank_key = Column(Float, nullable=False)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<TrendingScore {self.kind} {self.item_id}: {self.rank_key:.3f}>"
+
+
+class TrendingCredit(Base):
+    """
+    A user's engagement that already counted towards an item's trending
+    score, so toggling a like (or re-voting) cannot score it again.
+    """
+    
+    __tablename__ = "trending_credits"
+    
+    kind = Column(String(10), primary_key=True)   # "post" or "tree"
+    item_id = Column(Integer, primary_key=True)
+    event = Column(String(20), primary_key=True)  # "like", "verify"
+    user_id = Column(Integer, primary_key=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<TrendingCredit {self.event} by User {self.user_id} on {self.kind} {self.item_id}>"
@@ -1,13 +1,17 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-from ..database import Base
+from ..database import Base, Timestamp
 
 
 class User(Base):
     """User model for authentication and profiles."""
     
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination, newest first
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
@@ -26,6 +30,7 @@ class User(Base):
     total_carbon_saved = Column(Float, default=0.0)
     trees_planted = Column(Integer, default=0)
     trees_adopted = Column(Integer, default=0)
+    followers_count = Column(Integer, default=0)
     
     # Roles
     is_active = Column(Boolean, default=True)
@@ -34,7 +39,7 @@ class User(Base):
     is_admin = Column(Boolean, default=False)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Note: Relationships commented out temporarily due to SQLite compatibility issues
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class UserValidationStats(Base):
+    """Per-user history of AI photo validation outcomes (drives trust sampling)."""
+    
+    __tablename__ = "user_validation_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    
+    accepted_count = Column(Integer, default=0)   # Validated and accepted
+    rejected_count = Column(Integer, default=0)   # Validated and rejected
+    skipped_count = Column(Integer, default=0)    # Sampled out by the trust policy
+    clean_streak = Column(Integer, default=0)     # Accepts since the last rejection
+    
+    last_rejected_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<UserValidationStats user={self.user_id} +{self.accepted_count}/-{self.rejected_count}>"
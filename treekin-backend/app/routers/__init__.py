@@ -7,6 +7,7 @@ from .carbon import router as carbon_router
 from .chat import router as chat_router
 from .reports import router as reports_router
 from .leaderboard import router as leaderboard_router
+from .search import router as search_router
 
 __all__ = [
     "auth_router",
@@ -16,5 +17,6 @@ __all__ = [
     "carbon_router",
     "chat_router",
     "reports_router",
-    "leaderboard_router"
+    "leaderboard_router",
+    "search_router"
 ]
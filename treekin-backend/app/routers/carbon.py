@@ -11,6 +11,7 @@ from ..schemas.carbon import (
 )
 from ..schemas.sponsorship import SponsorshipCreate, SponsorshipResponse
 from ..services.auth_utils import get_current_user
+from ..services.idempotency import IdempotentRequest, idempotent_request
 
 router = APIRouter(prefix="/carbon", tags=["Carbon Credits"])
 
@@ -92,10 +93,14 @@ def estimate_carbon(
 @router.post("/claim/{tree_id}")
 def claim_carbon_credits(
     tree_id: int,
+    idem: IdempotentRequest = Depends(idempotent_request),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Claim carbon credits for a tree (once per period)."""
+    if idem.replay:
+        return idem.replay
+
     tree = db.query(Tree).filter(Tree.id == tree_id).first()
     if not tree:
         raise HTTPException(status_code=404, detail="Tree not found")
@@ -138,12 +143,12 @@ def claim_carbon_credits(
     
     db.commit()
     
-    return {
+    return idem.save({
         "message": "Carbon credits claimed successfully",
         "co2_claimed": result["annual_co2_kg"],
         "tredits_earned": result["tredits_value"],
         "new_balance": current_user.tredits_balance
-    }
+    })
 
 
 @router.get("/wallet", response_model=WalletResponse)
@@ -1,154 +1,358 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List
+from sqlalchemy import func, or_, select
+from typing import List, Optional, Tuple
 from datetime import datetime
-from ..database import get_db
+import asyncio
+import hashlib
+import json
+from ..database import get_db, SessionLocal, dialect_insert
 from ..models.user import User
 from ..models.chat import ChatRoom, ChatMessage
 from ..schemas.chat import (
     ChatMessageCreate, ChatMessageResponse,
     ChatRoomResponse, ChatRoomWithMessages
 )
+from ..services.auth_utils import get_current_user, decode_user_id
+from ..services.chat_hub import ChatConnection, hub
 from ..schemas.user import UserSummary
-from ..services.auth_utils import get_current_user
+from ..services.loaders import Loaders, USER_SUMMARY_COLUMNS, get_loaders
+from ..services.pagination import apply_keyset, created_cursor, set_next_cursor
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
+# The other participant's summary, selected alongside each room
+OTHER_USER_COLUMNS = [column.label(f"other_{column.key}") for column in USER_SUMMARY_COLUMNS]
+
+
+def find_room(db: Session, user1_id: int, user2_id: int) -> Optional[ChatRoom]:
+    """
+    The chat room of two users, or None before their first message. Rooms
+    are keyed by (lower id, higher id), so this is one unique-index lookup.
+    """
+    low, high = sorted((user1_id, user2_id))
+    return db.query(ChatRoom).filter(ChatRoom.user1_id == low, ChatRoom.user2_id == high).first()
+
 
 def get_or_create_room(db: Session, user1_id: int, user2_id: int) -> ChatRoom:
-    """Get existing chat room or create new one."""
-    room = db.query(ChatRoom).filter(
-        or_(
-            (ChatRoom.user1_id == user1_id) & (ChatRoom.user2_id == user2_id),
-            (ChatRoom.user1_id == user2_id) & (ChatRoom.user2_id == user1_id)
-        )
-    ).first()
+    """
+    Get the chat room of two users, creating it if needed. A concurrent
+    first message loses the insert race harmlessly (ON CONFLICT DO NOTHING).
+    """
+    room = find_room(db, user1_id, user2_id)
     
     if not room:
-        room = ChatRoom(user1_id=user1_id, user2_id=user2_id)
-        db.add(room)
+        low, high = sorted((user1_id, user2_id))
+        db.execute(
+            dialect_insert(db)(ChatRoom.__table__)
+            # Rooms sort by last_message_at; until the first message, when opened
+            .values(user1_id=low, user2_id=high, last_message_at=datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=["user1_id", "user2_id"])
+        )
         db.commit()
-        db.refresh(room)
+        room = find_room(db, user1_id, user2_id)
     
     return room
 
 
-@router.get("/rooms", response_model=List[ChatRoomResponse])
-def get_chat_rooms(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get all chat rooms for current user."""
-    rooms = db.query(ChatRoom).filter(
-        or_(
-            ChatRoom.user1_id == current_user.id,
-            ChatRoom.user2_id == current_user.id
-        )
-    ).order_by(ChatRoom.last_message_at.desc().nullslast()).all()
-    
-    result = []
-    for room in rooms:
-        other_user_id = room.user2_id if room.user1_id == current_user.id else room.user1_id
-        other_user = db.query(User).filter(User.id == other_user_id).first()
-        
-        unread_count = db.query(ChatMessage).filter(
-            ChatMessage.room_id == room.id,
-            ChatMessage.sender_id != current_user.id,
-            ChatMessage.is_read == False
-        ).count()
-        
-        room_response = ChatRoomResponse.model_validate(room)
-        if other_user:
-            room_response.other_user = UserSummary.model_validate(other_user)
-        room_response.unread_count = unread_count
-        result.append(room_response)
-    
-    return result
-
-
-@router.post("/send", response_model=ChatMessageResponse)
-def send_message(
-    message_data: ChatMessageCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Send a message to another user."""
+def _create_message(db: Session, loaders: Loaders, sender_id: int, receiver_id: int, content: str) -> ChatMessage:
+    """Store a message (creating the room on first contact) and push it to both users."""
     # Verify receiver exists
-    receiver = db.query(User).filter(User.id == message_data.receiver_id).first()
-    if not receiver:
+    if loaders.users.get(receiver_id) is None:
         raise HTTPException(status_code=404, detail="User not found")
     
-    if message_data.receiver_id == current_user.id:
+    if receiver_id == sender_id:
         raise HTTPException(status_code=400, detail="Cannot message yourself")
     
     # Get or create chat room
-    room = get_or_create_room(db, current_user.id, message_data.receiver_id)
+    room = get_or_create_room(db, sender_id, receiver_id)
+    first_message = room.last_message is None
     
     # Create message
     message = ChatMessage(
         room_id=room.id,
-        sender_id=current_user.id,
-        content=message_data.content
+        sender_id=sender_id,
+        content=content
     )
     db.add(message)
     
     # Update room
-    room.last_message = message_data.content[:100]  # Truncate for preview
+    room.last_message = content[:100]  # Truncate for preview
     room.last_message_at = datetime.utcnow()
     
     db.commit()
     db.refresh(message)
     
+    event = {"type": "message", "message": ChatMessageResponse.model_validate(message).model_dump(mode="json")}
+    if first_message:
+        # Workers only follow rooms they know of; a new room reaches its users directly
+        hub.publish_user(sender_id, event)
+        hub.publish_user(receiver_id, event)
+    else:
+        hub.publish_room(room.id, event)
     return message
 
 
+def _mark_room_read(db: Session, room: ChatRoom, reader_id: int, up_to_id: Optional[int] = None) -> int:
+    """
+    Mark the other participant's messages read (all, or those up to and
+    including up_to_id) and send them a read receipt.
+    """
+    read_at = datetime.utcnow()
+    query = db.query(ChatMessage).filter(
+        ChatMessage.room_id == room.id,
+        ChatMessage.sender_id != reader_id,
+        ChatMessage.is_read == False
+    )
+    if up_to_id is not None:
+        query = query.filter(ChatMessage.id <= up_to_id)
+    updated = query.update({"is_read": True, "read_at": read_at})
+    db.commit()
+    
+    if updated:
+        hub.publish_room(room.id, {
+            "type": "read",
+            "room_id": room.id,
+            "reader_id": reader_id,
+            "read_at": read_at.isoformat(),
+            "up_to_id": up_to_id,
+            "count": updated,
+        })
+    return updated
+
+
+def _participant_room(db: Session, room_id: int, user_id: int) -> ChatRoom:
+    room = db.query(ChatRoom).filter(
+        ChatRoom.id == room_id,
+        or_(ChatRoom.user1_id == user_id, ChatRoom.user2_id == user_id)
+    ).first()
+    if not room:
+        raise HTTPException(status_code=404, detail="Chat room not found")
+    return room
+
+
+@router.get("/rooms", response_model=List[ChatRoomResponse])
+def get_chat_rooms(
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the current user's chat rooms, latest activity first. Two queries per
+    page, one per participant column, each a range scan of its
+    (user, last_message_at, id) index with the other participant and the
+    unread count joined in. Pass X-Next-Cursor back as `cursor` to page.
+    """
+    user_id = current_user.id
+    unread_count = select(func.count(ChatMessage.id)).where(
+        ChatMessage.room_id == ChatRoom.id,
+        ChatMessage.sender_id != user_id,
+        ChatMessage.is_read == False
+    ).correlate(ChatRoom).scalar_subquery()
+    
+    rows = []
+    for own_id, other_id in ((ChatRoom.user1_id, ChatRoom.user2_id), (ChatRoom.user2_id, ChatRoom.user1_id)):
+        query = db.query(
+            ChatRoom, unread_count.label("unread_count"), *OTHER_USER_COLUMNS
+        ).outerjoin(User, User.id == other_id).filter(own_id == user_id)
+        rows += apply_keyset(query, ChatRoom.last_message_at, ChatRoom.id, cursor).limit(limit + 1).all()
+    
+    rows.sort(key=lambda row: (row.ChatRoom.last_message_at, row.ChatRoom.id), reverse=True)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        set_next_cursor(response, created_cursor(rows[-1].ChatRoom.last_message_at, rows[-1].ChatRoom.id))
+    
+    online_ids = hub.online_users(row.other_id for row in rows if row.other_id is not None)
+    result = []
+    for row in rows:
+        room_response = ChatRoomResponse.model_validate(row.ChatRoom)
+        if row.other_id is not None:
+            room_response.other_user = UserSummary(
+                **{column.key: getattr(row, f"other_{column.key}") for column in USER_SUMMARY_COLUMNS}
+            )
+            room_response.other_user_online = row.other_id in online_ids
+        room_response.unread_count = row.unread_count
+        result.append(room_response)
+    
+    return result
+
+
+@router.post("/send", response_model=ChatMessageResponse)
+def send_message(
+    message_data: ChatMessageCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders)
+):
+    """Send a message to another user (also pushed to open chat sockets)."""
+    return _create_message(db, loaders, current_user.id, message_data.receiver_id, message_data.content)
+
+
 @router.get("/room/{user_id}", response_model=ChatRoomWithMessages)
 def get_chat_with_user(
     user_id: int,
-    limit: int = 50,
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
+    before_id: Optional[int] = Query(None, description="Older history: messages before this id"),
+    after_id: Optional[int] = Query(None, description="Catch up: messages after this id, oldest first"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders)
 ):
-    """Get chat room and messages with a specific user."""
-    other_user = db.query(User).filter(User.id == user_id).first()
+    """
+    Get the chat room with a user and a page of its messages, in
+    chronological order. Without anchors: the latest `limit` messages.
+    `before_id` scrolls back from the oldest message shown; `after_id`
+    fetches what arrived since the newest one. `has_more` says whether
+    another page exists in that direction.
+
+    Reading has no side effects: mark messages read with POST
+    /chat/read/{room_id}, and the room itself is only created by the first
+    message (until then `id` is null and there are no messages). Unchanged
+    pages are answered with 304 via ETag.
+    """
+    if before_id is not None and after_id is not None:
+        raise HTTPException(status_code=400, detail="Use either before_id or after_id, not both")
+    
+    other_user = loaders.users.get(user_id)
     if not other_user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    room = get_or_create_room(db, current_user.id, user_id)
-    
-    # Get messages
-    messages = db.query(ChatMessage).filter(
-        ChatMessage.room_id == room.id
-    ).order_by(ChatMessage.created_at.desc()).limit(limit).all()
-    
-    # Mark as read
-    db.query(ChatMessage).filter(
-        ChatMessage.room_id == room.id,
-        ChatMessage.sender_id != current_user.id,
-        ChatMessage.is_read == False
-    ).update({"is_read": True, "read_at": datetime.utcnow()})
-    db.commit()
+    room = find_room(db, current_user.id, user_id)
+    if room is None:
+        low, high = sorted((current_user.id, user_id))
+        room_response = ChatRoomWithMessages(user1_id=low, user2_id=high)
+        messages, has_more = [], False
+    else:
+        room_response = ChatRoomWithMessages.model_validate(room)
+        # One range scan of (room_id, id) in either direction
+        query = db.query(ChatMessage).filter(ChatMessage.room_id == room.id)
+        if after_id is not None:
+            messages = query.filter(ChatMessage.id > after_id).order_by(ChatMessage.id.asc()).limit(limit + 1).all()
+            has_more = len(messages) > limit
+            messages = messages[:limit]
+        else:
+            if before_id is not None:
+                query = query.filter(ChatMessage.id < before_id)
+            messages = query.order_by(ChatMessage.id.desc()).limit(limit + 1).all()
+            has_more = len(messages) > limit
+            messages = list(reversed(messages[:limit]))
     
-    room_response = ChatRoomWithMessages.model_validate(room)
-    room_response.other_user = UserSummary.model_validate(other_user)
-    room_response.messages = [ChatMessageResponse.model_validate(m) for m in reversed(messages)]
+    room_response.other_user = other_user
+    room_response.messages = [ChatMessageResponse.model_validate(m) for m in messages]
+    room_response.has_more = has_more
     
+    etag = 'W/"%s"' % hashlib.sha1(room_response.model_dump_json().encode()).hexdigest()
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
     return room_response
 
 
 @router.post("/read/{room_id}")
 def mark_as_read(
     room_id: int,
+    up_to_id: Optional[int] = Query(None, description="Only mark messages up to this id (default: all)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Mark all messages in a room as read."""
-    updated = db.query(ChatMessage).filter(
-        ChatMessage.room_id == room_id,
-        ChatMessage.sender_id != current_user.id,
-        ChatMessage.is_read == False
-    ).update({"is_read": True, "read_at": datetime.utcnow()})
+    """Mark messages in a room as read; the sender gets a read receipt."""
+    room = _participant_room(db, room_id, current_user.id)
+    return {"marked_read": _mark_room_read(db, room, current_user.id, up_to_id)}
+
+
+# ── Live delivery ────────────────────────────────────────────
+
+def _socket_user(token: Optional[str]) -> Optional[Tuple[int, List[int]]]:
+    """The active user a socket's token belongs to and their room ids, else None."""
+    user_id = decode_user_id(token) if token else None
+    if user_id is None:
+        return None
+    db = SessionLocal()
+    try:
+        if not db.query(User.id).filter(User.id == user_id, User.is_active == True).first():
+            return None
+        room_ids = [
+            room_id for (room_id,) in db.query(ChatRoom.id).filter(
+                or_(ChatRoom.user1_id == user_id, ChatRoom.user2_id == user_id)
+            )
+        ]
+        return user_id, room_ids
+    finally:
+        db.close()
+
+
+def _handle_socket_event(user_id: int, event: dict) -> Optional[dict]:
+    """
+    Apply one client event with its own session. Returns a reply for the
+    sender, if any; results reach everyone else through the hub.
+    """
+    db = SessionLocal()
+    try:
+        kind = event.get("type")
+        if kind == "send":
+            payload = ChatMessageCreate.model_validate(event)
+            message = _create_message(db, Loaders(db), user_id, payload.receiver_id, payload.content)
+            return {"type": "sent", "client_id": event.get("client_id"), "message_id": message.id}
+        if kind == "read":
+            room = _participant_room(db, int(event.get("room_id")), user_id)
+            up_to_id = event.get("up_to_id")
+            up_to_id = int(up_to_id) if up_to_id is not None else None
+            return {"type": "marked_read", "room_id": room.id, "count": _mark_room_read(db, room, user_id, up_to_id)}
+        if kind == "ping":
+            return {"type": "pong"}
+        return {"type": "error", "detail": f"Unknown event type: {kind}"}
+    except HTTPException as e:
+        return {"type": "error", "client_id": event.get("client_id"), "detail": e.detail}
+    except ValidationError as e:
+        return {"type": "error", "client_id": event.get("client_id"), "detail": e.errors(include_url=False, include_input=False)}
+    except (TypeError, ValueError) as e:
+        return {"type": "error", "client_id": event.get("client_id"), "detail": f"Invalid event: {e}"}
+    finally:
+        db.close()
+
+
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """
+    Live chat: pushes new messages and read receipts, and accepts
+    {"type": "send", "receiver_id", "content", "client_id"?},
+    {"type": "read", "room_id"} and {"type": "ping"}.
+    Browsers cannot set headers on a WebSocket, so the JWT goes in `token`.
+    """
+    if hub.broker is None:
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)  # Hub not started
+        return
+    socket_user = await run_in_threadpool(_socket_user, token)
+    if socket_user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    user_id, room_ids = socket_user
     
-    db.commit()
-    return {"marked_read": updated}
+    await websocket.accept()
+    connection = ChatConnection(websocket, user_id)
+    await hub.connect(connection, room_ids)
+    sender = asyncio.create_task(connection.send_loop())
+    try:
+        while True:
+            try:
+                event = json.loads(await websocket.receive_text())
+            except ValueError:
+                event = None
+            if not isinstance(event, dict):
+                reply = {"type": "error", "detail": "Events must be JSON objects"}
+            else:
+                reply = await run_in_threadpool(_handle_socket_event, user_id, event)
+            if reply:
+                connection.push(reply)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        await hub.disconnect(connection)
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Response
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Iterable, List, Optional, Set
 from ..database import get_db
 from ..models.user import User
 from ..models.tree import Tree
@@ -11,13 +11,53 @@ from ..schemas.post import (
 )
 from ..schemas.user import UserSummary
 from ..services.auth_utils import get_current_user
+from ..services.fieldsets import parse_fields, load_only_fields, sparse_response
+from ..services.pagination import paginate_newest_first, paginate_by_created, set_next_cursor, NEXT_CURSOR_HEADER
+from ..services import feed_cache, counters, trending
+from ..services.likes import toggle_like
+from ..services.loaders import USER_SUMMARY_COLUMNS, TREE_SUMMARY_COLUMNS
+from ..services.timeline import home_timeline, publish_post
 
 router = APIRouter(prefix="/posts", tags=["Social Feed"])
 
+# Sparse fieldsets: embedded objects and the columns they are looked up by
+POST_FIELD_COLUMNS = {"user": ("user_id",), "tree": ("tree_id",), "is_liked": ()}
+
+# Most post ids one /posts/liked lookup accepts
+MAX_LIKED_LOOKUP = 100
+
+# Extra trending rows fetched to cover posts deleted since they were scored
+TRENDING_SLACK = 10
+
+# Author and tree summaries are joined into the post query, loading only
+# the columns UserSummary / TreeSummary need
+AUTHOR_SUMMARY = joinedload(Post.user).load_only(*USER_SUMMARY_COLUMNS)
+TREE_SUMMARY = joinedload(Post.tree).load_only(*TREE_SUMMARY_COLUMNS)
+
+
+def _liked_post_ids(db: Session, user_id: int, post_ids: Iterable[int]) -> Set[int]:
+    """Which of these posts the user has liked, in one IN query."""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return set()
+    return {
+        post_id for (post_id,) in db.query(Like.post_id).filter(
+            Like.user_id == user_id, Like.post_id.in_(post_ids)
+        )
+    }
+
+
+def _post_response(post: Post, liked_ids: Set[int]) -> PostResponse:
+    """PostResponse from a post loaded with AUTHOR_SUMMARY and TREE_SUMMARY."""
+    post_response = PostResponse.model_validate(post)
+    post_response.is_liked = post.id in liked_ids
+    return post_response
+
 
 @router.post("/", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
 def create_post(
     post_data: PostCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -27,15 +67,12 @@ def create_post(
     if not tree:
         raise HTTPException(status_code=404, detail="Tree not found")
     
-    post = Post(
+    post = publish_post(db, background_tasks, Post(
         tree_id=post_data.tree_id,
         user_id=current_user.id,
         content=post_data.content,
         media_urls=post_data.media_urls or []
-    )
-    db.add(post)
-    db.commit()
-    db.refresh(post)
+    ))
     
     # Add user info
     post_dict = PostResponse.model_validate(post)
@@ -45,46 +82,141 @@ def create_post(
 
 @router.get("/", response_model=List[PostResponse])
 def list_posts(
+    response: Response,
     skip: int = 0,
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     tree_id: Optional[int] = None,
     user_id: Optional[int] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated subset of response fields, e.g. id,content,likes_count"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """List posts (social feed)."""
-    query = db.query(Post)
-    
+    """
+    List posts (social feed), newest first: one query for posts with authors
+    and trees, one for likes. Pass X-Next-Cursor back as `cursor` to page.
+
+    Pages are shared between viewers through feed_cache; only the liked
+    set is looked up per request.
+    """
+    selected = parse_fields(fields, PostResponse)
+    if selected:
+        query = _feed_query(db, tree_id, user_id).options(load_only_fields(Post, selected, POST_FIELD_COLUMNS))
+        if "user" in selected:
+            query = query.options(AUTHOR_SUMMARY)
+        if "tree" in selected:
+            query = query.options(TREE_SUMMARY)
+        posts = paginate_newest_first(query, Post.created_at, Post.id, limit, cursor, response, skip=skip)
+        return _sparse_posts(db, posts, selected, current_user)
+
+    cache_key = feed_cache.page_key(tree_id, user_id, skip, limit, cursor)
+    page = feed_cache.get_page(cache_key)
+    if page is None:
+        query = _feed_query(db, tree_id, user_id).options(AUTHOR_SUMMARY, TREE_SUMMARY)
+        posts = paginate_newest_first(query, Post.created_at, Post.id, limit, cursor, response, skip=skip)
+        page = feed_cache.FeedPage(
+            posts=[PostResponse.model_validate(post) for post in posts],
+            next_cursor=response.headers.get(NEXT_CURSOR_HEADER)
+        )
+        feed_cache.store_page(cache_key, page)
+    else:
+        set_next_cursor(response, page.next_cursor)
+
+    # Per-viewer overlay on the shared page
+    liked_ids = _liked_post_ids(db, current_user.id, [p.id for p in page.posts])
+    return [p.model_copy(update={"is_liked": p.id in liked_ids}) for p in page.posts]
+
+
+def _feed_query(db: Session, tree_id: Optional[int], user_id: Optional[int]):
+    # Joining the tree drops posts of trees deleted but not yet purged
+    query = db.query(Post).join(Post.tree)
     if tree_id:
         query = query.filter(Post.tree_id == tree_id)
     if user_id:
         query = query.filter(Post.user_id == user_id)
+    return query
+
+
+def _sparse_posts(db: Session, posts: List[Post], selected: List[str], current_user: User):
+    """Serialize only the selected post fields, skipping lookups nobody asked for."""
+    computed = {}
+    if "user" in selected:
+        computed["user"] = lambda p: UserSummary.model_validate(p.user) if p.user else None
+    if "tree" in selected:
+        computed["tree"] = lambda p: TreeSummary.model_validate(p.tree) if p.tree else None
+    if "is_liked" in selected:
+        liked_ids = _liked_post_ids(db, current_user.id, [p.id for p in posts])
+        computed["is_liked"] = lambda p: p.id in liked_ids
+    return sparse_response(posts, selected, computed)
+
+
+@router.get("/home", response_model=List[PostResponse])
+def get_home_timeline(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Home feed: your posts and those of users and trees you follow, newest
+    first. Pass X-Next-Cursor back as `cursor` to page.
+    """
+    post_ids, next_cursor = home_timeline(db, current_user.id, limit, cursor)
+    set_next_cursor(response, next_cursor)
+    if not post_ids:
+        return []
     
-    posts = query.order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
+    # Joining the tree drops posts of trees deleted since fan-out
+    posts = {
+        post.id: post
+        for post in db.query(Post).join(Post.tree).options(AUTHOR_SUMMARY, TREE_SUMMARY)
+        .filter(Post.id.in_(post_ids))
+    }
+    liked_ids = _liked_post_ids(db, current_user.id, post_ids)
+    return [_post_response(posts[post_id], liked_ids) for post_id in post_ids if post_id in posts]
+
+
+@router.get("/trending", response_model=List[PostResponse])
+def get_trending_posts(
+    limit: int = Query(20, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Posts with the most recent engagement (likes, comments, verification
+    votes), best first. Served from the trending index, not the engagement tables.
+    """
+    ranked = [post_id for post_id, _ in trending.top(db, "post", limit + TRENDING_SLACK)]
+    if not ranked:
+        return []
     
-    # Add user info and like status
-    result = []
-    for post in posts:
-        post_response = PostResponse.model_validate(post)
-        user = db.query(User).filter(User.id == post.user_id).first()
-        if user:
-            post_response.user = UserSummary.model_validate(user)
-        
-        # Add tree info
-        tree = db.query(Tree).filter(Tree.id == post.tree_id).first()
-        if tree:
-            post_response.tree = TreeSummary.model_validate(tree)
-        
-        # Check if current user liked this post
-        liked = db.query(Like).filter(
-            Like.post_id == post.id,
-            Like.user_id == current_user.id
-        ).first()
-        post_response.is_liked = liked is not None
-        
-        result.append(post_response)
+    # Joining the tree drops posts of deleted trees
+    posts = {
+        post.id: post
+        for post in db.query(Post).join(Post.tree).options(AUTHOR_SUMMARY, TREE_SUMMARY)
+        .filter(Post.id.in_(ranked))
+    }
+    post_ids = [post_id for post_id in ranked if post_id in posts][:limit]
+    liked_ids = _liked_post_ids(db, current_user.id, post_ids)
+    return [_post_response(posts[post_id], liked_ids) for post_id in post_ids]
+
+
+@router.get("/liked")
+def get_liked_posts(
+    ids: str = Query(..., description="Comma-separated post ids, e.g. 12,15,40"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Which of these posts the current user has liked (one query for a whole screen)."""
+    try:
+        post_ids = {int(part) for part in ids.split(",") if part.strip()}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if len(post_ids) > MAX_LIKED_LOOKUP:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_LIKED_LOOKUP} post ids per request")
     
-    return result
+    return {"liked_post_ids": sorted(_liked_post_ids(db, current_user.id, post_ids))}
 
 
 @router.get("/{post_id}", response_model=PostResponse)
@@ -94,27 +226,11 @@ def get_post(
     db: Session = Depends(get_db)
 ):
     """Get a single post."""
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = db.query(Post).options(AUTHOR_SUMMARY, TREE_SUMMARY).filter(Post.id == post_id).first()
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    post_response = PostResponse.model_validate(post)
-    user = db.query(User).filter(User.id == post.user_id).first()
-    if user:
-        post_response.user = UserSummary.model_validate(user)
-    
-    # Add tree info
-    tree = db.query(Tree).filter(Tree.id == post.tree_id).first()
-    if tree:
-        post_response.tree = TreeSummary.model_validate(tree)
-    
-    liked = db.query(Like).filter(
-        Like.post_id == post.id,
-        Like.user_id == current_user.id
-    ).first()
-    post_response.is_liked = liked is not None
-    
-    return post_response
+    return _post_response(post, _liked_post_ids(db, current_user.id, [post.id]))
 
 
 @router.post("/{post_id}/like")
@@ -124,29 +240,21 @@ def like_post(
     db: Session = Depends(get_db)
 ):
     """Like or unlike a post."""
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
+    toggled = toggle_like(db, post_id, current_user.id)
+    if toggled is None:
         raise HTTPException(status_code=404, detail="Post not found")
+    delta, stored_count = toggled
     
-    existing_like = db.query(Like).filter(
-        Like.post_id == post_id,
-        Like.user_id == current_user.id
-    ).first()
-    
-    if existing_like:
-        # Unlike
-        db.delete(existing_like)
-        post.likes_count = max(0, post.likes_count - 1)
-        action = "unliked"
-    else:
-        # Like
-        like = Like(post_id=post_id, user_id=current_user.id)
-        db.add(like)
-        post.likes_count += 1
-        action = "liked"
-    
+    # A delta of 0 means a concurrent tap already liked it
+    action = "unliked" if delta < 0 else "liked"
+    pending = counters.pending(Post, post_id, "likes_count")
+    counters.increment(db, Post, post_id, likes_count=delta)
+    # Re-liking after an unlike does not score the post again
+    scores = delta > 0 and trending.first_credit(db, "post", post_id, current_user.id, "like")
     db.commit()
-    return {"action": action, "likes_count": post.likes_count}
+    if scores:
+        trending.record("post", post_id, "like")
+    return {"action": action, "likes_count": max(0, stored_count + pending + delta)}
 
 
 @router.post("/{post_id}/comments", response_model=CommentResponse)
@@ -167,9 +275,13 @@ def add_comment(
         content=comment_data.content
     )
     db.add(comment)
-    post.comments_count += 1
+    counters.increment(db, Post, post_id, comments_count=1)
+    # Only a user's first comment on a post scores it
+    scores = trending.first_credit(db, "post", post_id, current_user.id, "comment")
     db.commit()
     db.refresh(comment)
+    if scores:
+        trending.record("post", post_id, "comment")
     
     comment_response = CommentResponse.model_validate(comment)
     comment_response.user = UserSummary.model_validate(current_user)
@@ -177,19 +289,28 @@ def add_comment(
 
 
 @router.get("/{post_id}/comments", response_model=List[CommentResponse])
-def get_comments(post_id: int, db: Session = Depends(get_db)):
-    """Get all comments for a post."""
-    comments = db.query(Comment).filter(Comment.post_id == post_id).order_by(Comment.created_at.asc()).all()
-    
-    result = []
-    for comment in comments:
-        comment_response = CommentResponse.model_validate(comment)
-        user = db.query(User).filter(User.id == comment.user_id).first()
-        if user:
-            comment_response.user = UserSummary.model_validate(user)
-        result.append(comment_response)
+def get_comments(
+    post_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    order: str = Query("oldest", pattern="^(oldest|newest)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a page of comments for a post, oldest or newest first. Two queries
+    per page: the comments, then their authors in one IN query. Pass
+    X-Next-Cursor back as `cursor` to page.
+    """
+    query = db.query(Comment).options(
+        selectinload(Comment.user).load_only(*USER_SUMMARY_COLUMNS)
+    ).filter(Comment.post_id == post_id)
+    comments = paginate_by_created(
+        query, Comment.created_at, Comment.id, limit, cursor, response,
+        newest_first=(order == "newest")
+    )
     
-    return result
+    return [CommentResponse.model_validate(comment) for comment in comments]
 
 
 @router.post("/{post_id}/verify")
@@ -205,16 +326,21 @@ def verify_post(
         raise HTTPException(status_code=404, detail="Post not found")
     
     if vote.is_verified:
-        post.verification_votes += 1
-    else:
-        post.verification_votes = max(0, post.verification_votes - 1)
+        counters.increment(db, Post, post_id, verification_votes=1)
+    elif counters.current(post, "verification_votes") > 0:
+        counters.increment(db, Post, post_id, verification_votes=-1)
+    scores = vote.is_verified and trending.first_credit(db, "post", post_id, current_user.id, "verify")
+    db.commit()
+    if scores:
+        trending.record("post", post_id, "verify")
     
-    # Auto-verify if enough votes (threshold: 5)
-    if post.verification_votes >= 5:
+    # Auto-verify if enough votes (the counter flush applies the same threshold)
+    verification_votes = counters.current(post, "verification_votes")
+    if verification_votes >= counters.POST_VERIFY_THRESHOLD and not post.is_verified:
         post.is_verified = True
+        db.commit()
     
-    db.commit()
     return {
-        "verification_votes": post.verification_votes,
+        "verification_votes": verification_votes,
         "is_verified": post.is_verified
     }
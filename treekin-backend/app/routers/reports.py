@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
@@ -11,6 +11,10 @@ from ..schemas.report import (
 )
 from ..schemas.user import UserSummary
 from ..services.auth_utils import get_current_user
+from ..services.fieldsets import parse_fields, load_only_fields, sparse_response
+from ..services.pagination import paginate_newest_first
+from ..services.loaders import Loaders, get_loaders
+from ..services import counters
 
 router = APIRouter(prefix="/reports", tags=["Civic Reports"])
 
@@ -43,28 +47,41 @@ def create_report(
 
 @router.get("/", response_model=List[ReportResponse])
 def list_reports(
+    response: Response,
     skip: int = 0,
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     report_type: Optional[str] = None,
     status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description="Comma-separated subset of response fields, e.g. id,title,status"),
+    db: Session = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders)
 ):
-    """List civic reports."""
+    """List civic reports, newest first (cursor-paginated via X-Next-Cursor)."""
+    selected = parse_fields(fields, ReportResponse)
     query = db.query(CivicReport)
+    if selected:
+        query = query.options(load_only_fields(CivicReport, selected, {"reporter": ("reporter_id",)}))
     
     if report_type:
         query = query.filter(CivicReport.report_type == report_type)
     if status:
         query = query.filter(CivicReport.status == status)
     
-    reports = query.order_by(CivicReport.created_at.desc()).offset(skip).limit(limit).all()
+    reports = paginate_newest_first(query, CivicReport.created_at, CivicReport.id, limit, cursor, response, skip=skip)
     
+    if selected:
+        computed = {}
+        if "reporter" in selected:
+            loaders.users.prime(r.reporter_id for r in reports)
+            computed["reporter"] = lambda r: loaders.users.get(r.reporter_id)
+        return sparse_response(reports, selected, computed)
+
+    loaders.users.prime(r.reporter_id for r in reports)
     result = []
     for report in reports:
         report_response = ReportResponse.model_validate(report)
-        reporter = db.query(User).filter(User.id == report.reporter_id).first()
-        if reporter:
-            report_response.reporter = UserSummary.model_validate(reporter)
+        report_response.reporter = loaders.users.get(report.reporter_id)
         result.append(report_response)
     
     return result
@@ -102,16 +119,18 @@ def get_nearby_reports(
 
 
 @router.get("/{report_id}", response_model=ReportResponse)
-def get_report(report_id: int, db: Session = Depends(get_db)):
+def get_report(
+    report_id: int,
+    db: Session = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders)
+):
     """Get report by ID."""
     report = db.query(CivicReport).filter(CivicReport.id == report_id).first()
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     
     report_response = ReportResponse.model_validate(report)
-    reporter = db.query(User).filter(User.id == report.reporter_id).first()
-    if reporter:
-        report_response.reporter = UserSummary.model_validate(reporter)
+    report_response.reporter = loaders.users.get(report.reporter_id)
     
     return report_response
 
@@ -136,23 +155,22 @@ def vote_report(
     
     vote_value = 1 if vote_data.is_upvote else -1
     
+    up_delta = down_delta = 0
     if existing:
         # Update vote
         if existing.is_upvote == vote_value:
             # Same vote - remove it
             if vote_value == 1:
-                report.upvotes -= 1
+                up_delta = -1
             else:
-                report.downvotes -= 1
+                down_delta = -1
             db.delete(existing)
         else:
             # Change vote
             if vote_value == 1:
-                report.upvotes += 1
-                report.downvotes -= 1
+                up_delta, down_delta = 1, -1
             else:
-                report.upvotes -= 1
-                report.downvotes += 1
+                up_delta, down_delta = -1, 1
             existing.is_upvote = vote_value
     else:
         # New vote
@@ -163,22 +181,26 @@ def vote_report(
         )
         db.add(vote)
         if vote_value == 1:
-            report.upvotes += 1
+            up_delta = 1
         else:
-            report.downvotes += 1
+            down_delta = 1
     
-    report.votes_count = report.upvotes - report.downvotes
+    counters.increment(
+        db, CivicReport, report_id,
+        upvotes=up_delta, downvotes=down_delta, votes_count=up_delta - down_delta
+    )
+    db.commit()
     
-    # Auto-verify if high votes
-    if report.upvotes >= 10 and report.status == "pending":
+    # Auto-verify if high votes (the counter flush applies the same threshold)
+    upvotes = counters.current(report, "upvotes")
+    if upvotes >= counters.REPORT_VERIFY_THRESHOLD and report.status == "pending":
         report.status = "verified"
-    
-    db.commit()
+        db.commit()
     
     return {
-        "upvotes": report.upvotes,
-        "downvotes": report.downvotes,
-        "votes_count": report.votes_count,
+        "upvotes": upvotes,
+        "downvotes": counters.current(report, "downvotes"),
+        "votes_count": counters.current(report, "votes_count"),
         "status": report.status
     }
 
@@ -0,0 +1,108 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from ..database import get_db
+from ..models.user import User
+from ..models.tree import Tree
+from ..models.post import Post
+from ..models.report import CivicReport
+from ..models.chat import ChatMessage
+from ..schemas.search import SearchResult
+from ..services.auth_utils import get_current_user
+from ..services.pagination import encode_cursor, decode_cursor, set_next_cursor
+from ..services.search import (
+    SEARCH_SOURCES, search_available, query_terms, ranked_hits, snippet
+)
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+TITLE_LENGTH = 80
+
+
+def _short(value: Optional[str]) -> str:
+    value = (value or "").strip()
+    first_line = value.splitlines()[0] if value else ""
+    return first_line if len(first_line) <= TITLE_LENGTH else first_line[:TITLE_LENGTH - 1] + "…"
+
+
+def _hydrate(db: Session, hits, terms) -> List[SearchResult]:
+    """Load the matched rows (one IN query per type) and build results in rank order."""
+    ids_by_kind = {}
+    for kind, row_id, _ in hits:
+        ids_by_kind.setdefault(kind, []).append(row_id)
+
+    models = {"trees": Tree, "posts": Post, "reports": CivicReport, "messages": ChatMessage}
+    rows = {
+        (kind, row.id): row
+        for kind, ids in ids_by_kind.items()
+        for row in db.query(models[kind]).filter(models[kind].id.in_(ids))
+    }
+
+    results = []
+    for kind, row_id, rank in hits:
+        row = rows.get((kind, row_id))
+        if row is None:  # deleted since the index was read
+            continue
+        result = SearchResult(type=kind, id=row_id, title="", score=-rank, created_at=row.created_at)
+        if kind == "trees":
+            result.title = row.name
+            result.snippet = snippet(row.description, terms) or row.species
+        elif kind == "posts":
+            result.title = _short(row.content)
+            result.snippet = snippet(row.content, terms)
+            result.tree_id = row.tree_id
+        elif kind == "reports":
+            result.title = row.title
+            result.snippet = snippet(row.description, terms)
+        else:
+            result.title = _short(row.content)
+            result.snippet = snippet(row.content, terms)
+            result.room_id = row.room_id
+        results.append(result)
+    return results
+
+
+@router.get("/", response_model=List[SearchResult])
+def search(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[str] = Query(None, description="Comma-separated subset of trees,posts,reports,messages"),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Ranked full-text search across trees, posts, civic reports and the
+    caller's own chat messages. Pass X-Next-Cursor back as `cursor` to page.
+    """
+    if not search_available():
+        raise HTTPException(status_code=503, detail="Search is not available on this database")
+
+    terms = query_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query must contain letters or digits")
+
+    kinds = list(SEARCH_SOURCES)
+    if types:
+        # Deduplicated in order: a repeated type would return its rows twice
+        kinds = list(dict.fromkeys(kind.strip() for kind in types.split(",") if kind.strip()))
+        unknown = sorted(set(kinds) - set(SEARCH_SOURCES))
+        if unknown or not kinds:
+            raise HTTPException(status_code=400, detail=f"Unknown search types: {', '.join(unknown)}")
+
+    after = None
+    if cursor:
+        rank, kind, row_id = decode_cursor(cursor, 3)
+        try:
+            after = (float(rank), str(kind), int(row_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    hits = ranked_hits(db, terms, kinds, current_user.id, limit, after)
+    if len(hits) > limit:
+        hits = hits[:limit]
+        last_kind, last_id, last_rank = hits[-1]
+        set_next_cursor(response, encode_cursor(last_rank, last_kind, last_id))
+    
+    return _hydrate(db, hits, terms)
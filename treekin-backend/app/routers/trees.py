@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import (
+    APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Form, Query, Response
+)
 from sqlalchemy.orm import Session
 from sqlalchemy import func as sa_func
 from typing import List, Optional
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import json
 import os
 import uuid
-import shutil
 from ..database import get_db
-from sqlalchemy.orm.attributes import flag_modified
 from ..models.user import User
-from ..models.tree import Tree, TreeEvent
+from ..models.tree import Tree, TreeEvent, TreeImage
 from ..models.carbon import CarbonCredit, TreditTransaction
 from ..schemas.tree import (
     TreeCreate, TreeUpdate, TreeResponse,
@@ -18,24 +20,132 @@ from ..schemas.tree import (
 from ..models.post import Post  # Import Post model
 from ..services.auth_utils import get_current_user
 from ..services.geo_utils import haversine_distance, extract_exif_gps, find_nearby_trees
-from ..services.ai_validator import validate_tree_photo
+from ..services.ai_validator import validate_tree_photo, validate_tree_photos, NO_VERDICT_LABELS
+from ..services.validation_policy import (
+    should_validate, record_outcome, get_policy_stats, SAMPLED_OUT_LABEL
+)
+from ..services.storage import (
+    UPLOADS_DIR, UPLOADS_URL_PREFIX, save_upload, finalize_upload, perceptual_hash
+)
+from ..services.cleanup import run_purge
+from ..services.idempotency import IdempotentRequest, idempotent_request
+from ..services.pagination import encode_cursor, decode_cursor, set_next_cursor, paginate_newest_first
+from ..services.fieldsets import parse_fields, load_only_fields, sparse_response
+from ..services.loaders import Loaders, get_loaders
+from ..services import counters, timeline, trending
 from ..config import settings
 
-# Save uploads to frontend public folder so Vite serves them directly
-FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "..", "treekin-frontend", "public", "assets", "trees")
-UPLOADS_DIR = FRONTEND_DIR
 os.makedirs(UPLOADS_DIR, exist_ok=True)
 
 router = APIRouter(prefix="/trees", tags=["Trees"])
 
+# Sparse fieldsets: response fields that aren't backed by a same-named column
+TREE_FIELD_COLUMNS = {"cover_image_url": ("main_image_url", "latest_image_url")}
+TREE_COMPUTED_FIELDS = {"cover_image_url": lambda t: t.main_image_url or t.latest_image_url}
+FIELDS_QUERY = Query(None, description="Comma-separated subset of response fields, e.g. id,name,cover_image_url")
+
+
+ALLOWED_IMAGE_TYPES = ["image/jpeg", "image/png", "image/webp", "image/gif"]
+MAX_PHOTO_DISTANCE_M = 50
+MAX_BATCH_FILES = 20
+
+
+def _policy_result(db: Session, user: User) -> Optional[dict]:
+    """Result for uploads that skip the classifier (disabled or sampled out), else None."""
+    if not settings.ai_validation_enabled:
+        return {"valid": True, "confidence": 0.0, "label": "skipped", "reason": "AI validation disabled"}
+
+    if not should_validate(db, user):
+        record_outcome(db, user.id, "skipped")
+        return {
+            "valid": True,
+            "confidence": 0.0,
+            "label": SAMPLED_OUT_LABEL,
+            "reason": "AI validation sampled out (trusted uploader)"
+        }
+    return None
+
+
+def _record_verdict(db: Session, user_id: int, ai_result: dict) -> None:
+    """Feed a classifier verdict into the user's validation history."""
+    if not ai_result["valid"]:
+        record_outcome(db, user_id, "rejected")
+    # Fail-open results (model unavailable) must not build up trust
+    elif ai_result.get("label") not in NO_VERDICT_LABELS:
+        record_outcome(db, user_id, "accepted")
+
+
+def _validate_upload(db: Session, user: User, file_path: str) -> dict:
+    """
+    AI-validate a saved upload, subject to the trust sampling policy.
+    Removes the file and raises 400 if the photo is rejected.
+    """
+    skipped = _policy_result(db, user)
+    if skipped:
+        return skipped
+
+    ai_result = validate_tree_photo(file_path, hf_token=settings.hf_api_token or None)
+    _record_verdict(db, user.id, ai_result)
+    if not ai_result["valid"]:
+        os.remove(file_path)
+        # Commit the rejection now - the request is about to fail
+        db.commit()
+        raise HTTPException(
+            status_code=400,
+            detail=f"Photo rejected: {ai_result['reason']}"
+        )
+    return ai_result
+
+
+def _photo_distance_error(tree: Tree, photo_lat: Optional[float], photo_lng: Optional[float]) -> Optional[str]:
+    """Error message if the photo was taken too far from the tree, else None."""
+    if photo_lat and photo_lng and tree.geo_lat and tree.geo_lng:
+        distance = haversine_distance(photo_lat, photo_lng, tree.geo_lat, tree.geo_lng)
+        if distance > MAX_PHOTO_DISTANCE_M:
+            return (f"Photo was taken {int(distance)}m from the tree. "
+                    f"Must be within {MAX_PHOTO_DISTANCE_M}m to verify you're near your tree.")
+    return None
+
+
+def _parse_update_date(uploaded_at: Optional[str]):
+    """
+    Parse a growth update's date (ISO datetime or YYYY-MM-DD, not in the future).
+    Returns (parsed datetime, string to echo back).
+    """
+    if not uploaded_at:
+        parsed_date = datetime.utcnow()
+        return parsed_date, parsed_date.isoformat()
+
+    try:
+        parsed_date = datetime.fromisoformat(uploaded_at.replace("Z", "+00:00"))
+        if parsed_date.tzinfo:
+            compare_dt = datetime.now(parsed_date.tzinfo)
+        else:
+            compare_dt = datetime.utcnow()
+        if parsed_date > compare_dt:
+            raise HTTPException(status_code=400, detail="Date cannot be in the future")
+    except ValueError:
+        # Try simpler date format (YYYY-MM-DD)
+        try:
+            parsed_date = datetime.strptime(uploaded_at, "%Y-%m-%d")
+            if parsed_date.date() > datetime.utcnow().date():
+                raise HTTPException(status_code=400, detail="Date cannot be in the future")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format")
+    return parsed_date, uploaded_at
+
 
 @router.post("/", response_model=TreeResponse, status_code=status.HTTP_201_CREATED)
 def create_tree(
     tree_data: TreeCreate,
+    idem: IdempotentRequest = Depends(idempotent_request),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Plant a new tree."""
+    """Plant a new tree. Send an Idempotency-Key header to make retries safe."""
+    if idem.replay:
+        return idem.replay
+
     try:
         # Geo-validation: Check if a tree already exists within 5 meters
         if tree_data.geo_lat and tree_data.geo_lng:
@@ -82,7 +192,7 @@ def create_tree(
         bonus_tx.reference_id = f"plant_bonus_{tree.id}"
         db.commit()
         
-        return tree
+        return idem.save(tree)
     except Exception as e:
         import traceback
         print(f"ERROR creating tree: {type(e).__name__}: {e}")
@@ -92,15 +202,24 @@ def create_tree(
 
 @router.get("/", response_model=List[TreeResponse])
 def list_trees(
+    response: Response,
     skip: int = 0,
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     status: Optional[str] = None,
     event_type: Optional[str] = None,
     owner_id: Optional[int] = None,
+    fields: Optional[str] = FIELDS_QUERY,
     db: Session = Depends(get_db)
 ):
-    """List trees with optional filters."""
+    """
+    List trees with optional filters, newest first.
+    Pass the X-Next-Cursor response header back as `cursor` for the next page.
+    """
+    selected = parse_fields(fields, TreeResponse)
     query = db.query(Tree)
+    if selected:
+        query = query.options(load_only_fields(Tree, selected, TREE_FIELD_COLUMNS))
     
     if status:
         query = query.filter(Tree.status == status)
@@ -109,33 +228,47 @@ def list_trees(
     if owner_id:
         query = query.filter(Tree.owner_id == owner_id)
     
-    trees = query.order_by(Tree.created_at.desc()).offset(skip).limit(limit).all()
+    trees = paginate_newest_first(query, Tree.created_at, Tree.id, limit, cursor, response, skip=skip)
+    if selected:
+        return sparse_response(trees, selected, TREE_COMPUTED_FIELDS)
     return trees
 
 
 @router.get("/my", response_model=List[TreeResponse])
 def get_my_trees(
+    fields: Optional[str] = FIELDS_QUERY,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get trees owned or adopted by current user."""
-    trees = db.query(Tree).filter(
+    selected = parse_fields(fields, TreeResponse)
+    query = db.query(Tree)
+    if selected:
+        query = query.options(load_only_fields(Tree, selected, TREE_FIELD_COLUMNS))
+
+    trees = query.filter(
         (Tree.owner_id == current_user.id) | (Tree.adopter_id == current_user.id)
     ).all()
+    if selected:
+        return sparse_response(trees, selected, TREE_COMPUTED_FIELDS)
     return trees
 
 
 @router.get("/map")
-def get_map_trees(db: Session = Depends(get_db)):
+def get_map_trees(
+    db: Session = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders)
+):
     """Get all trees with valid coordinates for the Go Green Map."""
     trees = db.query(Tree).filter(
         Tree.geo_lat.isnot(None),
         Tree.geo_lng.isnot(None)
     ).all()
 
+    loaders.users.prime(t.owner_id for t in trees)
     result = []
     for t in trees:
-        owner = db.query(User).filter(User.id == t.owner_id).first()
+        owner = loaders.users.get(t.owner_id)
         result.append({
             "id": t.id,
             "name": t.name,
@@ -152,6 +285,34 @@ def get_map_trees(db: Session = Depends(get_db)):
     return result
 
 
+@router.get("/trending", response_model=List[TreeResponse])
+def get_trending_trees(
+    limit: int = Query(20, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """
+    Trees with the most recent activity (growth updates and engagement on
+    their posts), best first. Served from the trending index.
+    """
+    # A few extra rows cover trees deleted since they were scored
+    ranked = [tree_id for tree_id, _ in trending.top(db, "tree", limit + 10)]
+    if not ranked:
+        return []
+    trees = {tree.id: tree for tree in db.query(Tree).filter(Tree.id.in_(ranked))}
+    return [trees[tree_id] for tree_id in ranked if tree_id in trees][:limit]
+
+
+@router.get("/validation/stats")
+def get_validation_stats(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """AI validation sampling stats: how many uploads the trust policy skipped."""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return get_policy_stats(db)
+
+
 @router.get("/{tree_id}", response_model=TreeResponse)
 def get_tree(tree_id: int, db: Session = Depends(get_db)):
     """Get tree by ID."""
@@ -245,6 +406,40 @@ def get_tree_events(tree_id: int, db: Session = Depends(get_db)):
     return events
 
 
+@router.post("/{tree_id}/follow")
+def follow_tree(
+    tree_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Follow a tree: its new posts appear in your home timeline."""
+    tree = db.query(Tree).filter(Tree.id == tree_id).first()
+    if not tree:
+        raise HTTPException(status_code=404, detail="Tree not found")
+    
+    followers = counters.current(tree, "followers_count")
+    delta = timeline.follow(db, current_user.id, "tree", tree)
+    db.commit()
+    return {"following": True, "followers_count": followers + delta}
+
+
+@router.delete("/{tree_id}/follow")
+def unfollow_tree(
+    tree_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Stop following a tree."""
+    tree = db.query(Tree).filter(Tree.id == tree_id).first()
+    if not tree:
+        raise HTTPException(status_code=404, detail="Tree not found")
+    
+    followers = counters.current(tree, "followers_count")
+    delta = timeline.unfollow(db, current_user.id, "tree", tree_id)
+    db.commit()
+    return {"following": False, "followers_count": max(0, followers + delta)}
+
+
 @router.get("/nearby")
 def get_nearby_trees(
     lat: float,
@@ -276,31 +471,49 @@ def get_nearby_trees(
 
 
 @router.get("/{tree_id}/updates")
-def get_tree_updates(tree_id: int, db: Session = Depends(get_db)):
-    """Get all growth update photos for a tree."""
-    tree = db.query(Tree).filter(Tree.id == tree_id).first()
-    if not tree:
+def get_tree_updates(
+    tree_id: int,
+    response: Response,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get growth update photos for a tree, most recent first.
+    Pass the X-Next-Cursor response header back as `cursor` for the next page.
+    """
+    if not db.query(Tree.id).filter(Tree.id == tree_id).first():
         raise HTTPException(status_code=404, detail="Tree not found")
 
-    images = tree.images or []
-    updates = []
-    for i, img in enumerate(images):
-        if isinstance(img, dict):
-            updates.append({
-                "image_url": img.get("url", ""),
-                "caption": img.get("caption", f"Growth update #{i + 1}"),
-                "uploaded_at": img.get("uploaded_at", ""),
-            })
-        elif isinstance(img, str):
-            updates.append({
-                "image_url": img,
-                "caption": f"Growth update #{i + 1}",
-                "uploaded_at": "",
-            })
-
-    # Most recent first
-    updates.reverse()
-    return updates
+    # Keyset page over the (tree_id, id) index
+    query = db.query(TreeImage).filter(TreeImage.tree_id == tree_id)
+    if cursor:
+        (before_id,) = decode_cursor(cursor, 1)
+        query = query.filter(TreeImage.id < before_id)
+    photos = query.order_by(TreeImage.id.desc()).limit(limit + 1).all()
+
+    has_more = len(photos) > limit
+    photos = photos[:limit]
+    if has_more:
+        set_next_cursor(response, encode_cursor(photos[-1].id))
+    if not photos:
+        return []
+
+    # 1-based position of the newest photo on this page, for default captions
+    position = db.query(sa_func.count(TreeImage.id)).filter(
+        TreeImage.tree_id == tree_id,
+        TreeImage.id <= photos[0].id
+    ).scalar()
+
+    return [
+        {
+            "id": photo.id,
+            "image_url": photo.url,
+            "caption": photo.caption or f"Growth update #{position - i}",
+            "uploaded_at": photo.taken_at.isoformat() if photo.taken_at else "",
+        }
+        for i, photo in enumerate(photos)
+    ]
 
 
 @router.post("/{tree_id}/updates")
@@ -309,10 +522,14 @@ def add_tree_update(
     file: UploadFile = File(...),
     caption: Optional[str] = Form(None),
     uploaded_at: Optional[str] = Form(None),
+    idem: IdempotentRequest = Depends(idempotent_request),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Add a growth update (photo + caption + date) to a tree."""
+    if idem.replay:
+        return idem.replay
+
     # Verify tree exists and user owns/adopted it
     tree = db.query(Tree).filter(Tree.id == tree_id).first()
     if not tree:
@@ -322,41 +539,21 @@ def add_tree_update(
         raise HTTPException(status_code=403, detail="Not authorized to add updates to this tree")
 
     # Validate file type
-    allowed_types = ["image/jpeg", "image/png", "image/webp", "image/gif"]
-    if file.content_type not in allowed_types:
+    if file.content_type not in ALLOWED_IMAGE_TYPES:
         raise HTTPException(status_code=400, detail="Only image files (JPEG, PNG, WebP, GIF) allowed")
 
     # Validate uploaded_at date (cannot be in the future)
-    if uploaded_at:
-        try:
-            parsed_date = datetime.fromisoformat(uploaded_at.replace("Z", "+00:00"))
-            if parsed_date.tzinfo:
-                compare_dt = datetime.now(parsed_date.tzinfo)
-            else:
-                compare_dt = datetime.utcnow()
-            if parsed_date > compare_dt:
-                raise HTTPException(status_code=400, detail="Date cannot be in the future")
-        except ValueError:
-            # Try simpler date format (YYYY-MM-DD)
-            try:
-                parsed_date = datetime.strptime(uploaded_at, "%Y-%m-%d")
-                if parsed_date.date() > datetime.utcnow().date():
-                    raise HTTPException(status_code=400, detail="Date cannot be in the future")
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid date format")
-    else:
-        uploaded_at = datetime.utcnow().isoformat()
-
-    # Generate unique filename and save
+    parsed_date, uploaded_at = _parse_update_date(uploaded_at)
+
+    # Save under a temporary name; it gets its content-addressed name once validated
     file_ext = os.path.splitext(file.filename)[1] if file.filename else ".jpg"
-    unique_filename = f"tree_{tree_id}_{uuid.uuid4().hex}{file_ext}"
+    unique_filename = f".upload_{uuid.uuid4().hex}{file_ext}"
     user_folder = os.path.join(UPLOADS_DIR, current_user.username)
     os.makedirs(user_folder, exist_ok=True)
     file_path = os.path.join(user_folder, unique_filename)
 
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        content_sha256 = save_upload(file.file, file_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save image: {str(e)}")
 
@@ -369,71 +566,232 @@ def add_tree_update(
         photo_lng = exif_gps["lng"]
 
     # Validate photo was taken near the tree (within 50m)
-    if photo_lat and photo_lng and tree.geo_lat and tree.geo_lng:
-        distance = haversine_distance(photo_lat, photo_lng, tree.geo_lat, tree.geo_lng)
-        if distance > 50:
-            # Remove the saved file since it's invalid
-            os.remove(file_path)
-            raise HTTPException(
-                status_code=400,
-                detail=f"Photo was taken {int(distance)}m from the tree. "
-                       f"Must be within 50m to verify you're near your tree."
-            )
-
-    # AI Validation: Check if photo contains a tree/plant
-    ai_result = {"valid": True, "confidence": 0.0, "label": "skipped", "reason": "AI validation disabled"}
-    if settings.ai_validation_enabled:
-        ai_result = validate_tree_photo(file_path, hf_token=settings.hf_api_token or None)
-        if not ai_result["valid"]:
-            os.remove(file_path)
-            raise HTTPException(
-                status_code=400,
-                detail=f"Photo rejected: {ai_result['reason']}"
-            )
-
-    image_url = f"/assets/trees/{current_user.username}/{unique_filename}"
+    distance_error = _photo_distance_error(tree, photo_lat, photo_lng)
+    if distance_error:
+        # Remove the saved file since it's invalid
+        os.remove(file_path)
+        raise HTTPException(status_code=400, detail=distance_error)
+
+    # AI Validation: Check if photo contains a tree/plant (sampled for trusted users)
+    ai_result = _validate_upload(db, current_user, file_path)
+
+    unique_filename = finalize_upload(file_path, content_sha256, file_ext)
+    file_path = os.path.join(user_folder, unique_filename)
+    image_url = f"{UPLOADS_URL_PREFIX}/{current_user.username}/{unique_filename}"
 
     # Set as main image if tree has none
     if not tree.main_image_url:
         tree.main_image_url = image_url
 
-    # Append to images JSON array
-    current_images = tree.images or []
-    new_entry = {
-        "url": image_url,
-        "caption": caption or "",
-        "uploaded_at": uploaded_at,
-        "uploaded_by": current_user.id,
-        "photo_lat": photo_lat,
-        "photo_lng": photo_lng,
-        "ai_valid": ai_result.get("valid", True),
-        "ai_confidence": ai_result.get("confidence", 0.0),
-        "ai_label": ai_result.get("label", "")
-    }
-    current_images.append(new_entry)
-    tree.images = current_images
-    flag_modified(tree, "images")
+    # Append a photo row (O(1), no rewrite of earlier photos)
+    db.add(TreeImage(
+        tree_id=tree_id,
+        url=image_url,
+        caption=caption or None,
+        uploaded_by=current_user.id,
+        taken_at=parsed_date,
+        photo_lat=photo_lat,
+        photo_lng=photo_lng,
+        ai_valid=ai_result.get("valid", True),
+        ai_confidence=ai_result.get("confidence", 0.0),
+        ai_label=ai_result.get("label", ""),
+        sha256=content_sha256,
+        phash=perceptual_hash(file_path)
+    ))
 
     db.commit()
-    db.refresh(tree)
+    trending.record("tree", tree_id, "growth_update")
 
-    return {
+    return idem.save({
         "image_url": image_url,
         "caption": caption or "",
         "uploaded_at": uploaded_at
+    })
+
+
+@router.post("/updates/batch")
+def add_tree_updates_batch(
+    files: List[UploadFile] = File(...),
+    items: str = Form(..., description='JSON array with one {"tree_id", "caption", "uploaded_at"} per file'),
+    idem: IdempotentRequest = Depends(idempotent_request),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Add several growth updates (possibly for several trees) in one request.
+
+    EXIF/geo checks run concurrently and AI validation uses batched inference.
+    Accepted photos are committed together; every file gets its own result,
+    so one bad photo does not fail the rest.
+    """
+    if idem.replay:
+        return idem.replay
+
+    try:
+        entries = json.loads(items)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="items must be valid JSON")
+    if not isinstance(entries, list) or len(entries) != len(files):
+        raise HTTPException(status_code=400, detail="items must be a JSON array with one entry per file")
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_FILES} files per batch")
+
+    tree_ids = {entry.get("tree_id") for entry in entries if isinstance(entry, dict)}
+    trees = {
+        t.id: t for t in db.query(Tree).filter(Tree.id.in_([i for i in tree_ids if isinstance(i, int)]))
     }
 
+    results = [
+        {"index": i, "filename": file.filename, "tree_id": None, "status": "rejected", "error": None}
+        for i, file in enumerate(files)
+    ]
+    user_folder = os.path.join(UPLOADS_DIR, current_user.username)
+    os.makedirs(user_folder, exist_ok=True)
+
+    def reject(upload: dict, error: str):
+        if os.path.exists(upload["path"]):
+            os.remove(upload["path"])
+        results[upload["index"]]["error"] = error
+
+    # 1. Per-file checks and save to temporary names
+    uploads = []
+    for i, (file, entry) in enumerate(zip(files, entries)):
+        try:
+            if not isinstance(entry, dict) or not isinstance(entry.get("tree_id"), int):
+                raise HTTPException(status_code=400, detail="Entry needs an integer tree_id")
+            for field in ("caption", "uploaded_at"):
+                if entry.get(field) is not None and not isinstance(entry[field], str):
+                    raise HTTPException(status_code=400, detail=f"Entry {field} must be a string")
+            tree = trees.get(entry["tree_id"])
+            if not tree:
+                raise HTTPException(status_code=404, detail="Tree not found")
+            if tree.owner_id != current_user.id and tree.adopter_id != current_user.id:
+                raise HTTPException(status_code=403, detail="Not authorized to add updates to this tree")
+            if file.content_type not in ALLOWED_IMAGE_TYPES:
+                raise HTTPException(status_code=400, detail="Only image files (JPEG, PNG, WebP, GIF) allowed")
+            parsed_date, uploaded_at = _parse_update_date(entry.get("uploaded_at"))
+        except HTTPException as e:
+            if isinstance(entry, dict):
+                results[i]["tree_id"] = entry.get("tree_id")
+            results[i]["error"] = e.detail
+            continue
+
+        file_ext = os.path.splitext(file.filename)[1] if file.filename else ".jpg"
+        file_path = os.path.join(user_folder, f".upload_{uuid.uuid4().hex}{file_ext}")
+        results[i]["tree_id"] = tree.id
+        try:
+            content_sha256 = save_upload(file.file, file_path)
+        except Exception as e:
+            results[i]["error"] = f"Failed to save image: {str(e)}"
+            continue
+
+        uploads.append({
+            "index": i,
+            "tree": tree,
+            "path": file_path,
+            "ext": file_ext,
+            "sha256": content_sha256,
+            "caption": entry.get("caption"),
+            "parsed_date": parsed_date,
+            "uploaded_at": uploaded_at,
+        })
+
+    # 2. Geo-validation, EXIF parsed concurrently
+    with ThreadPoolExecutor(max_workers=min(8, len(uploads) or 1)) as pool:
+        exif_results = list(pool.map(extract_exif_gps, [u["path"] for u in uploads]))
+
+    near_enough = []
+    for upload, exif_gps in zip(uploads, exif_results):
+        upload["photo_lat"] = exif_gps["lat"] if exif_gps else None
+        upload["photo_lng"] = exif_gps["lng"] if exif_gps else None
+        distance_error = _photo_distance_error(upload["tree"], upload["photo_lat"], upload["photo_lng"])
+        if distance_error:
+            reject(upload, distance_error)
+        else:
+            near_enough.append(upload)
+
+    # 3. AI validation: sampling policy per file, one batched inference for the rest
+    to_classify = []
+    for upload in near_enough:
+        upload["ai_result"] = _policy_result(db, current_user)
+        if upload["ai_result"] is None:
+            to_classify.append(upload)
+
+    for upload, ai_result in zip(to_classify, validate_tree_photos([u["path"] for u in to_classify])):
+        upload["ai_result"] = ai_result
+        _record_verdict(db, current_user.id, ai_result)
+
+    accepted = []
+    for upload in near_enough:
+        if upload["ai_result"]["valid"]:
+            accepted.append(upload)
+        else:
+            reject(upload, f"Photo rejected: {upload['ai_result']['reason']}")
+
+    # 4. Store accepted photos under their content-addressed names, one commit
+    for upload in accepted:
+        filename = finalize_upload(upload["path"], upload["sha256"], upload["ext"])
+        upload["path"] = os.path.join(user_folder, filename)
+        upload["image_url"] = f"{UPLOADS_URL_PREFIX}/{current_user.username}/{filename}"
+
+    with ThreadPoolExecutor(max_workers=min(8, len(accepted) or 1)) as pool:
+        phashes = list(pool.map(perceptual_hash, [u["path"] for u in accepted]))
+
+    for upload, phash in zip(accepted, phashes):
+        tree = upload["tree"]
+        if not tree.main_image_url:
+            tree.main_image_url = upload["image_url"]
+
+        ai_result = upload["ai_result"]
+        db.add(TreeImage(
+            tree_id=tree.id,
+            url=upload["image_url"],
+            caption=upload["caption"] or None,
+            uploaded_by=current_user.id,
+            taken_at=upload["parsed_date"],
+            photo_lat=upload["photo_lat"],
+            photo_lng=upload["photo_lng"],
+            ai_valid=ai_result.get("valid", True),
+            ai_confidence=ai_result.get("confidence", 0.0),
+            ai_label=ai_result.get("label", ""),
+            sha256=upload["sha256"],
+            phash=phash
+        ))
+        results[upload["index"]].update({
+            "status": "accepted",
+            "image_url": upload["image_url"],
+            "caption": upload["caption"] or "",
+            "uploaded_at": upload["uploaded_at"],
+        })
+
+    # Rejections are recorded in the validation history even if nothing was accepted
+    updated_tree_ids = [upload["tree"].id for upload in accepted]
+    db.commit()
+    for updated_tree_id in updated_tree_ids:
+        trending.record("tree", updated_tree_id, "growth_update")
+
+    return idem.save({
+        "accepted": len(accepted),
+        "rejected": len(files) - len(accepted),
+        "results": results
+    })
+
 
 @router.post("/{tree_id}/upload-image")
 def upload_tree_image(
     tree_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     latitude: Optional[float] = Form(None),
     longitude: Optional[float] = Form(None),
+    idem: IdempotentRequest = Depends(idempotent_request),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Upload an image for a tree with optional geolocation."""
+    if idem.replay:
+        return idem.replay
+
     # Verify tree exists and user owns it
     tree = db.query(Tree).filter(Tree.id == tree_id).first()
     if not tree:
@@ -443,21 +801,19 @@ def upload_tree_image(
         raise HTTPException(status_code=403, detail="Not authorized to upload to this tree")
     
     # Validate file type
-    allowed_types = ["image/jpeg", "image/png", "image/webp", "image/gif"]
-    if file.content_type not in allowed_types:
+    if file.content_type not in ALLOWED_IMAGE_TYPES:
         raise HTTPException(status_code=400, detail="Only image files (JPEG, PNG, WebP, GIF) allowed")
     
-    # Generate unique filename and save in per-username folder
+    # Save in per-username folder under a temporary name until validated
     file_ext = os.path.splitext(file.filename)[1] if file.filename else ".jpg"
-    unique_filename = f"tree_{tree_id}_{uuid.uuid4().hex}{file_ext}"
+    unique_filename = f".upload_{uuid.uuid4().hex}{file_ext}"
     user_folder = os.path.join(UPLOADS_DIR, current_user.username)
     os.makedirs(user_folder, exist_ok=True)
     file_path = os.path.join(user_folder, unique_filename)
     
     # Save file to disk
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        content_sha256 = save_upload(file.file, file_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save image: {str(e)}")
     
@@ -471,62 +827,37 @@ def upload_tree_image(
             photo_lng = exif_gps["lng"]
     
     # Validate photo was taken near the tree (within 50m)
-    if photo_lat and photo_lng and tree.geo_lat and tree.geo_lng:
-        distance = haversine_distance(photo_lat, photo_lng, tree.geo_lat, tree.geo_lng)
-        if distance > 50:
-            os.remove(file_path)
-            raise HTTPException(
-                status_code=400,
-                detail=f"Photo was taken {int(distance)}m from the tree. "
-                       f"Must be within 50m to verify you're near your tree."
-            )
+    distance_error = _photo_distance_error(tree, photo_lat, photo_lng)
+    if distance_error:
+        os.remove(file_path)
+        raise HTTPException(status_code=400, detail=distance_error)
     
-    # AI Validation: Check if photo contains a tree/plant
-    ai_result = {"valid": True, "confidence": 0.0, "label": "skipped", "reason": "AI validation disabled"}
-    if settings.ai_validation_enabled:
-        ai_result = validate_tree_photo(file_path, hf_token=settings.hf_api_token or None)
-        if not ai_result["valid"]:
-            os.remove(file_path)
-            raise HTTPException(
-                status_code=400,
-                detail=f"Photo rejected: {ai_result['reason']}"
-            )
+    # AI Validation: Check if photo contains a tree/plant (sampled for trusted users)
+    ai_result = _validate_upload(db, current_user, file_path)
     
-    # Generate URL for the image (served by Vite from public/assets/trees/{username}/)
-    image_url = f"/assets/trees/{current_user.username}/{unique_filename}"
+    # Content-addressed URL (served by the backend from UPLOADS_DIR/{username}/)
+    unique_filename = finalize_upload(file_path, content_sha256, file_ext)
+    file_path = os.path.join(user_folder, unique_filename)
+    image_url = f"{UPLOADS_URL_PREFIX}/{current_user.username}/{unique_filename}"
     
     # Update tree record
     if not tree.main_image_url:
         tree.main_image_url = image_url
     
-    # Add to images array
-    current_images = tree.images or []
-    current_images.append({
-        "url": image_url,
-        "latitude": photo_lat,
-        "longitude": photo_lng,
-        "uploaded_at": datetime.utcnow().isoformat(),
-        "uploaded_by": current_user.id,
-        "ai_valid": ai_result.get("valid", True),
-        "ai_confidence": ai_result.get("confidence", 0.0),
-        "ai_label": ai_result.get("label", "")
-    })
-    tree.images = current_images
-    flag_modified(tree, "images")
-    
-    # Auto-create a social post for this upload
-    try:
-        new_post = Post(
-            tree_id=tree_id,
-            user_id=current_user.id,
-            content=f"Just planted a new {tree.species or 'tree'}! 🌳 Check it out!",
-            media_urls=[image_url]  # Add the image to the post
-        )
-        db.add(new_post)
-        # Commit will happen with the tree update
-    except Exception as e:
-        print(f"Error creating auto-post: {e}")
-        # Don't fail the upload if post creation fails
+    # Add a photo row
+    db.add(TreeImage(
+        tree_id=tree_id,
+        url=image_url,
+        uploaded_by=current_user.id,
+        taken_at=datetime.utcnow(),
+        photo_lat=photo_lat,
+        photo_lng=photo_lng,
+        ai_valid=ai_result.get("valid", True),
+        ai_confidence=ai_result.get("confidence", 0.0),
+        ai_label=ai_result.get("label", ""),
+        sha256=content_sha256,
+        phash=perceptual_hash(file_path)
+    ))
     
     # Update geolocation if provided and not already set
     if latitude and longitude:
@@ -534,25 +865,38 @@ def upload_tree_image(
             tree.geo_lat = latitude
             tree.geo_lng = longitude
     
-    db.commit()
-    db.refresh(tree)
+    # Auto-create a social post for this upload; committed with the tree update
+    # and fanned out to home timelines like any other post
+    timeline.publish_post(db, background_tasks, Post(
+        tree_id=tree_id,
+        user_id=current_user.id,
+        content=f"Just planted a new {tree.species or 'tree'}! 🌳 Check it out!",
+        media_urls=[image_url]  # Add the image to the post
+    ))
+    trending.record("tree", tree_id, "growth_update")
     
-    return {
+    total_images = db.query(sa_func.count(TreeImage.id)).filter(TreeImage.tree_id == tree_id).scalar()
+    
+    return idem.save({
         "success": True,
         "message": "Image uploaded successfully",
         "image_url": image_url,
         "tree_id": tree_id,
-        "total_images": len(current_images)
-    }
+        "total_images": total_images
+    })
 
 
 @router.delete("/{tree_id}", status_code=status.HTTP_200_OK)
 def delete_tree(
     tree_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Delete a tree and all associated data (posts, events, images)."""
+    """
+    Delete a tree. The tree is hidden immediately; its posts, events,
+    photos and image files are purged in the background.
+    """
     tree = db.query(Tree).filter(Tree.id == tree_id).first()
     if not tree:
         raise HTTPException(status_code=404, detail="Tree not found")
@@ -561,33 +905,6 @@ def delete_tree(
     if tree.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Only the tree owner can delete this tree")
 
-    # Delete uploaded image files from disk
-    try:
-        images = tree.images or []
-        for img in images:
-            url = img.get("url", "") if isinstance(img, dict) else ""
-            if url:
-                # URL format: /assets/trees/{username}/{filename}
-                file_path = os.path.join(
-                    UPLOADS_DIR,
-                    current_user.username,
-                    os.path.basename(url)
-                )
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-
-        # Also delete main image if it's separate
-        if tree.main_image_url:
-            main_path = os.path.join(
-                UPLOADS_DIR,
-                current_user.username,
-                os.path.basename(tree.main_image_url)
-            )
-            if os.path.exists(main_path):
-                os.remove(main_path)
-    except Exception as e:
-        print(f"Warning: Failed to clean up some image files: {e}")
-
     # --- Tredits deduction on delete ---
     PLANTING_BONUS = 50.0
     total_deduction = PLANTING_BONUS
@@ -624,14 +941,15 @@ def delete_tree(
     )
     db.add(deduction_tx)
 
-    # Delete from database (cascade handles posts, events, carbon_records)
+    # Mark as deleted; rows and files are removed by the cleanup worker
     tree_name = tree.name
-    db.delete(tree)
+    tree.deleted_at = datetime.utcnow()
     db.commit()
+    background_tasks.add_task(run_purge)
 
     return {
         "success": True,
-        "message": f"Tree '{tree_name}' has been permanently deleted",
+        "message": f"Tree '{tree_name}' has been deleted",
         "tree_id": tree_id,
         "tredits_deducted": total_deduction,
         "co2_deducted": float(claimed_co2)
@@ -1,23 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from ..database import get_db
 from ..models.user import User
 from ..schemas.user import UserResponse, UserUpdate, UserSummary
 from ..services.auth_utils import get_current_user
+from ..services.pagination import paginate_newest_first
+from ..services import counters, timeline, user_cache
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.get("/", response_model=List[UserSummary])
 def list_users(
+    response: Response,
     skip: int = 0,
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """List all users."""
-    users = db.query(User).filter(User.is_active == True).offset(skip).limit(limit).all()
-    return users
+    """List all users, newest first (cursor-paginated via X-Next-Cursor)."""
+    query = db.query(User).filter(User.is_active == True)
+    return paginate_newest_first(query, User.created_at, User.id, limit, cursor, response, skip=skip)
 
 
 @router.get("/ngos", response_model=List[UserSummary])
@@ -29,6 +33,18 @@ def list_ngos(
     return ngos
 
 
+@router.get("/me/following")
+def get_my_following(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Users and trees the current user follows."""
+    return [
+        {"type": target_type, "id": target_id}
+        for target_type, target_id in timeline.following(db, current_user.id)
+    ]
+
+
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user(user_id: int, db: Session = Depends(get_db)):
     """Get user by ID."""
@@ -50,6 +66,8 @@ def update_profile(
     
     db.commit()
     db.refresh(current_user)
+    # Write-through: the commit dropped the cached summary, store the new one
+    user_cache.store([UserSummary.model_validate(current_user)])
     return current_user
 
 
@@ -69,3 +87,39 @@ def get_user_stats(user_id: int, db: Session = Depends(get_db)):
         "tredits_balance": user.tredits_balance,
         "is_verified": user.is_verified
     }
+
+
+@router.post("/{user_id}/follow")
+def follow_user(
+    user_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Follow a user: their new posts appear in your home timeline."""
+    if user_id == current_user.id:
+        raise HTTPException(status_code=400, detail="Cannot follow yourself")
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    followers = counters.current(user, "followers_count")
+    delta = timeline.follow(db, current_user.id, "user", user)
+    db.commit()
+    return {"following": True, "followers_count": followers + delta}
+
+
+@router.delete("/{user_id}/follow")
+def unfollow_user(
+    user_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Stop following a user."""
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    followers = counters.current(user, "followers_count")
+    delta = timeline.unfollow(db, current_user.id, "user", user_id)
+    db.commit()
+    return {"following": False, "followers_count": max(0, followers + delta)}
@@ -6,3 +6,4 @@ from .carbon import *
 from .chat import *
 from .report import *
 from .auth import *
+from .search import *
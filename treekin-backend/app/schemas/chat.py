@@ -30,6 +30,7 @@ class ChatRoomResponse(BaseModel):
     last_message: Optional[str] = None
     last_message_at: Optional[datetime] = None
     unread_count: int = 0
+    other_user_online: bool = False
     created_at: datetime
 
     class Config:
@@ -37,4 +38,8 @@ class ChatRoomResponse(BaseModel):
 
 
 class ChatRoomWithMessages(ChatRoomResponse):
+    # No room yet (the first message creates it): id and created_at are null
+    id: Optional[int] = None
+    created_at: Optional[datetime] = None
     messages: List[ChatMessageResponse] = []
+    has_more: bool = False  # Another page exists past this one (older, or newer with after_id)
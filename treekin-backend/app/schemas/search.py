@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class SearchResult(BaseModel):
+    """One ranked hit from /search."""
+    type: str  # trees | posts | reports | messages
+    id: int
+    title: str
+    snippet: Optional[str] = None
+    score: float
+    created_at: Optional[datetime] = None
+    tree_id: Optional[int] = None  # posts
+    room_id: Optional[int] = None  # messages
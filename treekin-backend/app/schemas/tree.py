@@ -1,5 +1,5 @@
-from pydantic import BaseModel, field_validator, model_validator
-from typing import Optional, List, Any
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List
 from datetime import datetime
 
 
@@ -64,21 +64,17 @@ class TreeResponse(TreeBase):
     carbon_credits: float = 0.0
     total_tredits_earned: float = 0.0
     main_image_url: Optional[str] = None
-    images: Optional[List[Any]] = []
+    # Photos are not embedded; page through GET /trees/{id}/updates instead
+    image_count: int = 0
+    cover_image_url: Optional[str] = Field(default=None, validation_alias="latest_image_url")
     created_at: datetime
 
-    @field_validator('images', mode='before')
-    @classmethod
-    def parse_images(cls, v):
-        if isinstance(v, str):
-            import json
-            try:
-                return json.loads(v)
-            except:
-                return []
-        if v is None:
-            return []
-        return v
+    @model_validator(mode='after')
+    def pick_cover_image(self):
+        # Chosen main image wins; otherwise the newest growth photo
+        if self.main_image_url:
+            self.cover_image_url = self.main_image_url
+        return self
 
     class Config:
         from_attributes = True
@@ -44,6 +44,7 @@ class UserSummary(BaseModel):
     username: str
     display_name: Optional[str] = None
     avatar_url: Optional[str] = None
+    is_verified: bool = False
 
     class Config:
         from_attributes = True
@@ -9,7 +9,7 @@ Model: google/vit-base-patch16-224 (ImageNet-1k, ~330MB, downloads once)
 """
 
 import os
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from functools import lru_cache
 
 
@@ -52,6 +52,9 @@ CUMULATIVE_TREE_THRESHOLD = 0.03
 # If a reject keyword is found above this, reject  
 REJECT_CONFIDENCE = 0.15
 
+# Labels returned when the model gave no verdict (validation failed open)
+NO_VERDICT_LABELS = {"model_unavailable", "error", "no_results"}
+
 
 @lru_cache(maxsize=1)
 def _get_classifier():
@@ -71,6 +74,81 @@ def _get_classifier():
         return None
 
 
+def _skipped_result(label: str, reason: str) -> Dict:
+    """Result used when the model could not give a verdict (fail open)."""
+    return {
+        "valid": True,
+        "confidence": 0.0,
+        "label": label,
+        "all_labels": [],
+        "reason": reason
+    }
+
+
+def _evaluate_predictions(results: List[Dict]) -> Dict:
+    """Turn raw classifier predictions for one image into an accept/reject verdict."""
+    if not results:
+        return _skipped_result("no_results", "AI validation skipped (no results)")
+
+    # Parse results
+    all_labels = [
+        {"label": r["label"].lower(), "score": round(r["score"], 4)}
+        for r in results
+    ]
+
+    # Check for reject keywords first
+    for item in all_labels:
+        label = item["label"]
+        score = item["score"]
+        for reject_kw in REJECT_KEYWORDS:
+            if reject_kw in label and score >= REJECT_CONFIDENCE:
+                return {
+                    "valid": False,
+                    "confidence": score,
+                    "label": label,
+                    "all_labels": all_labels,
+                    "reason": f"Image appears to be '{label}' (confidence: {score:.0%}), not a tree or plant."
+                }
+
+    # Check for tree/plant keywords
+    best_tree_match = None
+    best_tree_score = 0.0
+    cumulative_tree_score = 0.0
+
+    for item in all_labels:
+        label = item["label"]
+        score = item["score"]
+        for tree_kw in TREE_KEYWORDS:
+            if tree_kw in label:
+                cumulative_tree_score += score
+                if score > best_tree_score:
+                    best_tree_match = label
+                    best_tree_score = score
+                break
+
+    # Accept if best single label OR cumulative score is high enough
+    if best_tree_match and (best_tree_score >= MIN_CONFIDENCE or cumulative_tree_score >= CUMULATIVE_TREE_THRESHOLD):
+        return {
+            "valid": True,
+            "confidence": best_tree_score,
+            "label": best_tree_match,
+            "all_labels": all_labels,
+            "reason": f"Tree/plant detected: '{best_tree_match}' (confidence: {best_tree_score:.0%}, cumulative: {cumulative_tree_score:.0%})"
+        }
+
+    # No tree found
+    top_label = all_labels[0]["label"] if all_labels else "unknown"
+    top_score = all_labels[0]["score"] if all_labels else 0
+    return {
+        "valid": False,
+        "confidence": top_score,
+        "label": top_label,
+        "all_labels": all_labels,
+        "reason": f"No tree or plant detected. Top result: '{top_label}' ({top_score:.0%}). "
+                  f"Please upload a photo of your tree."
+    }
+
+
 def validate_tree_photo(image_path: str, hf_token: Optional[str] = None) -> Dict:
     """
     Validate that an image contains a tree or plant.
@@ -92,90 +170,47 @@ def validate_tree_photo(image_path: str, hf_token: Optional[str] = None) -> Dict
         # Get the classifier (loads model on first call, cached after)
         classifier = _get_classifier()
         if classifier is None:
-            return {
-                "valid": True,
-                "confidence": 0.0,
-                "label": "model_unavailable",
-                "all_labels": [],
-                "reason": "AI validation skipped (model failed to load)"
-            }
+            return _skipped_result("model_unavailable", "AI validation skipped (model failed to load)")
 
         # Run classification
         results = classifier(image_path, top_k=10)
-
-        if not results:
-            return {
-                "valid": True,
-                "confidence": 0.0,
-                "label": "no_results",
-                "all_labels": [],
-                "reason": "AI validation skipped (no results)"
-            }
-
-        # Parse results
-        all_labels = [
-            {"label": r["label"].lower(), "score": round(r["score"], 4)}
-            for r in results
-        ]
-
-        # Check for reject keywords first
-        for item in all_labels:
-            label = item["label"]
-            score = item["score"]
-            for reject_kw in REJECT_KEYWORDS:
-                if reject_kw in label and score >= REJECT_CONFIDENCE:
-                    return {
-                        "valid": False,
-                        "confidence": score,
-                        "label": label,
-                        "all_labels": all_labels,
-                        "reason": f"Image appears to be '{label}' (confidence: {score:.0%}), not a tree or plant."
-                    }
-
-        # Check for tree/plant keywords
-        best_tree_match = None
-        best_tree_score = 0.0
-        cumulative_tree_score = 0.0
-
-        for item in all_labels:
-            label = item["label"]
-            score = item["score"]
-            for tree_kw in TREE_KEYWORDS:
-                if tree_kw in label:
-                    cumulative_tree_score += score
-                    if score > best_tree_score:
-                        best_tree_match = label
-                        best_tree_score = score
-                    break
-
-        # Accept if best single label OR cumulative score is high enough
-        if best_tree_match and (best_tree_score >= MIN_CONFIDENCE or cumulative_tree_score >= CUMULATIVE_TREE_THRESHOLD):
-            return {
-                "valid": True,
-                "confidence": best_tree_score,
-                "label": best_tree_match,
-                "all_labels": all_labels,
-                "reason": f"Tree/plant detected: '{best_tree_match}' (confidence: {best_tree_score:.0%}, cumulative: {cumulative_tree_score:.0%})"
-            }
-
-        # No tree found
-        top_label = all_labels[0]["label"] if all_labels else "unknown"
-        top_score = all_labels[0]["score"] if all_labels else 0
-        return {
-            "valid": False,
-            "confidence": top_score,
-            "label": top_label,
-            "all_labels": all_labels,
-            "reason": f"No tree or plant detected. Top result: '{top_label}' ({top_score:.0%}). "
-                      f"Please upload a photo of your tree."
-        }
+        return _evaluate_predictions(results)
 
     except Exception as e:
         print(f"[AI Validator] Error: {e}")
-        return {
-            "valid": True,
-            "confidence": 0.0,
-            "label": "error",
-            "all_labels": [],
-            "reason": f"AI validation skipped ({type(e).__name__})"
-        }
+        return _skipped_result("error", f"AI validation skipped ({type(e).__name__})")
+
+
+def validate_tree_photos(image_paths: List[str], batch_size: int = 8) -> List[Dict]:
+    """
+    Validate several images with batched inference.
+
+    Returns one result per path, in order, with the same shape as
+    validate_tree_photo(). If a batch fails (e.g. one unreadable file),
+    that batch falls back to per-image validation so a single bad file
+    does not fail its neighbours.
+    """
+    if not image_paths:
+        return []
+
+    classifier = _get_classifier()
+    if classifier is None:
+        return [
+            _skipped_result("model_unavailable", "AI validation skipped (model failed to load)")
+            for _ in image_paths
+        ]
+
+    verdicts: List[Dict] = []
+    for start in range(0, len(image_paths), batch_size):
+        chunk = image_paths[start:start + batch_size]
+        try:
+            batch_results = classifier(chunk, top_k=10, batch_size=batch_size)
+            # Some pipeline versions flatten the output for single-item batches
+            if batch_results and isinstance(batch_results[0], dict):
+                batch_results = [batch_results]
+            verdicts.extend(_evaluate_predictions(r) for r in batch_results)
+        except Exception as e:
+            print(f"[AI Validator] Batch failed ({type(e).__name__}), retrying images one by one")
+            verdicts.extend(validate_tree_photo(path) for path in chunk)
+
+    return verdicts
@@ -36,6 +36,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def decode_user_id(token: str) -> Optional[int]:
+    """The user id a valid, unexpired JWT was issued for, else None."""
+    try:
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        user_id_str: str = payload.get("sub")
+        if user_id_str is None:
+            return None
+        return TokenData(user_id=int(user_id_str)).user_id
+    except (JWTError, ValueError):
+        return None
+
+
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
@@ -46,16 +58,11 @@ def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        user_id_str: str = payload.get("sub")
-        if user_id_str is None:
-            raise credentials_exception
-        token_data = TokenData(user_id=int(user_id_str))
-    except JWTError:
+    user_id = decode_user_id(token)
+    if user_id is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise credentials_exception
     if not user.is_active:
@@ -0,0 +1,162 @@
+"""
+Small caches.
+
+TTLCache is a thread-safe LRU whose entries also expire after a TTL, so it
+stays bounded both in size and in staleness. Sync endpoints run in a thread
+pool, hence the lock.
+
+RedisCache has the same interface over a shared Redis, for caches that must
+agree across worker processes. make_cache() picks one from CACHE_BACKEND;
+values given to a cache that may be Redis-backed must be JSON-serializable.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional
+from ..config import settings
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache with per-entry expiry."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_live(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def _store(self, key: Hashable, value: Any, ttl: Optional[float]) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._get_live(key)
+            return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> bool:
+        """Set only if the key is absent (or expired). Returns True if stored."""
+        with self._lock:
+            if self._get_live(key) is not _MISSING:
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Live entries for these keys (missing ones are left out)."""
+        with self._lock:
+            found = {key: self._get_live(key) for key in keys}
+        return {key: value for key, value in found.items() if value is not _MISSING}
+
+    def set_many(self, items: Dict[Hashable, Any], ttl: Optional[float] = None) -> None:
+        with self._lock:
+            for key, value in items.items():
+                self._store(key, value, ttl)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisCache:
+    """TTLCache-compatible cache in Redis, namespaced per cache (no LRU bound: Redis evicts)."""
+
+    def __init__(self, client, namespace: str, ttl: float = 60.0):
+        self.client = client
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def _key(self, key: Hashable) -> str:
+        return f"treekin:{self.namespace}:{key}"
+
+    def _ttl_ms(self, ttl: Optional[float]) -> int:
+        return max(1, int((self.ttl if ttl is None else ttl) * 1000))
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        raw = self.client.get(self._key(key))
+        return default if raw is None else json.loads(raw)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self.client.set(self._key(key), json.dumps(value), px=self._ttl_ms(ttl))
+
+    def add(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> bool:
+        return bool(self.client.set(self._key(key), json.dumps(value), px=self._ttl_ms(ttl), nx=True))
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        raws = self.client.mget([self._key(key) for key in keys])
+        return {key: json.loads(raw) for key, raw in zip(keys, raws) if raw is not None}
+
+    def set_many(self, items: Dict[Hashable, Any], ttl: Optional[float] = None) -> None:
+        if not items:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(self._key(key), json.dumps(value), px=self._ttl_ms(ttl))
+        pipe.execute()
+
+    def delete(self, key: Hashable) -> None:
+        self.client.delete(self._key(key))
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self._key("*"), count=1000))
+        if keys:
+            self.client.delete(*keys)
+
+
+_redis_client = None
+
+
+def _get_redis():
+    """Shared Redis connection, or None if redis-py or the server is unavailable."""
+    global _redis_client
+    if _redis_client is None:
+        try:
+            import redis
+
+            client = redis.Redis.from_url(settings.redis_url)
+            client.ping()
+            _redis_client = client
+        except Exception as e:
+            print(f"[Cache] Redis unavailable ({type(e).__name__}), using in-process caches")
+            _redis_client = False
+    return _redis_client or None
+
+
+def make_cache(namespace: str, maxsize: int, ttl: float):
+    """A RedisCache when CACHE_BACKEND=redis and Redis is reachable, else a TTLCache."""
+    if settings.cache_backend == "redis":
+        client = _get_redis()
+        if client is not None:
+            return RedisCache(client, namespace, ttl)
+    return TTLCache(maxsize=maxsize, ttl=ttl)
@@ -0,0 +1,273 @@
+"""
+Pub/sub transport for chat events.
+
+Every worker keeps its own chat sockets (services/chat_hub.py); the broker
+carries events between workers so a message sent through one reaches
+sockets held by another. Channels:
+
+- `room:{room_id}`: events of one conversation (messages, read receipts,
+  presence of its members); a worker subscribes while it holds a socket of
+  one of the room's members
+- `user:{user_id}`: events for a user outside rooms their worker already
+  follows (the first message of a new room)
+
+Backends, picked by CHAT_BROKER:
+
+- InProcessBroker ("memory"): delivers within the process; enough for a
+  single worker
+- RedisBroker ("redis"): PUBLISH/SUBSCRIBE over REDIS_URL (any server
+  speaking the Redis protocol); presence is a per-user hash of
+  node id -> expiry, refreshed by a heartbeat so crashed workers age out
+
+publish() is safe from any thread and never blocks the caller: events go
+through a bounded outbox drained in order by one task, and are dropped
+with a log line if the transport falls that far behind.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable, Optional, Set
+
+from ..config import settings
+
+OUTBOX_SIZE = 10000
+
+EventHandler = Callable[[str, dict], None]
+
+
+def room_channel(room_id: int) -> str:
+    return f"room:{room_id}"
+
+
+def user_channel(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+class ChatBroker(ABC):
+    """Base broker: the ordered, thread-safe outbox shared by the backends."""
+
+    def __init__(self):
+        self._on_event: Optional[EventHandler] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._outbox: Optional[asyncio.Queue] = None
+        self._pump: Optional[asyncio.Task] = None
+
+    async def start(self, on_event: EventHandler) -> None:
+        """Begin delivering events of subscribed channels to on_event (in the event loop)."""
+        self._on_event = on_event
+        self._loop = asyncio.get_running_loop()
+        self._outbox = asyncio.Queue(maxsize=OUTBOX_SIZE)
+        self._pump = asyncio.create_task(self._pump_loop())
+
+    async def stop(self) -> None:
+        if self._pump:
+            self._pump.cancel()
+        self._loop = None
+
+    def publish(self, channel: str, event: dict) -> None:
+        """Queue an event for a channel (thread-safe; a no-op before start())."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._enqueue(channel, event)
+        else:
+            loop.call_soon_threadsafe(self._enqueue, channel, event)
+
+    def _enqueue(self, channel: str, event: dict) -> None:
+        try:
+            self._outbox.put_nowait((channel, event))
+        except asyncio.QueueFull:
+            print(f"[Chat] Broker outbox full, dropped {event.get('type')} event for {channel}")
+
+    async def _pump_loop(self) -> None:
+        while True:
+            channel, event = await self._outbox.get()
+            try:
+                await self._send(channel, event)
+            except Exception as e:
+                print(f"[Chat] Publish to {channel} failed: {type(e).__name__}: {e}")
+
+    @abstractmethod
+    async def _send(self, channel: str, event: dict) -> None:
+        """Deliver one event to the transport (called in order by the outbox pump)."""
+
+    @abstractmethod
+    async def subscribe(self, channels: Iterable[str]) -> None:
+        """Start receiving events of these channels."""
+
+    @abstractmethod
+    async def unsubscribe(self, channels: Iterable[str]) -> None:
+        """Stop receiving events of these channels."""
+
+    @abstractmethod
+    async def set_online(self, user_id: int, online: bool) -> None:
+        """Record whether this worker holds a socket of the user."""
+
+    @abstractmethod
+    async def online(self, user_ids: Iterable[int]) -> Set[int]:
+        """Which of these users have a socket open on any worker."""
+
+
+# ── In-process ───────────────────────────────────────────────
+
+class InProcessBroker(ChatBroker):
+    """Single-worker broker: subscribed channels are delivered straight back."""
+
+    def __init__(self):
+        super().__init__()
+        self._channels: Set[str] = set()
+        self._online: Set[int] = set()
+
+    async def _send(self, channel: str, event: dict) -> None:
+        if channel in self._channels:
+            self._on_event(channel, event)
+
+    async def subscribe(self, channels: Iterable[str]) -> None:
+        self._channels.update(channels)
+
+    async def unsubscribe(self, channels: Iterable[str]) -> None:
+        self._channels.difference_update(channels)
+
+    async def set_online(self, user_id: int, online: bool) -> None:
+        if online:
+            self._online.add(user_id)
+        else:
+            self._online.discard(user_id)
+
+    async def online(self, user_ids: Iterable[int]) -> Set[int]:
+        return self._online.intersection(user_ids)
+
+
+# ── Redis ────────────────────────────────────────────────────
+
+class RedisBroker(ChatBroker):
+    """Cross-worker broker over Redis PUBLISH/SUBSCRIBE (redis-py's asyncio client)."""
+
+    PREFIX = "treekin:chat:"
+
+    def __init__(self, url: str, presence_ttl: float):
+        super().__init__()
+        self.url = url
+        self.presence_ttl = presence_ttl
+        self.node_id = uuid.uuid4().hex
+        self._client = None
+        self._pubsub = None
+        self._tasks = []
+        self._online: Set[int] = set()
+
+    def _presence_key(self, user_id: int) -> str:
+        return f"{self.PREFIX}presence:{user_id}"
+
+    async def start(self, on_event: EventHandler) -> None:
+        import redis.asyncio as aioredis
+
+        self._client = aioredis.Redis.from_url(self.url)
+        await self._client.ping()
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        # The reader needs one subscription before it can listen
+        await self._pubsub.subscribe(f"{self.PREFIX}node:{self.node_id}")
+        await super().start(on_event)
+        self._tasks = [asyncio.create_task(self._read_loop()), asyncio.create_task(self._heartbeat_loop())]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await super().stop()
+        try:
+            for user_id in list(self._online):
+                await self.set_online(user_id, False)
+            await self._pubsub.aclose()
+            await self._client.aclose()
+        except Exception as e:
+            print(f"[Chat] Redis broker shutdown: {type(e).__name__}: {e}")
+
+    async def _send(self, channel: str, event: dict) -> None:
+        await self._client.publish(self.PREFIX + channel, json.dumps(event))
+
+    async def subscribe(self, channels: Iterable[str]) -> None:
+        channels = [self.PREFIX + channel for channel in channels]
+        if channels:
+            await self._pubsub.subscribe(*channels)
+
+    async def unsubscribe(self, channels: Iterable[str]) -> None:
+        channels = [self.PREFIX + channel for channel in channels]
+        if channels:
+            await self._pubsub.unsubscribe(*channels)
+
+    async def _read_loop(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except Exception as e:
+                print(f"[Chat] Redis subscription error, retrying: {type(e).__name__}: {e}")
+                await asyncio.sleep(1)
+                continue
+            if not message or message["type"] != "message":
+                continue
+            channel = message["channel"].decode()[len(self.PREFIX):]
+            try:
+                self._on_event(channel, json.loads(message["data"]))
+            except Exception as e:
+                print(f"[Chat] Could not deliver event from {channel}: {type(e).__name__}: {e}")
+
+    async def _touch(self, user_ids: Iterable[int]) -> None:
+        expires = time.time() + self.presence_ttl
+        pipe = self._client.pipeline(transaction=False)
+        for user_id in user_ids:
+            key = self._presence_key(user_id)
+            pipe.hset(key, self.node_id, expires)
+            pipe.expire(key, int(self.presence_ttl) + 1)
+        await pipe.execute()
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.presence_ttl / 3)
+            try:
+                if self._online:
+                    await self._touch(list(self._online))
+            except Exception as e:
+                print(f"[Chat] Presence heartbeat failed: {type(e).__name__}: {e}")
+
+    async def set_online(self, user_id: int, online: bool) -> None:
+        if online:
+            self._online.add(user_id)
+            await self._touch([user_id])
+        else:
+            self._online.discard(user_id)
+            await self._client.hdel(self._presence_key(user_id), self.node_id)
+
+    async def online(self, user_ids: Iterable[int]) -> Set[int]:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+        pipe = self._client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.hvals(self._presence_key(user_id))
+        now = time.time()
+        return {
+            user_id for user_id, expiries in zip(user_ids, await pipe.execute())
+            if any(float(expiry) > now for expiry in expiries)
+        }
+
+
+async def start_broker(on_event: EventHandler) -> ChatBroker:
+    """Start the configured broker, falling back to in-process if Redis is unreachable."""
+    if settings.chat_broker == "redis":
+        broker = RedisBroker(settings.redis_url, settings.chat_presence_ttl_seconds)
+        try:
+            await broker.start(on_event)
+            print(f"[Chat] Redis broker connected (node {broker.node_id[:8]})")
+            return broker
+        except Exception as e:
+            print(f"[Chat] Redis broker unavailable ({type(e).__name__}), using in-process delivery")
+    broker = InProcessBroker()
+    await broker.start(on_event)
+    return broker
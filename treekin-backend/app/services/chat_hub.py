@@ -0,0 +1,185 @@
+"""
+Live chat delivery over WebSockets.
+
+Clients open `/api/chat/ws?token=<JWT>` and keep it open; instead of polling
+`GET /chat/room/{user_id}` they are pushed:
+
+    {"type": "message", "message": {...ChatMessageResponse}}
+    {"type": "read", "room_id": 3, "reader_id": 7, "read_at": "...", "up_to_id": 41, "count": 2}
+    {"type": "presence", "user_id": 7, "online": true}
+
+The hub tracks the open sockets of this worker by user and by room, and
+subscribes to the broker channels (services/chat_broker.py) of the rooms
+its users are in, so events published by any worker reach them.
+
+- Each socket has its own bounded outgoing queue drained by a sender task;
+  a client that falls CHAT_SOCKET_QUEUE_SIZE events behind is disconnected
+  (close code 1013) instead of buffering without limit, and catches up
+  with `GET /chat/room/{user_id}?after_id=` when it reconnects
+- A user's first socket on any worker announces them online to their
+  rooms; their last one announces them offline
+
+publish_room()/publish_user() may be called from the sync endpoints' worker
+threads.
+"""
+
+import asyncio
+from typing import Dict, Iterable, Optional, Set
+
+from fastapi import WebSocket, status
+
+from ..config import settings
+from .chat_broker import ChatBroker, room_channel, start_broker, user_channel
+
+# How long a sync endpoint waits for a presence lookup
+PRESENCE_LOOKUP_TIMEOUT = 2.0
+
+
+class ChatConnection:
+    """One open socket and its bounded outgoing event queue."""
+
+    def __init__(self, websocket: WebSocket, user_id: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.chat_socket_queue_size)
+        self.dropped = False
+
+    def push(self, event: dict) -> None:
+        """Queue an event; a consumer too far behind is disconnected."""
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped = True
+            print(f"[Chat] Disconnecting slow consumer (user {self.user_id})")
+            asyncio.create_task(self.websocket.close(code=status.WS_1013_TRY_AGAIN_LATER))
+
+    async def send_loop(self) -> None:
+        """Write queued events to the socket until it closes."""
+        while not self.dropped:
+            event = await self.queue.get()
+            await self.websocket.send_json(event)
+
+
+class ChatHub:
+    """Open chat sockets of this worker, by user and by room."""
+
+    def __init__(self):
+        self._connections: Dict[int, Set[ChatConnection]] = {}
+        self._room_users: Dict[int, Set[int]] = {}  # room -> connected users in it
+        self._user_rooms: Dict[int, Set[int]] = {}  # connected user -> their rooms
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.broker: Optional[ChatBroker] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self.broker = await start_broker(self._on_event)
+
+    async def stop(self) -> None:
+        if self.broker:
+            await self.broker.stop()
+        self.broker = None
+        self._loop = None
+
+    # ── Sockets ──────────────────────────────────────────────
+
+    async def connect(self, connection: ChatConnection, room_ids: Iterable[int]) -> None:
+        """Register a socket; the user's rooms are joined on their first one."""
+        user_id = connection.user_id
+        first = user_id not in self._connections
+        self._connections.setdefault(user_id, set()).add(connection)
+        if not first:
+            return
+
+        await self.broker.subscribe([user_channel(user_id)])
+        await self._join(user_id, room_ids)
+        was_online = user_id in await self.broker.online([user_id])
+        await self.broker.set_online(user_id, True)
+        if not was_online:
+            self._announce(user_id, True)
+
+    async def disconnect(self, connection: ChatConnection) -> None:
+        user_id = connection.user_id
+        sockets = self._connections.get(user_id)
+        if sockets is None:
+            return
+        sockets.discard(connection)
+        if sockets:
+            return
+
+        del self._connections[user_id]
+        await self.broker.set_online(user_id, False)
+        if user_id not in await self.broker.online([user_id]):
+            self._announce(user_id, False)
+        await self.broker.unsubscribe([user_channel(user_id)])
+        await self._leave(user_id)
+
+    async def _join(self, user_id: int, room_ids: Iterable[int]) -> None:
+        new_rooms = []
+        for room_id in room_ids:
+            if room_id not in self._room_users:
+                new_rooms.append(room_id)
+            self._room_users.setdefault(room_id, set()).add(user_id)
+            self._user_rooms.setdefault(user_id, set()).add(room_id)
+        await self.broker.subscribe([room_channel(room_id) for room_id in new_rooms])
+
+    async def _leave(self, user_id: int) -> None:
+        empty_rooms = []
+        for room_id in self._user_rooms.pop(user_id, set()):
+            users = self._room_users.get(room_id, set())
+            users.discard(user_id)
+            if not users:
+                self._room_users.pop(room_id, None)
+                empty_rooms.append(room_id)
+        await self.broker.unsubscribe([room_channel(room_id) for room_id in empty_rooms])
+
+    def _announce(self, user_id: int, online: bool) -> None:
+        event = {"type": "presence", "user_id": user_id, "online": online}
+        for room_id in self._user_rooms.get(user_id, ()):
+            self.broker.publish(room_channel(room_id), event)
+
+    # ── Events ───────────────────────────────────────────────
+
+    def _on_event(self, channel: str, event: dict) -> None:
+        """Deliver a broker event to the local sockets it concerns."""
+        kind, _, target = channel.partition(":")
+        target = int(target)
+        if kind == "room":
+            user_ids = self._room_users.get(target, set())
+        else:
+            user_ids = {target}
+            room_id = event.get("message", {}).get("room_id")
+            if room_id is not None and room_id not in self._user_rooms.get(target, ()):
+                # First message of a new room: follow it from now on
+                asyncio.create_task(self._join(target, [room_id]))
+        if event.get("type") == "presence":
+            user_ids = user_ids - {event.get("user_id")}  # Not back to the user themselves
+        for user_id in user_ids:
+            for connection in list(self._connections.get(user_id, ())):
+                connection.push(event)
+
+    def publish_room(self, room_id: int, event: dict) -> None:
+        """Send an event to everyone connected to a room, on any worker."""
+        if self.broker:
+            self.broker.publish(room_channel(room_id), event)
+
+    def publish_user(self, user_id: int, event: dict) -> None:
+        """Send an event to all of a user's sockets, on any worker."""
+        if self.broker:
+            self.broker.publish(user_channel(user_id), event)
+
+    def online_users(self, user_ids: Iterable[int]) -> Set[int]:
+        """Which of these users are connected anywhere (call from a worker thread)."""
+        loop, broker = self._loop, self.broker
+        user_ids = list(user_ids)
+        if loop is None or broker is None or not user_ids:
+            return set()
+        try:
+            return asyncio.run_coroutine_threadsafe(broker.online(user_ids), loop).result(PRESENCE_LOOKUP_TIMEOUT)
+        except Exception as e:
+            print(f"[Chat] Presence lookup failed: {type(e).__name__}: {e}")
+            return set()
+
+
+hub = ChatHub()
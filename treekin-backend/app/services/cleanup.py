@@ -0,0 +1,261 @@
+"""
+Background cleanup of deleted trees and orphaned image files.
+
+delete_tree only marks the tree (Tree.deleted_at) and returns; the work that
+used to run inside the request happens here:
+
+- purge_deleted_trees(): deletes each marked tree's trending scores,
+  timeline entries, comments, likes, posts, photos, events, carbon records and follows in
+  batches, then the tree itself, then unlinks its image files that nothing
+  else references
+- collect_orphan_files(): walks UPLOADS_DIR and removes files no row refers
+  to (failed uploads, crashes between write and commit)
+
+Both run from cleanup_loop(), started in the app lifespan; delete_tree also
+kicks off a purge right after responding.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Set
+
+from sqlalchemy import String, cast, or_, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.carbon import CarbonCredit, TreeSponsorship
+from ..models.follow import Follow, TimelineEntry
+from ..models.post import Comment, Like, Post
+from ..models.report import CivicReport
+from ..models.tree import Tree, TreeEvent, TreeImage
+from ..models.user import User
+from . import trending
+from .feed_cache import invalidate_feed
+from .storage import UPLOADS_DIR, image_url_to_path
+
+PURGE_BATCH_SIZE = 500
+
+# Columns that can hold an uploaded image URL: single URLs, and JSON lists of them
+URL_COLUMNS = (TreeImage.url, Tree.main_image_url, User.avatar_url)
+URL_LIST_COLUMNS = (Post.media_urls, CivicReport.evidence_urls)
+
+# One purge at a time (request-triggered and periodic runs can overlap)
+_purge_lock = threading.Lock()
+
+
+# ── Deleted trees ────────────────────────────────────────────
+
+def _delete_in_batches(db: Session, model, *criteria, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Delete matching rows a batch of ids at a time, committing each batch."""
+    deleted = 0
+    while True:
+        ids = [row_id for (row_id,) in db.query(model.id).filter(*criteria).limit(batch_size)]
+        if not ids:
+            return deleted
+        db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        deleted += len(ids)
+
+
+def _tree_image_urls(db: Session, tree: Tree) -> Set[str]:
+    """Every image URL a tree's rows point at."""
+    urls = {url for (url,) in db.query(TreeImage.url).filter(TreeImage.tree_id == tree.id)}
+    if tree.main_image_url:
+        urls.add(tree.main_image_url)
+    for (media_urls,) in db.query(Post.media_urls).filter(Post.tree_id == tree.id):
+        urls.update(media_urls or [])
+    return urls
+
+
+def _still_referenced(db: Session, urls: Iterable[str]) -> Set[str]:
+    """
+    The subset of urls some remaining row still uses. Content-addressed files
+    are shared by every upload of the same photo from one user, and also
+    appear in other trees' auto-posts, avatars and report evidence, so this
+    checks the same columns as the orphan sweep.
+    """
+    urls = set(urls)
+    if not urls:
+        return set()
+    used = set()
+    for column in URL_COLUMNS:
+        used.update(
+            url for (url,) in db.query(column)
+            .execution_options(include_deleted=True)
+            .filter(column.in_(urls))
+        )
+
+    # JSON lists can't be matched with IN; narrow them to rows mentioning
+    # one of the files' folders (one per uploader), then check in Python
+    folders = {url.rsplit("/", 1)[0] + "/" for url in urls}
+    for column in URL_LIST_COLUMNS:
+        mentions = or_(*[cast(column, String).like(f"%{folder}%") for folder in folders])
+        for (values,) in db.query(column).filter(mentions).yield_per(1000):
+            used.update(url for url in values or [] if url in urls)
+    return used
+
+
+def purge_tree(db: Session, tree: Tree, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Delete one marked tree and everything hanging off it. Returns files removed."""
+    tree_id = tree.id
+    urls = _tree_image_urls(db, tree)
+    post_ids = select(Post.id).where(Post.tree_id == tree_id).scalar_subquery()
+
+    trending.forget(db, "post", post_ids)
+    trending.forget(db, "tree", [tree_id])
+    _delete_in_batches(db, TimelineEntry, TimelineEntry.post_id.in_(post_ids), batch_size=batch_size)
+    _delete_in_batches(db, Comment, Comment.post_id.in_(post_ids), batch_size=batch_size)
+    _delete_in_batches(db, Like, Like.post_id.in_(post_ids), batch_size=batch_size)
+    _delete_in_batches(db, Post, Post.tree_id == tree_id, batch_size=batch_size)
+    _delete_in_batches(db, TreeImage, TreeImage.tree_id == tree_id, batch_size=batch_size)
+    _delete_in_batches(db, TreeEvent, TreeEvent.tree_id == tree_id, batch_size=batch_size)
+    _delete_in_batches(db, CarbonCredit, CarbonCredit.tree_id == tree_id, batch_size=batch_size)
+    _delete_in_batches(db, Follow, Follow.target_type == "tree", Follow.target_id == tree_id, batch_size=batch_size)
+
+    # Sponsorships outlive the tree (payment records)
+    db.query(TreeSponsorship).filter(TreeSponsorship.tree_id == tree_id).update(
+        {TreeSponsorship.tree_id: None}, synchronize_session=False
+    )
+    db.query(Tree).filter(Tree.id == tree_id).execution_options(include_deleted=True).delete(
+        synchronize_session=False
+    )
+    db.commit()
+    # Bulk deletes bypass the session hooks
+    invalidate_feed()
+
+    removed = 0
+    for url in urls - _still_referenced(db, urls):
+        file_path = image_url_to_path(url)
+        try:
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
+                removed += 1
+        except OSError as e:
+            print(f"[Cleanup] Could not remove {file_path}: {e}")
+    return removed
+
+
+def purge_deleted_trees(db: Session, limit: int = 50) -> Dict:
+    """Purge up to `limit` trees marked as deleted."""
+    stats = {"trees_purged": 0, "files_removed": 0}
+    with _purge_lock:
+        trees = (
+            db.query(Tree)
+            .execution_options(include_deleted=True)
+            .filter(Tree.deleted_at.isnot(None))
+            .order_by(Tree.deleted_at)
+            .limit(limit)
+            .all()
+        )
+        for tree in trees:
+            try:
+                stats["files_removed"] += purge_tree(db, tree)
+                stats["trees_purged"] += 1
+            except Exception as e:
+                db.rollback()
+                print(f"[Cleanup] Failed to purge tree #{tree.id}: {type(e).__name__}: {e}")
+    return stats
+
+
+def run_purge() -> Dict:
+    """Purge with a fresh session (for BackgroundTasks and the cleanup loop)."""
+    from ..database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return purge_deleted_trees(db)
+    finally:
+        db.close()
+
+
+# ── Orphaned files ───────────────────────────────────────────
+
+def _referenced_paths(db: Session) -> Set[str]:
+    """Absolute paths of every local image some row refers to."""
+    urls: List[str] = []
+    for column in URL_COLUMNS:
+        urls.extend(
+            url for (url,) in db.query(column)
+            .execution_options(include_deleted=True)
+            .filter(column.isnot(None))
+            .yield_per(1000)
+        )
+    for column in URL_LIST_COLUMNS:
+        for (values,) in db.query(column).yield_per(1000):
+            urls.extend(values or [])
+
+    paths = set()
+    for url in urls:
+        path = image_url_to_path(url) if isinstance(url, str) else None
+        if path:
+            paths.add(path)
+    return paths
+
+
+def collect_orphan_files(db: Session, min_age_seconds: int = None, dry_run: bool = False) -> Dict:
+    """
+    Remove image files under UPLOADS_DIR that no row references.
+    Files younger than min_age_seconds are left alone so uploads that are
+    still being validated are never swept.
+    """
+    if min_age_seconds is None:
+        min_age_seconds = settings.orphan_min_age_seconds
+
+    referenced = _referenced_paths(db)
+    cutoff = time.time() - min_age_seconds
+    root = os.path.abspath(UPLOADS_DIR)
+    stats = {"files_scanned": 0, "orphans_removed": 0, "bytes_freed": 0}
+
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            stats["files_scanned"] += 1
+            if path in referenced:
+                continue
+            try:
+                stat_result = os.stat(path)
+                if stat_result.st_mtime > cutoff:
+                    continue
+                if not dry_run:
+                    os.remove(path)
+                stats["orphans_removed"] += 1
+                stats["bytes_freed"] += stat_result.st_size
+            except OSError as e:
+                print(f"[Cleanup] Could not remove orphan {path}: {e}")
+
+    return stats
+
+
+def run_orphan_gc() -> Dict:
+    """Orphan sweep with a fresh session."""
+    from ..database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return collect_orphan_files(db)
+    finally:
+        db.close()
+
+
+# ── Loop ─────────────────────────────────────────────────────
+
+async def cleanup_loop() -> None:
+    """Purge deleted trees every cleanup interval and sweep orphans every GC interval."""
+    last_gc = time.monotonic()
+    while True:
+        await asyncio.sleep(settings.cleanup_interval_seconds)
+        try:
+            stats = await asyncio.to_thread(run_purge)
+            if stats["trees_purged"]:
+                print(f"[Cleanup] Purged {stats['trees_purged']} trees, removed {stats['files_removed']} files")
+
+            if time.monotonic() - last_gc >= settings.orphan_gc_interval_seconds:
+                last_gc = time.monotonic()
+                stats = await asyncio.to_thread(run_orphan_gc)
+                if stats["orphans_removed"]:
+                    print(f"[Cleanup] Removed {stats['orphans_removed']} orphaned files "
+                          f"({stats['bytes_freed'] / 1024:.0f} KB)")
+        except Exception as e:
+            print(f"[Cleanup] {type(e).__name__}: {e}")
@@ -0,0 +1,198 @@
+"""
+Write-coalescing engagement counters.
+
+Likes, comments, verification votes and report votes used to do
+read-modify-write on the parent row (`post.likes_count += 1`), which loses
+updates under concurrency and makes every like on a hot post wait for the
+same row lock. Instead, endpoints record a delta:
+
+    counters.increment(db, Post, post_id, likes_count=+1)
+
+- Deltas are summed in memory and flushed every COUNTER_FLUSH_INTERVAL_SECONDS
+  as one executemany of atomic `UPDATE ... SET x = x + :delta` per table
+- With the interval at 0 (or background jobs off) each delta is applied
+  immediately, still as an atomic in-place UPDATE in the caller's transaction
+- counters.current() gives a row's value including unflushed deltas
+- The source rows (likes, comments, report_votes) stay authoritative:
+  recount_counters() rebuilds the counters from them, e.g. after a crash
+  lost buffered deltas (verification_votes has no source table)
+"""
+
+import asyncio
+import threading
+from typing import Dict, Tuple
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.follow import Follow
+from ..models.post import Comment, Like, Post
+from ..models.report import CivicReport, ReportVote
+from ..models.tree import Tree
+from ..models.user import User
+
+COUNTER_COLUMNS = {
+    Post: ("likes_count", "comments_count", "verification_votes"),
+    CivicReport: ("upvotes", "downvotes", "votes_count"),
+    User: ("followers_count",),
+    Tree: ("followers_count",),
+}
+
+POST_VERIFY_THRESHOLD = 5
+REPORT_VERIFY_THRESHOLD = 10
+
+_pending: Dict[Tuple[type, int], Dict[str, int]] = {}
+_lock = threading.Lock()
+
+
+def _coalescing() -> bool:
+    return settings.background_jobs_enabled and settings.counter_flush_interval_seconds > 0
+
+
+def increment(db: Session, model, row_id: int, **deltas: int) -> None:
+    """Add deltas to counter columns of one row (buffered or write-through)."""
+    unknown = set(deltas) - set(COUNTER_COLUMNS[model])
+    if unknown:
+        raise ValueError(f"Not a counter column of {model.__name__}: {', '.join(sorted(unknown))}")
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    if not _coalescing():
+        table = model.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id == row_id)
+            .values({column: func.coalesce(table.c[column], 0) + delta for column, delta in deltas.items()})
+        )
+        return
+
+    with _lock:
+        entry = _pending.setdefault((model, row_id), {})
+        for column, delta in deltas.items():
+            entry[column] = entry.get(column, 0) + delta
+
+
+def pending(model, row_id: int, column: str) -> int:
+    """The unflushed delta buffered for one counter (0 when writing through)."""
+    with _lock:
+        return _pending.get((model, row_id), {}).get(column, 0)
+
+
+def current(obj, column: str) -> int:
+    """A counter's value including deltas that have not been flushed yet."""
+    return (getattr(obj, column) or 0) + pending(type(obj), obj.id, column)
+
+
+def _restore(drained: Dict[Tuple[type, int], Dict[str, int]]) -> None:
+    """Put deltas back after a failed flush so they are retried."""
+    with _lock:
+        for key, deltas in drained.items():
+            entry = _pending.setdefault(key, {})
+            for column, delta in deltas.items():
+                entry[column] = entry.get(column, 0) + delta
+
+
+def _apply_thresholds(db: Session, model, row_ids) -> None:
+    """Auto-verification that used to happen inline with the count update."""
+    if model is Post:
+        db.execute(
+            update(Post.__table__)
+            .where(Post.__table__.c.id.in_(row_ids))
+            .where(Post.__table__.c.verification_votes >= POST_VERIFY_THRESHOLD)
+            .values(is_verified=True)
+        )
+    elif model is CivicReport:
+        table = CivicReport.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id.in_(row_ids))
+            .where(table.c.upvotes >= REPORT_VERIFY_THRESHOLD, table.c.status == "pending")
+            .values(status="verified")
+        )
+
+
+def flush_counters(db: Session) -> int:
+    """Write all buffered deltas. Returns the number of rows updated."""
+    with _lock:
+        drained = dict(_pending)
+        _pending.clear()
+    if not drained:
+        return 0
+
+    by_model: Dict[type, list] = {}
+    for (model, row_id), deltas in drained.items():
+        by_model.setdefault(model, []).append((row_id, deltas))
+
+    try:
+        for model, rows in by_model.items():
+            table = model.__table__
+            columns = COUNTER_COLUMNS[model]
+            stmt = (
+                update(table)
+                .where(table.c.id == bindparam("row_id"))
+                .values({
+                    column: func.coalesce(table.c[column], 0) + bindparam(f"delta_{column}")
+                    for column in columns
+                })
+            )
+            db.execute(stmt, [
+                {"row_id": row_id, **{f"delta_{column}": deltas.get(column, 0) for column in columns}}
+                for row_id, deltas in rows
+            ])
+            _apply_thresholds(db, model, [row_id for row_id, _ in rows])
+        db.commit()
+    except Exception:
+        db.rollback()
+        _restore(drained)
+        raise
+    return len(drained)
+
+
+def recount_counters(db: Session) -> None:
+    """Rebuild likes/comments/report vote/follower counters from their source tables."""
+    flush_counters(db)
+
+    posts = Post.__table__
+    db.execute(update(posts).values(
+        likes_count=select(func.count(Like.id)).where(Like.post_id == posts.c.id).scalar_subquery(),
+        comments_count=select(func.count(Comment.id)).where(Comment.post_id == posts.c.id).scalar_subquery(),
+    ))
+
+    reports = CivicReport.__table__
+    upvotes = select(func.count(ReportVote.id)).where(
+        ReportVote.report_id == reports.c.id, ReportVote.is_upvote == 1
+    ).scalar_subquery()
+    downvotes = select(func.count(ReportVote.id)).where(
+        ReportVote.report_id == reports.c.id, ReportVote.is_upvote == -1
+    ).scalar_subquery()
+    db.execute(update(reports).values(upvotes=upvotes, downvotes=downvotes, votes_count=upvotes - downvotes))
+
+    for target_type, model in (("user", User), ("tree", Tree)):
+        table = model.__table__
+        db.execute(update(table).values(followers_count=select(func.count(Follow.id)).where(
+            Follow.target_type == target_type, Follow.target_id == table.c.id
+        ).scalar_subquery()))
+    db.commit()
+
+
+def run_flush() -> int:
+    """Flush with a fresh session (for the flush loop and shutdown)."""
+    from ..database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return flush_counters(db)
+    finally:
+        db.close()
+
+
+async def counter_flush_loop() -> None:
+    """Flush buffered counter deltas every COUNTER_FLUSH_INTERVAL_SECONDS."""
+    while True:
+        await asyncio.sleep(settings.counter_flush_interval_seconds)
+        try:
+            await asyncio.to_thread(run_flush)
+        except Exception as e:
+            print(f"[Counters] Flush failed, will retry: {type(e).__name__}: {e}")
@@ -0,0 +1,92 @@
+"""
+Shared cache for social feed pages.
+
+A feed page is the same for every viewer except `is_liked`, so the
+viewer-independent part (posts with author and tree summaries, plus the
+next-page cursor) is cached once and the viewer's liked set is merged in
+per request.
+
+- Committing a new, edited or deleted post (or a deleted tree) bumps a
+  generation number that is part of every key, so stale pages are never
+  served again and just age out of the LRU
+- Counters (likes, comments, votes) are not invalidated; they refresh when
+  the page's short TTL (FEED_CACHE_TTL_SECONDS) runs out
+- The cache is per process; with several workers other processes see
+  changes after at most one TTL
+"""
+
+import itertools
+from dataclasses import dataclass
+from typing import Hashable, List, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models.post import Post
+from ..models.tree import Tree
+from .cache import TTLCache
+
+_pages = TTLCache(maxsize=settings.feed_cache_max_pages, ttl=settings.feed_cache_ttl_seconds)
+_generations = itertools.count(1)
+_generation = next(_generations)
+
+# Post fields whose change makes cached pages wrong (not just stale counters)
+_POST_CONTENT_FIELDS = ("content", "media_urls", "tree_id", "user_id", "is_verified")
+_PENDING_KEY = "feed_cache_invalidation"
+
+
+@dataclass
+class FeedPage:
+    posts: List  # PostResponse with is_liked left False
+    next_cursor: Optional[str]
+
+
+def page_key(*params: Hashable) -> tuple:
+    """Cache key for one page of a feed query under the current generation."""
+    return (_generation,) + params
+
+
+def get_page(key: tuple) -> Optional[FeedPage]:
+    if settings.feed_cache_ttl_seconds <= 0:
+        return None
+    return _pages.get(key)
+
+
+def store_page(key: tuple, page: FeedPage) -> None:
+    if settings.feed_cache_ttl_seconds > 0:
+        _pages.set(key, page)
+
+
+def invalidate_feed() -> None:
+    """Make every cached page unreachable."""
+    global _generation
+    _generation = next(_generations)
+
+
+def _changes_feed(obj) -> bool:
+    if isinstance(obj, Post):
+        state = inspect(obj)
+        return any(state.attrs[name].history.has_changes() for name in _POST_CONTENT_FIELDS)
+    if isinstance(obj, Tree):
+        return inspect(obj).attrs.deleted_at.history.has_changes()
+    return False
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_post_changes(session, flush_context):
+    if any(isinstance(obj, Post) for obj in session.new) or \
+            any(isinstance(obj, (Post, Tree)) for obj in session.deleted) or \
+            any(_changes_feed(obj) for obj in session.dirty):
+        session.info[_PENDING_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_post_changes(session):
+    # Only once committed: a reader refilling the cache in between would
+    # otherwise store the old page under the new generation
+    if session.info.pop(_PENDING_KEY, False):
+        invalidate_feed()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_post_changes(session):
+    session.info.pop(_PENDING_KEY, None)
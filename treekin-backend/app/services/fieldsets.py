@@ -0,0 +1,82 @@
+"""
+Sparse fieldsets for list endpoints (`?fields=id,name,cover_image_url`).
+
+The requested fields drive both sides of the request:
+- SQL: only the backing columns are SELECTed (load_only)
+- Output: only the requested keys are serialized
+
+Without `fields` the endpoint behaves exactly as before.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Type
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[List[str]]:
+    """
+    Validate a comma-separated `fields` parameter against a response schema.
+    Returns the field names in request order (id always included), or None.
+    """
+    if not fields:
+        return None
+
+    requested = []
+    for name in fields.split(","):
+        name = name.strip()
+        if name and name not in requested:
+            requested.append(name)
+
+    unknown = [name for name in requested if name not in schema.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    if "id" not in requested:
+        requested.insert(0, "id")
+    return requested
+
+
+def load_only_fields(
+    model,
+    fields: Iterable[str],
+    depends_on: Optional[Dict[str, Tuple[str, ...]]] = None,
+    also: Iterable[str] = ("created_at",)
+):
+    """
+    Loader option SELECTing only the columns backing `fields`.
+    `depends_on` maps derived/embedded fields to the columns they need
+    (e.g. "user" -> ("user_id",)); fields that aren't columns are ignored.
+    `also` lists columns needed regardless (the pagination sort key).
+    """
+    depends_on = depends_on or {}
+    column_names = inspect(model).column_attrs.keys()
+
+    needed: Set[str] = set(also)
+    for name in fields:
+        needed.update(depends_on.get(name, (name,)))
+
+    return load_only(*[getattr(model, name) for name in needed if name in column_names])
+
+
+def sparse_response(
+    rows: Iterable[Any],
+    fields: List[str],
+    computed: Optional[Dict[str, Callable[[Any], Any]]] = None
+) -> JSONResponse:
+    """
+    Serialize only `fields` of each row (ORM object or Pydantic model).
+    `computed` supplies values for fields that aren't plain attributes.
+    """
+    computed = computed or {}
+    payload = [
+        {
+            name: computed[name](row) if name in computed else getattr(row, name)
+            for name in fields
+        }
+        for row in rows
+    ]
+    return JSONResponse(jsonable_encoder(payload))
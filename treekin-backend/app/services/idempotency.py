@@ -0,0 +1,152 @@
+"""
+Idempotency-Key support for retried POSTs.
+
+A client that may retry (mobile uploads on flaky networks) sends the same
+`Idempotency-Key` header on every attempt. The first successful response is
+stored per user+key; retries get it back without redoing the work (file
+write, EXIF, AI inference, Tredits grants).
+
+    def upload(..., idem: IdempotentRequest = Depends(idempotent_request)):
+        if idem.replay:
+            return idem.replay
+        ...
+        return idem.save(result)
+
+- Only 2xx results are stored; a failed attempt can simply be retried
+- A retry that arrives while the first attempt is still running gets 409
+- Reusing a key for a different request (other endpoint, query or body,
+  uploaded files included) is a 422
+- The store comes from cache.make_cache(): shared through Redis with
+  CACHE_BACKEND=redis, so a retry that lands on another worker is still
+  replayed; otherwise a bounded in-process TTL cache
+- A reservation whose worker died mid-request frees the key after
+  IN_FLIGHT_TTL_SECONDS instead of blocking it for the full TTL
+"""
+
+import hashlib
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+from fastapi import Depends, Header, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from starlette.datastructures import UploadFile
+from ..config import settings
+from ..models.user import User
+from .auth_utils import get_current_user
+from .cache import make_cache
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+IN_FLIGHT_TTL_SECONDS = 300
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_responses = make_cache(
+    "idempotency",
+    maxsize=settings.idempotency_max_entries,
+    ttl=settings.idempotency_ttl_seconds
+)
+
+
+@dataclass
+class _StoredResponse:
+    fingerprint: str
+    status_code: int = 200
+    body: Any = None
+    in_flight: bool = True
+
+
+def _load(raw: Optional[dict]) -> Optional[_StoredResponse]:
+    return _StoredResponse(**raw) if raw is not None else None
+
+
+async def _fingerprint(request: Request) -> str:
+    """Method, path, query and a hash of the body (form fields and file contents for uploads)."""
+    digest = hashlib.sha256()
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith(("multipart/form-data", "application/x-www-form-urlencoded")):
+        # Already parsed by FastAPI for the endpoint; the stream can't be read twice
+        form = await request.form()
+        for name, value in sorted(form.multi_items(), key=lambda item: item[0]):
+            digest.update(name.encode() + b"\0")
+            if isinstance(value, UploadFile):
+                value.file.seek(0)
+                for chunk in iter(lambda: value.file.read(HASH_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                value.file.seek(0)
+            else:
+                digest.update(str(value).encode())
+            digest.update(b"\0")
+    else:
+        digest.update(await request.body())
+    return f"{request.method} {request.url.path}?{request.url.query} {digest.hexdigest()}"
+
+
+class IdempotentRequest:
+    """Per-request handle: a stored response to replay, or a slot to save into."""
+
+    def __init__(self, store_key: Optional[str] = None, fingerprint: str = "", request: Request = None,
+                 replay: Optional[JSONResponse] = None):
+        self.store_key = store_key
+        self.fingerprint = fingerprint
+        self.request = request
+        self.replay = replay
+        self.saved = False
+
+    def save(self, result: Any) -> Any:
+        """Store the endpoint's result for retries and pass it through."""
+        if not self.store_key:
+            return result
+
+        route = self.request.scope.get("route")
+        response_model = getattr(route, "response_model", None)
+        if response_model is not None:
+            result = TypeAdapter(response_model).validate_python(result, from_attributes=True)
+
+        _responses.set(self.store_key, asdict(_StoredResponse(
+            fingerprint=self.fingerprint,
+            status_code=getattr(route, "status_code", None) or 200,
+            body=jsonable_encoder(result),
+            in_flight=False
+        )))
+        self.saved = True
+        return result
+
+
+async def idempotent_request(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER, max_length=255),
+    current_user: User = Depends(get_current_user)
+):
+    """Dependency: look up / reserve the caller's Idempotency-Key."""
+    if not idempotency_key:
+        yield IdempotentRequest()
+        return
+
+    store_key = f"{current_user.id}:{idempotency_key}"
+    fingerprint = await _fingerprint(request)
+    reservation = asdict(_StoredResponse(fingerprint=fingerprint))
+
+    if not _responses.add(store_key, reservation, ttl=IN_FLIGHT_TTL_SECONDS):
+        stored = _load(_responses.get(store_key))
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+            if stored.in_flight:
+                raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+            yield IdempotentRequest(replay=JSONResponse(
+                content=stored.body,
+                status_code=stored.status_code,
+                headers={REPLAYED_HEADER: "true"}
+            ))
+            return
+        # Expired between add() and get(); fall through and run the request
+        _responses.set(store_key, reservation, ttl=IN_FLIGHT_TTL_SECONDS)
+
+    handle = IdempotentRequest(store_key, fingerprint, request)
+    try:
+        yield handle
+    finally:
+        # Failed attempts release the key so the client can retry
+        if not handle.saved:
+            _responses.delete(store_key)
@@ -6,19 +6,26 @@ Clean SQL aggregation queries for planters, adopters, and carbon leaderboards.
 from sqlalchemy.orm import Session
 from sqlalchemy import func, case, literal, text
 from ..models.user import User
-from ..models.tree import Tree
+from ..models.tree import Tree, TreeImage
 
 # ── Carbon calculation constants ──────────────────────────────
 BASE_CARBON_OFFSET_KG = 5.0   # Base carbon offset per tree (kg CO2)
 GROWTH_FACTOR_KG = 0.5        # Additional carbon per growth update (kg CO2)
 
 
-def _json_array_length(column):
+def _growth_update_counts(db: Session):
     """
-    SQLite-compatible helper to get the length of a JSON array column.
-    Returns 0 for NULL or empty values.
+    Subquery of (tree_id, update_count) from tree_images.
+    Grouped over the tree_id index; trees without photos have no row.
     """
-    return func.coalesce(func.json_array_length(column), 0)
+    return (
+        db.query(
+            TreeImage.tree_id.label("tree_id"),
+            func.count(TreeImage.id).label("update_count"),
+        )
+        .group_by(TreeImage.tree_id)
+        .subquery()
+    )
 
 
 def get_planters_leaderboard(db: Session, limit: int = 50):
@@ -30,22 +37,24 @@ def get_planters_leaderboard(db: Session, limit: int = 50):
         1. Higher total growth updates
         2. Earlier account creation date
     """
+    updates = _growth_update_counts(db)
+    total_updates = func.coalesce(func.sum(updates.c.update_count), 0)
+
     results = (
         db.query(
             User.id.label("user_id"),
             User.username,
             func.count(Tree.id).label("total_trees_planted"),
-            func.coalesce(
-                func.sum(_json_array_length(Tree.images)), 0
-            ).label("total_growth_updates"),
+            total_updates.label("total_growth_updates"),
         )
         .join(Tree, Tree.owner_id == User.id)
+        .outerjoin(updates, updates.c.tree_id == Tree.id)
         .filter(User.is_active == True)
         .group_by(User.id, User.username)
         .order_by(
-            func.count(Tree.id).desc(),                                    # Primary: most trees
-            func.coalesce(func.sum(_json_array_length(Tree.images)), 0).desc(),  # Tie-break 1: most updates
-            User.created_at.asc(),                                         # Tie-break 2: earliest signup
+            func.count(Tree.id).desc(),    # Primary: most trees
+            total_updates.desc(),          # Tie-break 1: most updates
+            User.created_at.asc(),         # Tie-break 2: earliest signup
         )
         .limit(limit)
         .all()
@@ -114,9 +123,10 @@ def get_carbon_leaderboard(db: Session, limit: int = 50):
     User score: SUM(carbon_offset) over all trees owned by user.
     """
     # Compute per-tree carbon offset inline, then SUM per user
+    updates = _growth_update_counts(db)
     per_tree_carbon = (
         BASE_CARBON_OFFSET_KG
-        + _json_array_length(Tree.images) * GROWTH_FACTOR_KG
+        + func.coalesce(updates.c.update_count, 0) * GROWTH_FACTOR_KG
     )
 
     results = (
@@ -129,6 +139,7 @@ def get_carbon_leaderboard(db: Session, limit: int = 50):
             func.count(Tree.id).label("total_trees"),
         )
         .join(Tree, Tree.owner_id == User.id)
+        .outerjoin(updates, updates.c.tree_id == Tree.id)
         .filter(User.is_active == True)
         .group_by(User.id, User.username)
         .order_by(
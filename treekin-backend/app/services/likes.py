@@ -0,0 +1,90 @@
+"""
+Like toggle in a single statement round trip.
+
+The old toggle read the post, read the existing like, then inserted or
+deleted it. Two quick taps could both see "not liked" and insert twice.
+Now the (post_id, user_id) pair is unique (uq_likes_post_user) and:
+
+- PostgreSQL runs one statement: a DELETE ... RETURNING CTE, then an
+  INSERT ... ON CONFLICT DO NOTHING that only fires if nothing was deleted,
+  also reading the post's stored likes_count (NULL = no such post)
+- SQLite has no data-modifying CTEs, so it reads likes_count, runs
+  DELETE ... RETURNING and, only if that removed nothing,
+  INSERT ... ON CONFLICT DO NOTHING RETURNING
+
+A concurrent duplicate insert hits the unique index and becomes a no-op
+instead of a second like. The caller commits.
+"""
+
+from typing import Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..models.post import Like, Post
+
+_PG_TOGGLE = text("""
+    WITH post AS (
+        SELECT likes_count FROM posts WHERE id = :post_id
+    ), removed AS (
+        DELETE FROM likes WHERE post_id = :post_id AND user_id = :user_id
+        RETURNING id
+    ), added AS (
+        INSERT INTO likes (post_id, user_id)
+        SELECT :post_id, :user_id
+        WHERE EXISTS (SELECT 1 FROM post) AND NOT EXISTS (SELECT 1 FROM removed)
+        ON CONFLICT (post_id, user_id) DO NOTHING
+        RETURNING id
+    )
+    SELECT
+        EXISTS (SELECT 1 FROM post) AS post_exists,
+        (SELECT likes_count FROM post) AS likes_count,
+        (SELECT count(*) FROM removed) AS removed,
+        (SELECT count(*) FROM added) AS added
+""")
+
+
+def _toggle_postgres(db: Session, post_id: int, user_id: int) -> Optional[Tuple[int, int]]:
+    row = db.execute(_PG_TOGGLE, {"post_id": post_id, "user_id": user_id}).one()
+    if not row.post_exists:
+        return None
+    return row.added - row.removed, row.likes_count or 0
+
+
+def _toggle_sqlite(db: Session, post_id: int, user_id: int) -> Optional[Tuple[int, int]]:
+    post = db.query(Post.likes_count).filter(Post.id == post_id).first()
+    if post is None:
+        return None
+    stored = post.likes_count or 0
+
+    likes = Like.__table__
+    removed = db.execute(
+        likes.delete()
+        .where(likes.c.post_id == post_id, likes.c.user_id == user_id)
+        .returning(likes.c.id)
+    ).first()
+    if removed is not None:
+        return -1, stored
+
+    added = db.execute(
+        sqlite_insert(likes)
+        .values(post_id=post_id, user_id=user_id)
+        .on_conflict_do_nothing(index_elements=["post_id", "user_id"])
+        .returning(likes.c.id)
+    ).first()
+    return (1 if added is not None else 0), stored
+
+
+def toggle_like(db: Session, post_id: int, user_id: int) -> Optional[Tuple[int, int]]:
+    """
+    Like the post if the user hasn't, unlike it if they have.
+
+    Returns (delta, stored_likes_count): delta is +1 liked, -1 unliked, or 0
+    when a concurrent tap already liked it; stored_likes_count is
+    posts.likes_count as read before the toggle (counter deltas not applied).
+    Returns None if the post does not exist.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return _toggle_postgres(db, post_id, user_id)
+    return _toggle_sqlite(db, post_id, user_id)
@@ -0,0 +1,105 @@
+"""
+Request-scoped batching loaders for embedded user summaries.
+
+Routers used to build each nested UserSummary with its own
+`db.query(User).filter(User.id == ...)`, one query per row of a list.
+A loader collects the ids a response needs, fetches them in one IN query
+(only the summary columns), and memoizes them for the rest of the request:
+
+    def list_things(..., loaders: Loaders = Depends(get_loaders)):
+        loaders.users.prime(t.owner_id for t in things)   # queue ids
+        owner = loaders.users.get(thing.owner_id)         # one query for all
+
+Loaders live for one request (FastAPI caches a dependency per request).
+Rows already in hand (e.g. the current user) can be added with put() to skip
+the lookup. The user loader reads through the cross-request user_cache, so
+hot authors usually cost no query at all.
+
+Tree summaries need no loader: every endpoint that embeds one joins it into
+its main query (TREE_SUMMARY_COLUMNS with joinedload().load_only()).
+"""
+
+from typing import Dict, Iterable, Optional, Set
+
+from fastapi import Depends
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..models.tree import Tree
+from ..models.user import User
+from ..schemas.user import UserSummary
+from . import user_cache
+
+# Columns the summary schemas are built from (also used for load_only())
+USER_SUMMARY_COLUMNS = (User.id, User.username, User.display_name, User.avatar_url, User.is_verified)
+TREE_SUMMARY_COLUMNS = (
+    Tree.id, Tree.name, Tree.event_type, Tree.status, Tree.carbon_credits, Tree.main_image_url
+)
+
+
+class SummaryLoader:
+    """Batches id lookups for one model into summary schema instances."""
+
+    def __init__(self, db: Session, model, schema, columns, shared=None):
+        self.db = db
+        self.model = model
+        self.schema = schema
+        self.columns = columns
+        self.shared = shared  # optional cross-request cache: get_many(ids) / store(summaries)
+        self._loaded: Dict[int, Optional[BaseModel]] = {}
+        self._queued: Set[int] = set()
+
+    def prime(self, ids: Iterable[Optional[int]]) -> None:
+        """Queue ids; they are fetched together on the next get()/get_many()."""
+        self._queued.update(i for i in ids if i is not None and i not in self._loaded)
+
+    def put(self, obj) -> None:
+        """Memoize a row that is already loaded."""
+        if obj is not None:
+            self._loaded[obj.id] = self.schema.model_validate(obj)
+            self._queued.discard(obj.id)
+
+    def _fetch(self) -> None:
+        ids = sorted(self._queued)
+        self._queued.clear()
+        if not ids:
+            return
+        found = self.shared.get_many(ids) if self.shared else {}
+        missing = [row_id for row_id in ids if row_id not in found]
+        if missing:
+            rows = self.db.query(*self.columns).filter(self.model.id.in_(missing)).all()
+            fetched = [self.schema.model_validate(row) for row in rows]
+            if self.shared:
+                self.shared.store(fetched)
+            found.update((summary.id, summary) for summary in fetched)
+        for row_id in ids:
+            self._loaded[row_id] = found.get(row_id)  # None = missing, also memoized
+
+    def get(self, row_id: Optional[int]) -> Optional[BaseModel]:
+        """The summary for one id, or None if there is no such row."""
+        if row_id is None:
+            return None
+        if row_id not in self._loaded:
+            self._queued.add(row_id)
+            self._fetch()
+        return self._loaded[row_id]
+
+    def get_many(self, ids: Iterable[Optional[int]]) -> Dict[int, BaseModel]:
+        """Summaries for several ids (missing rows are left out)."""
+        ids = [i for i in ids if i is not None]
+        self.prime(ids)
+        self._fetch()
+        return {i: self._loaded[i] for i in ids if self._loaded.get(i) is not None}
+
+
+class Loaders:
+    """The loaders available to one request."""
+
+    def __init__(self, db: Session):
+        self.users = SummaryLoader(db, User, UserSummary, USER_SUMMARY_COLUMNS, shared=user_cache)
+
+
+def get_loaders(db: Session = Depends(get_db)) -> Loaders:
+    """FastAPI dependency: fresh loaders sharing the request's DB session."""
+    return Loaders(db)
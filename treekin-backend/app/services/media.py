@@ -0,0 +1,45 @@
+"""
+Static file server for uploaded tree photos.
+
+Mounted at /assets/trees so stored image URLs keep working without the
+frontend dev server. On top of Starlette's StaticFiles (Range requests,
+conditional GETs, pathsend/sendfile where the server supports it):
+
+- Content-addressed files ({sha256}.ext) get the hash as a strong ETag and
+  `Cache-Control: immutable` with a one-year max-age, so a CDN or browser
+  never needs to revalidate them
+- Older uuid-named files get a short max-age and revalidate by ETag
+"""
+
+import os
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from ..config import settings
+from .storage import content_hash_from_name
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class MediaFiles(StaticFiles):
+    """StaticFiles with strong ETags and long-lived caching for hashed names."""
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope,
+        status_code: int = 200,
+    ) -> Response:
+        headers = {}
+        content_hash = content_hash_from_name(os.path.basename(full_path))
+        if content_hash:
+            headers["etag"] = f'"{content_hash}"'
+            headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            headers["cache-control"] = f"public, max-age={settings.media_max_age}"
+
+        response = FileResponse(full_path, status_code=status_code, headers=headers, stat_result=stat_result)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,116 @@
+"""
+Cursor pagination helpers.
+
+Cursors are opaque URL-safe tokens wrapping the sort key of the last row of
+a page. List endpoints keep returning a plain JSON array and hand out the
+cursor for the next page in the X-Next-Cursor response header (absent on
+the last page).
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+from fastapi import HTTPException, Response
+from sqlalchemy import literal, tuple_
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    """Pack sort-key values into an opaque cursor token."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Unpack a cursor token, checking it carries `size` values."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    """Expose the next-page cursor, if any, on the response."""
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+def created_cursor(created_at: datetime, row_id: int) -> str:
+    """Cursor for a row of a (created_at, id)-keyed list."""
+    return encode_cursor(created_at.isoformat(), row_id)
+
+
+def apply_keyset(
+    query: Query,
+    created_col,
+    id_col,
+    cursor: Optional[str],
+    newest_first: bool = True
+) -> Query:
+    """
+    Skip past a (created_at, id) cursor and order by that key (no LIMIT).
+    Compares the raw column so a composite index ending in (created_at, id)
+    serves the range; created_at columns are Timestamp for that on SQLite.
+    """
+    if cursor:
+        created_at, last_id = decode_cursor(cursor, 2)
+        try:
+            created_at = datetime.fromisoformat(created_at)
+            last_id = int(last_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        row_key = tuple_(created_col, id_col)
+        # Bound with the column's type so SQLite gets the stored text format
+        cursor_key = tuple_(literal(created_at, created_col.type), last_id)
+        query = query.filter(row_key < cursor_key if newest_first else row_key > cursor_key)
+
+    if newest_first:
+        return query.order_by(created_col.desc(), id_col.desc())
+    return query.order_by(created_col.asc(), id_col.asc())
+
+
+def paginate_by_created(
+    query: Query,
+    created_col,
+    id_col,
+    limit: int,
+    cursor: Optional[str],
+    response: Response,
+    skip: int = 0,
+    newest_first: bool = True
+) -> List:
+    """
+    One page keyed on (created_at, id), newest or oldest first, served by a
+    composite index ending in (created_at, id). Without a cursor the legacy
+    `skip` offset still applies. Sets X-Next-Cursor when there are more rows.
+    """
+    query = apply_keyset(query, created_col, id_col, cursor, newest_first)
+    if skip and not cursor:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        set_next_cursor(response, created_cursor(getattr(last, created_col.key), last.id))
+    return rows
+
+
+def paginate_newest_first(
+    query: Query,
+    created_col,
+    id_col,
+    limit: int,
+    cursor: Optional[str],
+    response: Response,
+    skip: int = 0
+) -> List:
+    """Newest-first page keyed on (created_at, id); see paginate_by_created()."""
+    return paginate_by_created(query, created_col, id_col, limit, cursor, response, skip)
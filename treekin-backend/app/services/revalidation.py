@@ -0,0 +1,261 @@
+"""
+Batch re-validation of the stored photo archive.
+
+Re-scores every photo in tree_images with the current AI validator
+(keywords, thresholds, model) and writes the new ai_valid / ai_confidence /
+ai_label back to the database.
+
+- Photos are streamed from the DB in id order (keyset pages, never all at once)
+- Classification runs in a process pool, each worker using batched inference
+- Results are written back in bulk, one UPDATE batch per chunk of photos
+- A verdict that changes what the upload recorded (accepted <-> rejected,
+  or a sampled-out photo now scored) is corrected in the uploader's
+  user_validation_stats in the same transaction, so trust sampling works
+  from the revised history
+- Progress is checkpointed to a JSON file so an interrupted run can resume
+"""
+
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from ..models.tree import TreeImage
+from .ai_validator import NO_VERDICT_LABELS
+from .storage import image_url_to_path
+from .validation_policy import SAMPLED_OUT_LABEL, revise_outcome
+
+DEFAULT_CHECKPOINT = "revalidate_checkpoint.json"
+
+
+# ── Worker side ───────────────────────────────────────────────
+
+def _classify_chunk(paths: List[str], batch_size: int) -> List[Dict]:
+    """Process-pool worker: classify one chunk of image files."""
+    from .ai_validator import validate_tree_photos
+
+    results = validate_tree_photos(paths, batch_size=batch_size)
+    # Only ship back what gets stored, not the full label list
+    return [
+        {"valid": r["valid"], "confidence": r["confidence"], "label": r["label"]}
+        for r in results
+    ]
+
+
+# ── Checkpointing ────────────────────────────────────────────
+
+def _empty_state() -> Dict:
+    return {
+        "last_image_id": 0,
+        "images_scanned": 0,
+        "images_scored": 0,
+        "missing_files": 0,
+        "unscored": 0,
+        "flipped_to_valid": 0,
+        "flipped_to_invalid": 0,
+        "newly_scored": 0,
+        "elapsed_s": 0.0,
+    }
+
+
+def load_checkpoint(path: str) -> Dict:
+    """Load a previous run's progress, or a fresh state if there is none."""
+    state = _empty_state()
+    if path and os.path.exists(path):
+        with open(path) as f:
+            state.update(json.load(f))
+    return state
+
+
+def save_checkpoint(path: str, state: Dict) -> None:
+    """Atomically persist progress (write temp file, then rename)."""
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ── DB side ──────────────────────────────────────────────────
+
+def iter_image_chunks(db: Session, after_id: int, images_per_chunk: int) -> Iterator[List]:
+    """Stream (id, url, ai_valid, ai_label, uploaded_by) photo rows in id order."""
+    last_id = after_id
+    while True:
+        rows = (
+            db.query(TreeImage.id, TreeImage.url, TreeImage.ai_valid, TreeImage.ai_label, TreeImage.uploaded_by)
+            .filter(TreeImage.id > last_id)
+            .order_by(TreeImage.id)
+            .limit(images_per_chunk)
+            .all()
+        )
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def _collect_jobs(rows: List, state: Dict) -> List[Dict]:
+    """Turn a chunk of photo rows into one job per file found on disk."""
+    jobs = []
+    for row in rows:
+        path = image_url_to_path(row.url)
+        if not path or not os.path.exists(path):
+            state["missing_files"] += 1
+            continue
+        jobs.append({
+            "image_id": row.id,
+            "path": path,
+            "old_valid": row.ai_valid,
+            "old_label": row.ai_label,
+            "uploaded_by": row.uploaded_by,
+        })
+    return jobs
+
+
+def _tally(jobs: List[Dict], verdicts: List[Dict], state: Dict) -> List[tuple]:
+    """
+    Count how many verdicts changed compared to what is stored.
+    Returns the (job, verdict) pairs that carry a real verdict.
+    """
+    scored = []
+    for job, verdict in zip(jobs, verdicts):
+        if verdict["label"] in NO_VERDICT_LABELS:
+            state["unscored"] += 1
+            continue
+        scored.append((job, verdict))
+        state["images_scored"] += 1
+        if job["old_valid"] is None or job["old_label"] in (None, "", "skipped", SAMPLED_OUT_LABEL):
+            state["newly_scored"] += 1
+        elif bool(job["old_valid"]) != verdict["valid"]:
+            if verdict["valid"]:
+                state["flipped_to_valid"] += 1
+            else:
+                state["flipped_to_invalid"] += 1
+    return scored
+
+
+def _recorded_outcome(job: Dict) -> Optional[str]:
+    """What the upload fed into the uploader's validation stats, if anything."""
+    if job["old_label"] == SAMPLED_OUT_LABEL:
+        return "skipped"
+    if job["old_valid"] is None or job["old_label"] in (None, "", "skipped") or job["old_label"] in NO_VERDICT_LABELS:
+        return None  # AI validation was off or had no verdict: nothing recorded
+    return "accepted" if job["old_valid"] else "rejected"
+
+
+def _revise_stats(db: Session, scored: List[tuple]) -> None:
+    """Correct the uploaders' validation stats for verdicts that changed."""
+    for job, verdict in scored:
+        old_outcome = _recorded_outcome(job)
+        new_outcome = "accepted" if verdict["valid"] else "rejected"
+        if job["uploaded_by"] is not None and old_outcome not in (None, new_outcome):
+            revise_outcome(db, job["uploaded_by"], old_outcome, new_outcome)
+
+
+def _write_back(db: Session, scored: List[tuple]) -> int:
+    """Bulk-update the AI fields of the scored photos (and the uploaders' stats)."""
+    rows = [
+        {
+            "id": job["image_id"],
+            "ai_valid": verdict["valid"],
+            "ai_confidence": verdict["confidence"],
+            "ai_label": verdict["label"],
+        }
+        for job, verdict in scored
+    ]
+    if not rows:
+        return 0
+
+    # Bulk UPDATE by primary key (executemany)
+    db.execute(update(TreeImage), rows)
+    _revise_stats(db, scored)
+    db.commit()
+    return len(rows)
+
+
+# ── Driver ───────────────────────────────────────────────────
+
+def revalidate_archive(
+    session_factory: Callable[[], Session],
+    workers: int = 2,
+    batch_size: int = 8,
+    images_per_chunk: int = 200,
+    checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT,
+    resume: bool = False,
+    dry_run: bool = False,
+    max_images: Optional[int] = None,
+    log: Callable[[str], None] = print,
+) -> Dict:
+    """
+    Re-score all stored tree photos.
+
+    Chunks are classified out of order by the pool but written back and
+    checkpointed strictly in id order, so the checkpoint always means
+    "every photo up to last_image_id is done".
+
+    Returns the final stats dict (also written to the checkpoint file).
+    """
+    state = load_checkpoint(checkpoint_path) if resume else _empty_state()
+    if resume and state["last_image_id"]:
+        log(f"[Revalidate] Resuming after photo #{state['last_image_id']}")
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    in_flight = deque()
+    max_in_flight = max(2, workers * 2)
+    run_started = time.monotonic()
+    elapsed_before = state["elapsed_s"]
+    images_this_run = 0
+
+    def finish_oldest():
+        rows, jobs, pending = in_flight.popleft()
+        verdicts = pending.result() if hasattr(pending, "result") else pending
+        scored = _tally(jobs, verdicts, state)
+        if not dry_run:
+            _write_back(db, scored)
+        state["images_scanned"] += len(rows)
+        state["last_image_id"] = rows[-1].id
+        state["elapsed_s"] = round(elapsed_before + time.monotonic() - run_started, 2)
+        if not dry_run:
+            save_checkpoint(checkpoint_path, state)
+        rate = state["images_scored"] / state["elapsed_s"] if state["elapsed_s"] else 0.0
+        log(
+            f"[Revalidate] photo #{state['last_image_id']}: {state['images_scored']} scored "
+            f"({rate:.1f} img/s), flipped {state['flipped_to_valid']}↑ {state['flipped_to_invalid']}↓"
+        )
+
+    db = session_factory()
+    try:
+        for rows in iter_image_chunks(db, state["last_image_id"], images_per_chunk):
+            if max_images is not None and images_this_run >= max_images:
+                break
+            rows = rows[:max_images - images_this_run] if max_images is not None else rows
+            images_this_run += len(rows)
+
+            jobs = _collect_jobs(rows, state)
+            paths = [job["path"] for job in jobs]
+            if executor and paths:
+                pending = executor.submit(_classify_chunk, paths, batch_size)
+            else:
+                pending = _classify_chunk(paths, batch_size) if paths else []
+            in_flight.append((rows, jobs, pending))
+
+            while len(in_flight) >= max_in_flight:
+                finish_oldest()
+
+        while in_flight:
+            finish_oldest()
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+        db.close()
+
+    rate = state["images_scored"] / state["elapsed_s"] if state["elapsed_s"] else 0.0
+    state["images_per_second"] = round(rate, 2)
+    return state
@@ -0,0 +1,212 @@
+"""
+Full-text search over trees, posts, civic reports and chat messages.
+
+The index lives in the database and is kept in sync on every write
+(including bulk Core statements such as the tree purge):
+
+- SQLite: one external-content FTS5 table per source (`trees_fts`, ...)
+  maintained by AFTER INSERT/UPDATE/DELETE triggers, ranked with bm25()
+- PostgreSQL: a GIN index over a weighted to_tsvector() expression per
+  table, ranked with ts_rank_cd(); the index maintains itself
+
+Words are not stemmed (stemming a partial word breaks prefix matching, e.g.
+"bany" -> "bani"); instead every query term matches as a prefix, so "plant"
+still finds "planted" and "planting".
+
+ensure_search_index() creates whatever is missing at startup (and fills new
+FTS5 tables from the existing rows). Results from all sources are merged
+into one ranking and paginated with a keyset cursor on (rank, type, id).
+Chat messages are only searched in the caller's own rooms.
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+SEARCH_CONFIG = "simple"
+MAX_QUERY_TERMS = 8
+
+# Column weights: title-like columns rank above body text
+_BM25_WEIGHTS = {"A": 10.0, "B": 4.0, "C": 1.0}
+
+
+class SearchSource(NamedTuple):
+    table: str
+    columns: Tuple[Tuple[str, str], ...]  # (column, weight A/B/C)
+    joins: str = ""                       # extra joins, base table aliased `src`
+    where: str = "1 = 1"                  # visibility filter, may use :user_id
+
+
+SEARCH_SOURCES: Dict[str, SearchSource] = {
+    "trees": SearchSource(
+        "trees", (("name", "A"), ("species", "B"), ("description", "C")),
+        where="src.deleted_at IS NULL",
+    ),
+    "posts": SearchSource(
+        "posts", (("content", "A"),),
+        joins="JOIN trees t ON t.id = src.tree_id",
+        where="t.deleted_at IS NULL",
+    ),
+    "reports": SearchSource(
+        "civic_reports", (("title", "A"), ("description", "C")),
+    ),
+    "messages": SearchSource(
+        "chat_messages", (("content", "A"),),
+        joins="JOIN chat_rooms r ON r.id = src.room_id",
+        where="(r.user1_id = :user_id OR r.user2_id = :user_id)",
+    ),
+}
+
+_fts5_available = True
+
+
+# ── Index maintenance ────────────────────────────────────────
+
+def _tsvector(source: SearchSource, prefix: str = "") -> str:
+    """Weighted tsvector expression; the GIN index and the query must match."""
+    return " || ".join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({prefix}{column}, '')), '{weight}')"
+        for column, weight in source.columns
+    )
+
+
+def _sqlite_index_ddl(source: SearchSource) -> List[str]:
+    table = source.table
+    fts = f"{table}_fts"
+    columns = ", ".join(column for column, _ in source.columns)
+    new_values = ", ".join(f"new.{column}" for column, _ in source.columns)
+    old_values = ", ".join(f"old.{column}" for column, _ in source.columns)
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({columns}, content='{table}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """Create missing FTS5 tables/triggers (SQLite) or GIN indexes (PostgreSQL)."""
+    global _fts5_available
+
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        if dialect == "postgresql":
+            for source in SEARCH_SOURCES.values():
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{source.table}_fts "
+                    f"ON {source.table} USING gin (({_tsvector(source)}))"
+                ))
+            return
+
+        if dialect != "sqlite":
+            _fts5_available = False
+            return
+
+        existing = {
+            name for (name,) in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))
+        }
+        for source in SEARCH_SOURCES.values():
+            if f"{source.table}_fts" in existing:
+                continue
+            try:
+                for statement in _sqlite_index_ddl(source):
+                    conn.execute(text(statement))
+            except Exception as e:
+                print(f"[Search] FTS5 unavailable, search disabled: {e}")
+                _fts5_available = False
+                return
+            print(f"[Search] Built full-text index {source.table}_fts")
+
+
+def search_available() -> bool:
+    return _fts5_available
+
+
+# ── Querying ─────────────────────────────────────────────────
+
+def query_terms(q: str) -> List[str]:
+    """Words of a free-text query; everything else (quotes, operators) is dropped."""
+    return re.findall(r"\w+", q.lower())[:MAX_QUERY_TERMS]
+
+
+def _match_expression(dialect: str, terms: Sequence[str]) -> str:
+    """All terms must match, each as a word prefix."""
+    if dialect == "postgresql":
+        return " & ".join(f"{term}:*" for term in terms)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _source_query(dialect: str, kind: str, source: SearchSource) -> str:
+    """(kind, id, rank) rows for one source; lower rank = better match."""
+    if dialect == "postgresql":
+        return (
+            f"SELECT '{kind}' AS kind, src.id AS id, "
+            f"-ts_rank_cd({_tsvector(source, 'src.')}, to_tsquery('{SEARCH_CONFIG}', :match)) AS rank "
+            f"FROM {source.table} src {source.joins} "
+            f"WHERE ({_tsvector(source, 'src.')}) @@ to_tsquery('{SEARCH_CONFIG}', :match) "
+            f"AND {source.where}"
+        )
+
+    fts = f"{source.table}_fts"
+    weights = ", ".join(str(_BM25_WEIGHTS[weight]) for _, weight in source.columns)
+    return (
+        f"SELECT '{kind}' AS kind, {fts}.rowid AS id, bm25({fts}, {weights}) AS rank "
+        f"FROM {fts} JOIN {source.table} src ON src.id = {fts}.rowid {source.joins} "
+        f"WHERE {fts} MATCH :match AND {source.where}"
+    )
+
+
+def ranked_hits(
+    db: Session,
+    terms: Sequence[str],
+    kinds: Sequence[str],
+    user_id: int,
+    limit: int,
+    after: Optional[Tuple[float, str, int]] = None,
+) -> List[Tuple[str, int, float]]:
+    """
+    One page of (kind, id, rank) across the selected sources, best first.
+    `after` is the (rank, kind, id) of the last hit of the previous page.
+    Fetches limit + 1 rows so the caller can tell whether there is more.
+    """
+    dialect = db.get_bind().dialect.name
+    union = " UNION ALL ".join(_source_query(dialect, kind, SEARCH_SOURCES[kind]) for kind in kinds)
+    params = {"match": _match_expression(dialect, terms), "user_id": user_id, "limit": limit + 1}
+
+    keyset = ""
+    if after is not None:
+        keyset = (
+            "WHERE rank > :after_rank OR (rank = :after_rank AND kind > :after_kind) "
+            "OR (rank = :after_rank AND kind = :after_kind AND id > :after_id)"
+        )
+        params.update(after_rank=after[0], after_kind=after[1], after_id=after[2])
+
+    rows = db.execute(
+        text(f"SELECT kind, id, rank FROM ({union}) hits {keyset} ORDER BY rank, kind, id LIMIT :limit"),
+        params,
+    ).all()
+    return [(row.kind, row.id, float(row.rank)) for row in rows]
+
+
+def snippet(value: Optional[str], terms: Sequence[str], width: int = 160) -> Optional[str]:
+    """A window of `value` around the first matching term."""
+    if not value:
+        return None
+    lowered = value.lower()
+    positions = [pos for pos in (lowered.find(term) for term in terms) if pos >= 0]
+    start = max(0, min(positions) - width // 4) if positions else 0
+    excerpt = value[start:start + width].strip()
+    if start > 0:
+        excerpt = "…" + excerpt
+    if start + width < len(value):
+        excerpt += "…"
+    return excerpt
@@ -0,0 +1,97 @@
+"""
+Storage helpers for uploaded tree photos.
+
+Photos live on local disk under UPLOADS_DIR and are referenced from the
+database by URL (/assets/trees/{username}/{filename}). The backend serves
+that prefix itself (see services/media.py).
+
+New uploads are content-addressed: the filename is the SHA-256 of the bytes,
+so a URL never changes content and can be cached forever.
+"""
+
+import hashlib
+import os
+import re
+from typing import BinaryIO, Optional
+from ..config import settings
+
+
+# Legacy default: the frontend public folder (Vite used to serve uploads directly).
+# Set UPLOADS_DIR to keep images out of the frontend build.
+UPLOADS_DIR = settings.uploads_dir or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    "..", "treekin-frontend", "public", "assets", "trees"
+)
+UPLOADS_URL_PREFIX = "/assets/trees"
+
+_CONTENT_ADDRESSED_NAME = re.compile(r"^([0-9a-f]{64})\.[a-z0-9]+$")
+
+
+def image_url_to_path(url: Optional[str]) -> Optional[str]:
+    """
+    Map a stored image URL back to its file on disk.
+    Returns None for external URLs or anything that escapes UPLOADS_DIR.
+    """
+    if not url or not url.startswith(UPLOADS_URL_PREFIX + "/"):
+        return None
+
+    relative = url[len(UPLOADS_URL_PREFIX) + 1:]
+    root = os.path.abspath(UPLOADS_DIR)
+    path = os.path.abspath(os.path.join(root, *relative.split("/")))
+    if not path.startswith(root + os.sep):
+        return None
+    return path
+
+
+def save_upload(source: BinaryIO, file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Stream an uploaded file to disk, hashing it on the way.
+    Returns the SHA-256 hex digest of the content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "wb") as buffer:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            buffer.write(chunk)
+    return digest.hexdigest()
+
+
+def content_hash_from_name(filename: str) -> Optional[str]:
+    """The SHA-256 a content-addressed filename was named after, else None."""
+    match = _CONTENT_ADDRESSED_NAME.match(filename)
+    return match.group(1) if match else None
+
+
+def finalize_upload(temp_path: str, content_sha256: str, file_ext: str) -> str:
+    """
+    Move a validated upload to its content-addressed name in the same folder.
+    If that file already exists (same photo uploaded again) the copy is dropped.
+    Returns the final filename.
+    """
+    ext = (file_ext or ".jpg").lower()
+    if not re.fullmatch(r"\.[a-z0-9]{1,5}", ext):
+        ext = ".jpg"
+    filename = f"{content_sha256}{ext}"
+    final_path = os.path.join(os.path.dirname(temp_path), filename)
+
+    if os.path.exists(final_path):
+        os.remove(temp_path)
+    else:
+        os.replace(temp_path, final_path)
+    return filename
+
+
+def perceptual_hash(file_path: str) -> Optional[str]:
+    """64-bit perceptual hash (hex) of an image, or None if it can't be read."""
+    try:
+        import imagehash
+        from PIL import Image
+
+        with Image.open(file_path) as img:
+            return str(imagehash.phash(img))
+    except Exception as e:
+        print(f"[Storage] Perceptual hash failed: {e}")
+        return None
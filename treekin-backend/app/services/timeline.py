@@ -0,0 +1,243 @@
+"""
+Follow graph and home timelines.
+
+Users follow other users and trees (`follows`). Each user has a home
+timeline of post ids (`timeline_entries`), so reading a home feed page is
+one range scan of the (user_id, created_at, post_id) index instead of a
+filter over every post.
+
+- Fan-out on write: posts are created through publish_post(), which queues
+  a background task that inserts one entry for the author and each follower
+  of the author or of the tree
+- Accounts/trees with at least FANOUT_MAX_FOLLOWERS followers (big NGOs,
+  landmark trees) are not fanned out; their followers pull those posts at
+  read time and merge them in (fan-out on read)
+- Following backfills the target's recent posts; unfollowing removes the
+  target's posts unless another follow still covers them
+- followers_count on users/trees goes through the coalescing counters
+"""
+
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import BackgroundTasks
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal, dialect_insert
+from ..models.follow import Follow, TimelineEntry
+from ..models.post import Post
+from ..models.tree import Tree
+from ..models.user import User
+from . import counters
+from .pagination import apply_keyset, created_cursor
+
+FOLLOW_TARGETS = {"user": User, "tree": Tree}
+FANOUT_BATCH_SIZE = 1000
+
+
+def _insert_ignore(db: Session, table, conflict_columns: List[str]):
+    """INSERT ... ON CONFLICT DO NOTHING for the current dialect."""
+    return dialect_insert(db)(table).on_conflict_do_nothing(index_elements=conflict_columns)
+
+
+def _post_target_filter(target_type: str, target_id: int):
+    return Post.user_id == target_id if target_type == "user" else Post.tree_id == target_id
+
+
+def _is_heavy(obj) -> bool:
+    return (obj.followers_count or 0) >= settings.fanout_max_followers
+
+
+def _add_entries(db: Session, user_id: int, posts: Iterable) -> None:
+    rows = [{"user_id": user_id, "post_id": p.id, "created_at": p.created_at} for p in posts]
+    if rows:
+        table = TimelineEntry.__table__
+        db.execute(_insert_ignore(db, table, ["user_id", "post_id"]), rows)
+
+
+# ── Follow graph ─────────────────────────────────────────────
+
+def follow(db: Session, follower_id: int, target_type: str, target) -> int:
+    """
+    Follow a user or tree (no-op if already following). Backfills recent
+    posts. Returns the followers_count delta (1 or 0). The caller commits.
+    """
+    table = Follow.__table__
+    inserted = db.execute(
+        _insert_ignore(db, table, ["follower_id", "target_type", "target_id"])
+        .values(follower_id=follower_id, target_type=target_type, target_id=target.id)
+        .returning(table.c.id)
+    ).first()
+    if inserted is None:
+        return 0
+
+    counters.increment(db, FOLLOW_TARGETS[target_type], target.id, followers_count=1)
+    if settings.timeline_backfill_posts > 0 and not _is_heavy(target):
+        recent = (
+            db.query(Post.id, Post.created_at)
+            .filter(_post_target_filter(target_type, target.id))
+            .order_by(Post.created_at.desc(), Post.id.desc())
+            .limit(settings.timeline_backfill_posts)
+            .all()
+        )
+        _add_entries(db, follower_id, recent)
+    return 1
+
+
+def unfollow(db: Session, follower_id: int, target_type: str, target_id: int) -> int:
+    """
+    Stop following (no-op if not following) and drop the target's posts from
+    the follower's timeline unless another follow still covers them.
+    Returns the followers_count delta (-1 or 0). The caller commits.
+    """
+    removed = db.execute(
+        delete(Follow.__table__).where(
+            Follow.__table__.c.follower_id == follower_id,
+            Follow.__table__.c.target_type == target_type,
+            Follow.__table__.c.target_id == target_id,
+        )
+    ).rowcount
+    if not removed:
+        return 0
+
+    counters.increment(db, FOLLOW_TARGETS[target_type], target_id, followers_count=-1)
+    still_covered = (
+        select(Post.id)
+        .join(Follow, and_(
+            Follow.follower_id == follower_id,
+            or_(
+                and_(Follow.target_type == "user", Follow.target_id == Post.user_id),
+                and_(Follow.target_type == "tree", Follow.target_id == Post.tree_id),
+            ),
+        ))
+    )
+    target_posts = select(Post.id).where(
+        _post_target_filter(target_type, target_id), Post.user_id != follower_id
+    )
+    db.query(TimelineEntry).filter(
+        TimelineEntry.user_id == follower_id,
+        TimelineEntry.post_id.in_(target_posts),
+        TimelineEntry.post_id.not_in(still_covered),
+    ).delete(synchronize_session=False)
+    return -1
+
+
+def following(db: Session, user_id: int) -> List[Tuple[str, int]]:
+    """(target_type, target_id) of everything the user follows."""
+    return [
+        (row.target_type, row.target_id)
+        for row in db.query(Follow.target_type, Follow.target_id)
+        .filter(Follow.follower_id == user_id)
+        .order_by(Follow.id)
+    ]
+
+
+# ── Fan-out ──────────────────────────────────────────────────
+
+def fan_out_post(db: Session, post_id: int) -> int:
+    """Deliver a new post to its author's and tree's followers. Returns entries written."""
+    post = db.query(Post.id, Post.user_id, Post.tree_id, Post.created_at).filter(Post.id == post_id).first()
+    if post is None:
+        return 0
+
+    targets = []
+    author = db.query(User.id, User.followers_count).filter(User.id == post.user_id).first()
+    if author and not _is_heavy(author):
+        targets.append(and_(Follow.target_type == "user", Follow.target_id == post.user_id))
+    tree = db.query(Tree.id, Tree.followers_count).filter(Tree.id == post.tree_id).first()
+    if tree and not _is_heavy(tree):
+        targets.append(and_(Follow.target_type == "tree", Follow.target_id == post.tree_id))
+
+    recipients = {post.user_id}
+    if targets:
+        recipients.update(
+            follower_id for (follower_id,) in
+            db.query(Follow.follower_id).filter(or_(*targets)).distinct()
+        )
+
+    table = TimelineEntry.__table__
+    statement = _insert_ignore(db, table, ["user_id", "post_id"])
+    recipients = sorted(recipients)
+    for start in range(0, len(recipients), FANOUT_BATCH_SIZE):
+        db.execute(statement, [
+            {"user_id": user_id, "post_id": post.id, "created_at": post.created_at}
+            for user_id in recipients[start:start + FANOUT_BATCH_SIZE]
+        ])
+        db.commit()
+    return len(recipients)
+
+
+def run_fan_out(post_id: int) -> None:
+    """Background task: fan one post out with its own session."""
+    db = SessionLocal()
+    try:
+        fan_out_post(db, post_id)
+    except Exception as e:
+        print(f"[Timeline] Fan-out of post {post_id} failed: {e}")
+    finally:
+        db.close()
+
+
+def publish_post(db: Session, background_tasks: BackgroundTasks, post: Post) -> Post:
+    """
+    Add a new post, commit it (with whatever else the session holds) and
+    queue its fan-out. Every path that creates a post goes through here.
+    """
+    db.add(post)
+    db.commit()
+    db.refresh(post)
+    background_tasks.add_task(run_fan_out, post.id)
+    return post
+
+
+# ── Reading ──────────────────────────────────────────────────
+
+def _heavy_followees(db: Session, user_id: int) -> Tuple[List[int], List[int]]:
+    """User and tree ids the user follows that are read-time (not fanned out)."""
+    threshold = settings.fanout_max_followers
+    rows = (
+        db.query(Follow.target_type, Follow.target_id)
+        .outerjoin(User, and_(Follow.target_type == "user", User.id == Follow.target_id))
+        .outerjoin(Tree, and_(Follow.target_type == "tree", Tree.id == Follow.target_id))
+        .filter(
+            Follow.follower_id == user_id,
+            or_(User.followers_count >= threshold, Tree.followers_count >= threshold),
+        )
+        .all()
+    )
+    users = [row.target_id for row in rows if row.target_type == "user"]
+    trees = [row.target_id for row in rows if row.target_type == "tree"]
+    return users, trees
+
+
+def home_timeline(
+    db: Session, user_id: int, limit: int, cursor: Optional[str]
+) -> Tuple[List[int], Optional[str]]:
+    """
+    One page of the user's home timeline, newest first.
+    Returns (post ids in order, next-page cursor or None).
+    """
+    entries = apply_keyset(
+        db.query(TimelineEntry.created_at, TimelineEntry.post_id).filter(TimelineEntry.user_id == user_id),
+        TimelineEntry.created_at, TimelineEntry.post_id, cursor
+    ).limit(limit + 1).all()
+    merged = {row.post_id: row.created_at for row in entries}
+
+    heavy_users, heavy_trees = _heavy_followees(db, user_id)
+    if heavy_users or heavy_trees:
+        pulled = apply_keyset(
+            db.query(Post.created_at, Post.id).filter(
+                or_(Post.user_id.in_(heavy_users), Post.tree_id.in_(heavy_trees))
+            ),
+            Post.created_at, Post.id, cursor
+        ).limit(limit + 1).all()
+        merged.update((row.id, row.created_at) for row in pulled)
+
+    ordered = sorted(merged.items(), key=lambda item: (item[1], item[0]), reverse=True)
+    next_cursor = None
+    if len(ordered) > limit:
+        ordered = ordered[:limit]
+        last_id, last_created = ordered[-1]
+        next_cursor = created_cursor(last_created, last_id)
+    return [post_id for post_id, _ in ordered], next_cursor
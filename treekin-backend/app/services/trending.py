@@ -0,0 +1,236 @@
+"""
+Trending posts and trees.
+
+Every engagement event adds a weight to its item's score, and scores decay
+exponentially with TRENDING_HALF_LIFE_HOURS. Instead of rescanning likes,
+comments and photos, each event is folded into a stored score as it happens:
+
+- Forward decay: an event at time t adds `w * 2^(t / half_life)` (t in hours
+  since TRENDING_EPOCH), so old scores never need rewriting as time passes
+  and ordering by the stored value is ordering by the current decayed score
+- The stored value is kept in log2 space (`rank_key`) so it cannot overflow;
+  the current score is `2^(rank_key - now / half_life)`
+- Events are buffered in memory like the engagement counters and merged
+  into `trending_scores` every TRENDING_FLUSH_INTERVAL_SECONDS (immediately
+  with the interval at 0 or background jobs off)
+- The flush adds buffered values to stored ones inside the upsert
+  (ON CONFLICT DO UPDATE with the log-add in SQL), so workers flushing at
+  the same time cannot overwrite each other's sums
+- Post events also count towards the post's tree (at TREE_ROLLUP weight)
+- Rows whose current score decayed below MIN_SCORE are pruned on flush
+
+Top-N is one backwards scan of the (kind, rank_key) index. Un-likes and
+withdrawn votes are not subtracted; the decay ages them out. Likes and
+verification votes only score once per user and item (first_credit()),
+so toggling cannot inflate a score.
+"""
+
+import asyncio
+import math
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import dialect_insert, engine
+from ..models.post import Post
+from ..models.trending import TrendingCredit, TrendingScore
+
+TRENDING_KINDS = ("post", "tree")
+TRENDING_EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+EVENT_WEIGHTS = {
+    "like": 1.0,
+    "comment": 2.0,
+    "verify": 3.0,
+    "growth_update": 5.0,
+}
+TREE_ROLLUP = 0.5  # Share of a post's engagement credited to its tree
+MIN_SCORE = 0.05   # Rows decayed below this are dropped
+
+LN2 = math.log(2)
+
+_pending: Dict[Tuple[str, int], float] = {}  # (kind, id) -> log2 of buffered forward-decayed weight
+_lock = threading.Lock()
+
+
+def _now_units() -> float:
+    """Current time in half-lives since TRENDING_EPOCH."""
+    hours = (datetime.now(timezone.utc) - TRENDING_EPOCH).total_seconds() / 3600
+    return hours / settings.trending_half_life_hours
+
+
+def _log_add(a: float, b: float) -> float:
+    """log2(2^a + 2^b) without overflow."""
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def _log_add_sql(dialect: str, a, b):
+    """SQL expression for log2(2^a + 2^b) (ln/exp, which both dialects have)."""
+    if dialect == "postgresql":
+        high, low = func.greatest(a, b), func.least(a, b)
+    else:
+        high, low = func.max(a, b), func.min(a, b)  # SQLite's scalar max()/min()
+    return high + func.ln(1 + func.exp((low - high) * LN2)) / LN2
+
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _sqlite_math_functions(dbapi_connection, connection_record):
+        # Not every SQLite build ships the math functions
+        dbapi_connection.create_function("ln", 1, math.log, deterministic=True)
+        dbapi_connection.create_function("exp", 1, math.exp, deterministic=True)
+
+
+def _merge(into: Dict[Tuple[str, int], float], key: Tuple[str, int], value: float) -> None:
+    into[key] = _log_add(into[key], value) if key in into else value
+
+
+def current_score(rank_key: float) -> float:
+    """The decayed score a stored rank_key stands for right now."""
+    return 2 ** (rank_key - _now_units())
+
+
+def _buffering() -> bool:
+    return settings.background_jobs_enabled and settings.trending_flush_interval_seconds > 0
+
+
+# ── Recording ────────────────────────────────────────────────
+
+def record(kind: str, item_id: int, event: str) -> None:
+    """
+    Count one engagement event towards an item's trending score. Call after
+    the event's transaction committed.
+    """
+    if kind not in TRENDING_KINDS:
+        raise ValueError(f"Unknown trending kind: {kind}")
+    value = math.log2(EVENT_WEIGHTS[event]) + _now_units()
+    with _lock:
+        _merge(_pending, (kind, item_id), value)
+
+    if not _buffering():
+        try:
+            run_flush()
+        except Exception as e:
+            print(f"[Trending] Flush failed, will retry: {type(e).__name__}: {e}")
+
+
+def first_credit(db: Session, kind: str, item_id: int, user_id: int, event: str) -> bool:
+    """
+    Claim a user's one scoring `event` on an item: True the first time, False
+    after (e.g. a like after an unlike). Runs in the caller's transaction;
+    call record() only once it committed.
+    """
+    table = TrendingCredit.__table__
+    claimed = db.execute(
+        dialect_insert(db)(table)
+        .values(kind=kind, item_id=item_id, event=event, user_id=user_id)
+        .on_conflict_do_nothing(index_elements=["kind", "item_id", "event", "user_id"])
+        .returning(table.c.user_id)
+    ).first()
+    return claimed is not None
+
+
+# ── Flushing ─────────────────────────────────────────────────
+
+def _restore(drained: Dict[Tuple[str, int], float]) -> None:
+    """Put buffered events back after a failed flush so they are retried."""
+    with _lock:
+        for key, value in drained.items():
+            _merge(_pending, key, value)
+
+
+def _with_tree_rollup(db: Session, drained: Dict[Tuple[str, int], float]) -> Dict[Tuple[str, int], float]:
+    """Add each post's buffered weight (scaled) to its tree, one IN query."""
+    merged = dict(drained)
+    post_values = {item_id: value for (kind, item_id), value in drained.items() if kind == "post"}
+    if not post_values:
+        return merged
+    rollup = math.log2(TREE_ROLLUP)
+    for post_id, tree_id in db.query(Post.id, Post.tree_id).filter(Post.id.in_(post_values)):
+        _merge(merged, ("tree", tree_id), post_values[post_id] + rollup)
+    return merged
+
+
+def flush_trending(db: Session) -> int:
+    """Merge buffered events into trending_scores. Returns the number of rows written."""
+    with _lock:
+        drained = dict(_pending)
+        _pending.clear()
+    if not drained:
+        return 0
+
+    try:
+        merged = _with_tree_rollup(db, drained)
+        table = TrendingScore.__table__
+        insert = dialect_insert(db)(table)
+        db.execute(
+            insert.on_conflict_do_update(
+                index_elements=["kind", "item_id"],
+                set_={
+                    "rank_key": _log_add_sql(db.get_bind().dialect.name, table.c.rank_key, insert.excluded.rank_key),
+                    "updated_at": insert.excluded.updated_at,
+                },
+            ),
+            [
+                {"kind": kind, "item_id": item_id, "rank_key": rank_key, "updated_at": datetime.now(timezone.utc)}
+                for (kind, item_id), rank_key in merged.items()
+            ],
+        )
+        prune_below = _now_units() + math.log2(MIN_SCORE)
+        db.query(TrendingScore).filter(
+            TrendingScore.kind.in_(TRENDING_KINDS), TrendingScore.rank_key < prune_below
+        ).delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        _restore(drained)
+        raise
+    return len(merged)
+
+
+def run_flush() -> int:
+    """Flush with a fresh session (for the flush loop and shutdown)."""
+    from ..database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return flush_trending(db)
+    finally:
+        db.close()
+
+
+async def trending_flush_loop() -> None:
+    """Flush buffered trending events every TRENDING_FLUSH_INTERVAL_SECONDS."""
+    while True:
+        await asyncio.sleep(settings.trending_flush_interval_seconds)
+        try:
+            await asyncio.to_thread(run_flush)
+        except Exception as e:
+            print(f"[Trending] Flush failed, will retry: {type(e).__name__}: {e}")
+
+
+# ── Reading ──────────────────────────────────────────────────
+
+def top(db: Session, kind: str, limit: int) -> List[Tuple[int, float]]:
+    """(item_id, current score) of the `limit` best items of a kind, best first."""
+    rows = (
+        db.query(TrendingScore.item_id, TrendingScore.rank_key)
+        .filter(TrendingScore.kind == kind)
+        .order_by(TrendingScore.rank_key.desc(), TrendingScore.item_id.desc())
+        .limit(limit)
+        .all()
+    )
+    return [(row.item_id, current_score(row.rank_key)) for row in rows]
+
+
+def forget(db: Session, kind: str, item_ids) -> None:
+    """Drop the scores and credits of deleted items (bulk delete; the caller commits)."""
+    for model in (TrendingScore, TrendingCredit):
+        db.query(model).filter(
+            model.kind == kind, model.item_id.in_(item_ids)
+        ).delete(synchronize_session=False)
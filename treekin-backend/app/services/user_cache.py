@@ -0,0 +1,72 @@
+"""
+Cross-request cache of user summaries.
+
+Authors, reporters and chat partners are embedded as UserSummary in almost
+every response and change rarely, so summaries are cached by user id for
+USER_CACHE_TTL_SECONDS (the request-scoped loaders read through it).
+
+- Any ORM change to a summary field (username, display name, avatar,
+  verified flag) drops that user's entry once the transaction commits, so
+  no session can re-cache the old row before the new one is visible;
+  update_profile then writes the fresh summary straight back
+- CACHE_BACKEND=redis shares the cache between worker processes; with the
+  in-process default other workers see a change after at most one TTL
+- Bulk Core UPDATEs on users bypass the listener; call invalidate() after them
+"""
+
+from typing import Dict, Iterable, List
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models.user import User
+from ..schemas.user import UserSummary
+from .cache import make_cache
+
+_summaries = make_cache("user_summary", settings.user_cache_max_entries, settings.user_cache_ttl_seconds)
+
+_SUMMARY_FIELDS = tuple(UserSummary.model_fields)
+_PENDING_KEY = "user_cache_invalidations"
+
+
+def _enabled() -> bool:
+    return settings.user_cache_ttl_seconds > 0
+
+
+def get_many(user_ids: Iterable[int]) -> Dict[int, UserSummary]:
+    """Cached summaries for these ids (misses are left out)."""
+    if not _enabled():
+        return {}
+    return {int(user_id): UserSummary(**data) for user_id, data in _summaries.get_many(list(user_ids)).items()}
+
+
+def store(summaries: List[UserSummary]) -> None:
+    if _enabled() and summaries:
+        _summaries.set_many({summary.id: summary.model_dump() for summary in summaries})
+
+
+def invalidate(user_id: int) -> None:
+    _summaries.delete(user_id)
+
+
+def _summary_changed(obj) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in _SUMMARY_FIELDS)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = {obj.id for obj in session.deleted if isinstance(obj, User)}
+    changed.update(obj.id for obj in session.dirty if isinstance(obj, User) and _summary_changed(obj))
+    if changed:
+        session.info.setdefault(_PENDING_KEY, set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,153 @@
+"""
+Trust-based sampling policy for AI photo validation.
+
+Instead of running the classifier on every upload, each user gets a trust
+score from their validation history and trusted users are only spot-checked:
+
+- New users and users rejected recently are always validated
+  (they need a clean streak of `validation_min_history` accepts first)
+- After that, the sample rate decays with the square root of the streak:
+      rate = sqrt(min_history / clean_streak)
+  so a user needs ~2*sqrt(min_history * n) validations for n uploads
+  instead of n, down to a floor of `validation_min_sample_rate`
+- NGO accounts need a shorter streak (`validation_ngo_min_history`)
+- A rejection resets the streak, so trust is lost immediately
+"""
+
+import math
+import random
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import case, func, update
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..database import dialect_insert
+from ..models.user import User
+from ..models.validation import UserValidationStats
+
+# ai_label stored for uploads the policy did not send to the classifier
+SAMPLED_OUT_LABEL = "sampled_out"
+
+
+def _min_history(user: User) -> int:
+    return settings.validation_ngo_min_history if user.is_ngo else settings.validation_min_history
+
+
+def trust_score(stats: Optional[UserValidationStats], user: User) -> float:
+    """
+    Trust in [0, 1): 0 until the user has a long enough clean streak, then
+    approaching their smoothed acceptance ratio as the streak grows.
+    """
+    if stats is None:
+        return 0.0
+
+    min_history = max(1, _min_history(user))
+    streak = stats.clean_streak or 0
+    if streak < min_history:
+        return 0.0
+
+    accepted = stats.accepted_count or 0
+    rejected = stats.rejected_count or 0
+    acceptance = (accepted + 1) / (accepted + rejected + 2)  # Laplace-smoothed
+    return (1.0 - math.sqrt(min_history / streak)) * acceptance
+
+
+def sample_rate(stats: Optional[UserValidationStats], user: User) -> float:
+    """Probability that the next upload from this user is validated."""
+    if not settings.validation_sampling_enabled:
+        return 1.0
+    return max(settings.validation_min_sample_rate, 1.0 - trust_score(stats, user))
+
+
+def _get_stats(db: Session, user_id: int) -> Optional[UserValidationStats]:
+    # populate_existing: counters are updated in SQL, so a row already in the session may be stale
+    return (
+        db.query(UserValidationStats)
+        .filter(UserValidationStats.user_id == user_id)
+        .populate_existing()
+        .first()
+    )
+
+
+def should_validate(db: Session, user: User) -> bool:
+    """Decide whether this user's next upload goes through the classifier."""
+    rate = sample_rate(_get_stats(db, user.id), user)
+    return rate >= 1.0 or random.random() < rate
+
+
+def _outcome_values(outcome: str) -> Dict:
+    """SQL-side counter updates for one outcome."""
+    stats = UserValidationStats
+    if outcome == "accepted":
+        return {"accepted_count": stats.accepted_count + 1, "clean_streak": stats.clean_streak + 1}
+    if outcome == "rejected":
+        return {"rejected_count": stats.rejected_count + 1, "clean_streak": 0,
+                "last_rejected_at": datetime.utcnow()}
+    if outcome == "skipped":
+        return {"skipped_count": stats.skipped_count + 1}
+    raise ValueError(f"Unknown validation outcome: {outcome}")
+
+
+def _apply(db: Session, user_id: int, values: Dict) -> None:
+    stats = UserValidationStats
+    db.execute(
+        dialect_insert(db)(stats.__table__)
+        .values(user_id=user_id, accepted_count=0, rejected_count=0, skipped_count=0, clean_streak=0)
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+    db.execute(
+        update(stats).where(stats.user_id == user_id).values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def record_outcome(db: Session, user_id: int, outcome: str) -> None:
+    """
+    Record an upload outcome: "accepted", "rejected" or "skipped".
+    Executed in the session's transaction; the caller commits.
+
+    The row is created with INSERT ... ON CONFLICT DO NOTHING and the counters
+    are incremented in SQL, so concurrent uploads of one user neither collide
+    on the first row nor lose increments.
+    """
+    _apply(db, user_id, _outcome_values(outcome))
+
+
+def revise_outcome(db: Session, user_id: int, old_outcome: str, new_outcome: str) -> None:
+    """
+    Replace an outcome recorded earlier (e.g. a photo re-validation flipped
+    its verdict): the old counter goes down, the new one is applied as a live
+    upload would apply it. The caller commits.
+    """
+    values = _outcome_values(new_outcome)
+    old_column = getattr(UserValidationStats, f"{old_outcome}_count")
+    values[old_column.key] = case((old_column > 0, old_column - 1), else_=0)
+    _apply(db, user_id, values)
+
+
+def get_policy_stats(db: Session) -> Dict:
+    """Platform-wide numbers for the sampling policy (how much compute it saves)."""
+    accepted, rejected, skipped, users = db.query(
+        func.coalesce(func.sum(UserValidationStats.accepted_count), 0),
+        func.coalesce(func.sum(UserValidationStats.rejected_count), 0),
+        func.coalesce(func.sum(UserValidationStats.skipped_count), 0),
+        func.count(UserValidationStats.user_id),
+    ).one()
+
+    validated = accepted + rejected
+    total = validated + skipped
+    return {
+        "uploads_total": total,
+        "validated": validated,
+        "accepted": accepted,
+        "rejected": rejected,
+        "skipped": skipped,
+        "skip_rate": round(skipped / total, 4) if total else 0.0,
+        "users_tracked": users,
+        "policy": {
+            "sampling_enabled": settings.validation_sampling_enabled,
+            "min_history": settings.validation_min_history,
+            "ngo_min_history": settings.validation_ngo_min_history,
+            "min_sample_rate": settings.validation_min_sample_rate,
+        },
+    }
@@ -0,0 +1,24 @@
+"""
+Rebuild engagement counters from their source tables.
+
+Post likes/comments, report up/down votes and follower counts are kept as
+coalesced deltas (app/services/counters.py); if the API stopped without
+flushing, run:
+
+    python recount_counters.py
+"""
+from app.database import SessionLocal
+from app.services.counters import recount_counters
+
+
+def main():
+    db = SessionLocal()
+    try:
+        recount_counters(db)
+        print("Counters rebuilt from likes, comments, report votes and follows.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Re-score stored tree photos with the current AI validator.
+
+Run after changing TREE_KEYWORDS, thresholds or the model:
+
+    python revalidate_images.py --workers 4 --batch-size 16
+    python revalidate_images.py --resume        # continue an interrupted run
+    python revalidate_images.py --dry-run       # only report flipped verdicts
+"""
+import argparse
+import os
+
+from app.database import SessionLocal
+from app.services.revalidation import revalidate_archive, DEFAULT_CHECKPOINT
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-validate stored tree photos")
+    parser.add_argument("--workers", type=int, default=max(1, min(4, (os.cpu_count() or 2) // 2)),
+                        help="classifier processes (each loads its own model)")
+    parser.add_argument("--batch-size", type=int, default=8, help="images per inference batch")
+    parser.add_argument("--chunk", type=int, default=200, help="photos per work unit / bulk write")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="progress file")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint")
+    parser.add_argument("--dry-run", action="store_true", help="score and report, write nothing")
+    parser.add_argument("--max-images", type=int, default=None, help="stop after this many photos")
+    args = parser.parse_args()
+
+    stats = revalidate_archive(
+        SessionLocal,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        images_per_chunk=args.chunk,
+        checkpoint_path=args.checkpoint,
+        resume=args.resume,
+        dry_run=args.dry_run,
+        max_images=args.max_images,
+    )
+
+    print("\n=== Re-validation summary ===")
+    print(f"  Photos scanned:     {stats['images_scanned']}")
+    print(f"  Images scored:      {stats['images_scored']}")
+    print(f"  Missing files:      {stats['missing_files']}")
+    print(f"  No verdict (model): {stats['unscored']}")
+    print(f"  Newly scored:       {stats['newly_scored']}")
+    print(f"  Flipped to valid:   {stats['flipped_to_valid']}")
+    print(f"  Flipped to invalid: {stats['flipped_to_invalid']}")
+    print(f"  Throughput:         {stats['images_per_second']} img/s")
+    if args.dry_run:
+        print("  (dry run - nothing written)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Shared pytest setup: a throwaway SQLite database and uploads folder.
+
+The environment is set before the app is imported, since settings and the
+engine are created at import time.
+"""
+
+import os
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="treekin-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["UPLOADS_DIR"] = os.path.join(_tmp, "uploads")
+os.environ["BACKGROUND_JOBS_ENABLED"] = "false"
+os.environ["AI_VALIDATION_ENABLED"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from app.database import SessionLocal, init_db
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    init_db()
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    """Create a user with a unique name."""
+    from app.models.user import User
+
+    created = []
+
+    def make(**fields):
+        name = f"user{len(created)}_{os.urandom(3).hex()}"
+        user = User(username=name, email=f"{name}@example.com", hashed_password="x", **fields)
+        db.add(user)
+        db.commit()
+        created.append(user)
+        return user
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth(client):
+    """Register and log in a fresh user; returns (user id, auth headers)."""
+    name = f"api_{os.urandom(4).hex()}"
+    response = client.post("/api/auth/register", json={
+        "username": name, "email": f"{name}@example.com", "password": "password123"
+    })
+    assert response.status_code == 201, response.text
+    token = client.post("/api/auth/login", data={
+        "username": f"{name}@example.com", "password": "password123"
+    }).json()["access_token"]
+    return response.json()["id"], {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,69 @@
+"""Chat room listing: latest activity first, paged on indexed columns."""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.database import engine
+from app.models.chat import ChatRoom
+from app.services.auth_utils import create_access_token
+from app.services.pagination import NEXT_CURSOR_HEADER, created_cursor
+
+
+def _room_pages(client, headers, limit):
+    rooms, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/chat/rooms", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        rooms += response.json()
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return rooms
+
+
+def test_rooms_page_by_latest_activity_on_both_sides(client, db, make_user):
+    # Rooms store (lower id, higher id): I am user2 with `before`, user1 with `after`
+    before, me, after = make_user(), make_user(), make_user()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(me.id)})}"}
+    for other in (before, after):
+        sent = client.post("/api/chat/send", json={"receiver_id": other.id, "content": "hi"}, headers=headers)
+        assert sent.status_code == 200, sent.text
+    # The older room (lower id) got the latest message
+    room = db.query(ChatRoom).filter(ChatRoom.user1_id == before.id, ChatRoom.user2_id == me.id).one()
+    room.last_message_at += timedelta(minutes=1)
+    db.commit()
+
+    rooms = _room_pages(client, headers, limit=1)
+
+    assert [room["other_user"]["id"] for room in rooms] == [before.id, after.id]
+
+
+def test_room_list_queries_use_the_activity_indexes(client, auth, make_user):
+    _, headers = auth
+    client.post("/api/chat/send", json={"receiver_id": make_user().id, "content": "hi"}, headers=headers)
+    first = client.get("/api/chat/rooms", params={"limit": 1}, headers=headers)
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT chat_rooms."):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        response = client.get("/api/chat/rooms", headers=headers,
+                              params={"limit": 1, "cursor": created_cursor(datetime(2026, 1, 1), 100)})
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert first.status_code == response.status_code == 200
+
+    assert len(statements) == 2
+    with engine.connect() as conn:
+        plans = [
+            " | ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+            for statement, parameters in statements
+        ]
+    assert "ix_chat_rooms_user1_activity" in plans[0]
+    assert "ix_chat_rooms_user2_activity" in plans[1]
+    assert not any("TEMP B-TREE FOR ORDER BY" in plan for plan in plans)
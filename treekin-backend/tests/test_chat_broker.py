@@ -0,0 +1,117 @@
+"""
+The Redis chat broker (services/chat_broker.py) against a Redis stand-in.
+
+Uses TEST_REDIS_URL if set (e.g. a local `redis-server`), otherwise an
+in-process fakeredis server; skipped when neither redis nor fakeredis is
+installed (pip install redis fakeredis).
+"""
+
+import asyncio
+import os
+import threading
+
+import pytest
+
+pytest.importorskip("redis")
+
+from app.services.chat_broker import RedisBroker, room_channel, user_channel
+
+PRESENCE_TTL = 1.0
+
+
+@pytest.fixture(scope="module")
+def redis_url():
+    """URL of the Redis server to test against, starting fakeredis if needed."""
+    if os.environ.get("TEST_REDIS_URL"):
+        yield os.environ["TEST_REDIS_URL"]
+        return
+    fakeredis = pytest.importorskip("fakeredis")
+
+    server = fakeredis.TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    yield f"redis://{host}:{port}/0"
+    server.shutdown()
+
+
+async def start_worker(url, received):
+    broker = RedisBroker(url, PRESENCE_TTL)
+    await broker.start(lambda channel, event: received.append((channel, event)))
+    return broker
+
+
+async def settle():
+    """Give the outbox pump and the subscription reader time to run."""
+    await asyncio.sleep(0.3)
+
+
+def test_publish_subscribe(redis_url):
+    """An event published by one worker reaches a worker subscribed to its channel."""
+    async def run():
+        got_a, got_b = [], []
+        a, b = await start_worker(redis_url, got_a), await start_worker(redis_url, got_b)
+        try:
+            await b.subscribe([room_channel(3), user_channel(7)])
+            a.publish(room_channel(3), {"type": "message", "message": {"id": 1, "room_id": 3}})
+            a.publish(user_channel(7), {"type": "message", "message": {"id": 2, "room_id": 4}})
+            a.publish(room_channel(99), {"type": "message", "message": {"id": 3, "room_id": 99}})
+            await settle()
+            assert [event["message"]["id"] for _, event in got_b] == [1, 2], got_b
+            assert [channel for channel, _ in got_b] == ["room:3", "user:7"], got_b
+            assert got_a == [], "publisher is not subscribed to its own channels"
+        finally:
+            await a.stop()
+            await b.stop()
+
+    asyncio.run(run())
+
+
+def test_unsubscribe(redis_url):
+    """After unsubscribing, a worker no longer receives the channel's events."""
+    async def run():
+        got = []
+        a, b = await start_worker(redis_url, []), await start_worker(redis_url, got)
+        try:
+            await b.subscribe([room_channel(5)])
+            a.publish(room_channel(5), {"type": "read", "room_id": 5})
+            await settle()
+            assert len(got) == 1, got
+
+            await b.unsubscribe([room_channel(5)])
+            a.publish(room_channel(5), {"type": "read", "room_id": 5})
+            await settle()
+            assert len(got) == 1, got
+        finally:
+            await a.stop()
+            await b.stop()
+
+    asyncio.run(run())
+
+
+def test_presence_expiry(redis_url):
+    """Heartbeats keep presence alive; a worker that dies without cleanup ages out."""
+    async def run():
+        a, b = await start_worker(redis_url, []), await start_worker(redis_url, [])
+        try:
+            await a.set_online(1, True)
+            await b.set_online(2, True)
+            assert await b.online([1, 2, 3]) == {1, 2}
+
+            # Longer than the TTL: worker a's heartbeat refreshes user 1
+            await asyncio.sleep(PRESENCE_TTL * 1.5)
+            assert await b.online([1]) == {1}
+
+            # A clean disconnect removes the user right away
+            await b.set_online(2, False)
+            assert await a.online([2]) == set()
+
+            # Worker a crashes: heartbeat stops, nothing is removed explicitly
+            for task in a._tasks:
+                task.cancel()
+            await asyncio.sleep(PRESENCE_TTL * 1.5)
+            assert await b.online([1]) == set()
+        finally:
+            await a.stop()
+            await b.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,61 @@
+"""Purging a deleted tree keeps files other rows still use."""
+
+import os
+from datetime import datetime
+
+from app.models.post import Post
+from app.models.tree import Tree, TreeImage
+from app.routers.posts import _feed_query
+from app.services.cleanup import purge_deleted_trees
+from app.services.storage import UPLOADS_DIR, UPLOADS_URL_PREFIX
+
+
+def _file(user, name):
+    folder = os.path.join(UPLOADS_DIR, user.username)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, name)
+    with open(path, "wb") as f:
+        f.write(b"image")
+    return f"{UPLOADS_URL_PREFIX}/{user.username}/{name}", path
+
+
+def test_purge_keeps_files_shared_with_posts_and_avatars(db, make_user):
+    user = make_user()
+    shared_url, shared_path = _file(user, "shared.jpg")    # also in another tree's auto-post
+    avatar_url, avatar_path = _file(user, "avatar.jpg")    # also the user's avatar
+    own_url, own_path = _file(user, "own.jpg")             # only the deleted tree
+
+    deleted = Tree(name="Gone", owner_id=user.id, main_image_url=own_url)
+    kept = Tree(name="Kept", owner_id=user.id)
+    db.add_all([deleted, kept])
+    db.flush()
+    db.add_all([
+        TreeImage(tree_id=deleted.id, url=url, uploaded_by=user.id)
+        for url in (shared_url, avatar_url, own_url)
+    ])
+    db.add(Post(tree_id=kept.id, user_id=user.id, content="auto-post", media_urls=[shared_url]))
+    user.avatar_url = avatar_url
+    deleted.deleted_at = datetime.utcnow()
+    db.commit()
+
+    stats = purge_deleted_trees(db)
+
+    assert stats["trees_purged"] == 1
+    assert os.path.exists(shared_path)
+    assert os.path.exists(avatar_path)
+    assert not os.path.exists(own_path)
+
+
+def test_feed_hides_posts_of_deleted_trees_before_purge(db, make_user):
+    user = make_user()
+    deleted = Tree(name="Gone", owner_id=user.id, deleted_at=datetime.utcnow())
+    kept = Tree(name="Kept", owner_id=user.id)
+    db.add_all([deleted, kept])
+    db.flush()
+    db.add_all([
+        Post(tree_id=deleted.id, user_id=user.id, content="hidden"),
+        Post(tree_id=kept.id, user_id=user.id, content="shown"),
+    ])
+    db.commit()
+
+    assert [post.content for post in _feed_query(db, None, user.id)] == ["shown"]
@@ -0,0 +1,36 @@
+"""Feed pages are invalidated when post changes commit, not when they flush."""
+
+from app.models.post import Post
+from app.models.tree import Tree
+from app.services import feed_cache
+
+
+def test_generation_moves_on_commit_only(db, make_user):
+    user = make_user()
+    tree = Tree(name="Oak", owner_id=user.id)
+    db.add(tree)
+    db.commit()
+    before = feed_cache.page_key()
+
+    db.add(Post(tree_id=tree.id, user_id=user.id, content="Hello"))
+    db.flush()
+    # A reader refilling the cache now would store the pre-commit page
+    assert feed_cache.page_key() == before
+
+    db.commit()
+    assert feed_cache.page_key() != before
+
+
+def test_rolled_back_changes_do_not_invalidate(db, make_user):
+    user = make_user()
+    tree = Tree(name="Oak", owner_id=user.id)
+    db.add(tree)
+    db.commit()
+    before = feed_cache.page_key()
+
+    db.add(Post(tree_id=tree.id, user_id=user.id, content="Draft"))
+    db.flush()
+    db.rollback()
+    db.commit()
+
+    assert feed_cache.page_key() == before
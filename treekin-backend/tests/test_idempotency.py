@@ -0,0 +1,64 @@
+"""Idempotency-Key replays, and refuses keys reused for a different request."""
+
+import io
+
+import pytest
+from PIL import Image
+
+from app.services import idempotency
+from app.services.cache import RedisCache
+
+
+def _jpeg(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (16, 16), color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def _plant(client, headers, key, name):
+    return client.post("/api/trees/", json={"name": name, "species": "oak"},
+                       headers={**headers, "Idempotency-Key": key})
+
+
+def test_retry_is_replayed(client, auth):
+    _, headers = auth
+    first = _plant(client, headers, "plant-1", "Oak")
+    retry = _plant(client, headers, "plant-1", "Oak")
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers.get(idempotency.REPLAYED_HEADER) == "true"
+    assert retry.json()["id"] == first.json()["id"]
+
+
+def test_key_reused_with_different_body_is_refused(client, auth):
+    _, headers = auth
+    assert _plant(client, headers, "plant-2", "Oak").status_code == 201
+    assert _plant(client, headers, "plant-2", "Neem").status_code == 422
+
+
+def test_key_reused_with_different_file_is_refused(client, auth):
+    _, headers = auth
+    tree_id = _plant(client, headers, "plant-3", "Oak").json()["id"]
+    headers = {**headers, "Idempotency-Key": "photo-1"}
+
+    def upload(color):
+        return client.post(f"/api/trees/{tree_id}/updates", headers=headers,
+                           files={"file": ("a.jpg", _jpeg(color), "image/jpeg")}, data={"caption": "hi"})
+
+    assert upload((0, 128, 0)).status_code == 200
+    assert upload((0, 128, 0)).headers.get(idempotency.REPLAYED_HEADER) == "true"
+    assert upload((128, 0, 0)).status_code == 422
+
+
+def test_replay_works_from_a_shared_redis_store(client, auth, monkeypatch):
+    """Stored responses survive the JSON round trip a Redis-backed store needs."""
+    fakeredis = pytest.importorskip("fakeredis")
+    monkeypatch.setattr(idempotency, "_responses", RedisCache(fakeredis.FakeRedis(), "idempotency", ttl=60))
+    _, headers = auth
+
+    first = _plant(client, headers, "plant-4", "Oak")
+    retry = _plant(client, headers, "plant-4", "Oak")
+
+    assert retry.headers.get(idempotency.REPLAYED_HEADER) == "true"
+    assert retry.json() == first.json()
+    assert _plant(client, headers, "plant-4", "Neem").status_code == 422
@@ -0,0 +1,77 @@
+"""Keyset pages are served by the (created_at, id) indexes and never skip or repeat rows."""
+
+from datetime import datetime
+
+from fastapi import Response
+from sqlalchemy import text
+
+from app.migrations import canonicalize_timestamps
+from app.models.follow import TimelineEntry
+from app.models.post import Post
+from app.models.tree import Tree
+from app.services.pagination import NEXT_CURSOR_HEADER, apply_keyset, created_cursor, paginate_newest_first
+
+
+def _plan(db, query) -> str:
+    statement = query.statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}").all()
+    return " | ".join(row[-1] for row in rows)
+
+
+def test_feed_page_range_scans_the_created_at_index(db):
+    cursor = created_cursor(datetime(2026, 1, 1, 12, 0, 0, 250000), 10)
+    plan = _plan(db, apply_keyset(db.query(Post.id), Post.created_at, Post.id, cursor).limit(21))
+
+    assert "ix_posts_created_at_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_home_timeline_range_scans_the_user_index(db):
+    cursor = created_cursor(datetime(2026, 1, 1, 12, 0, 0), 10)
+    query = db.query(TimelineEntry.created_at, TimelineEntry.post_id).filter(TimelineEntry.user_id == 1)
+    plan = _plan(db, apply_keyset(query, TimelineEntry.created_at, TimelineEntry.post_id, cursor).limit(21))
+
+    assert "ix_timeline_entries_user_created_post" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_pages_mix_server_and_python_timestamps(db, make_user):
+    """Server-default and Python-set created_at values in one second page cleanly."""
+    user = make_user()
+    tree = Tree(name="Oak", owner_id=user.id)
+    db.add(tree)
+    db.flush()
+    posts = [Post(tree_id=tree.id, user_id=user.id, content=str(i)) for i in range(3)]
+    db.add_all(posts)
+    db.flush()
+    db.refresh(posts[0])
+    stamp = posts[0].created_at  # from CURRENT_TIMESTAMP
+    db.add_all([
+        Post(tree_id=tree.id, user_id=user.id, content=f"set {i}", created_at=stamp.replace(microsecond=500000))
+        for i in range(3)
+    ])
+    db.commit()
+
+    query = db.query(Post).filter(Post.tree_id == tree.id)
+    seen, cursor = [], None
+    while True:
+        response = Response()
+        page = paginate_newest_first(query, Post.created_at, Post.id, 2, cursor, response)
+        seen.extend(post.id for post in page)
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+
+    assert sorted(seen) == sorted(post.id for post in query)
+    assert len(seen) == len(set(seen)) == 6
+
+
+def test_old_fractional_timestamps_are_rewritten(db, make_user):
+    user = make_user()
+    db.execute(text("UPDATE users SET created_at = '2026-01-01 12:00:00.250000' WHERE id = :id"), {"id": user.id})
+    db.commit()
+
+    assert canonicalize_timestamps(db) >= 1
+    stored = db.execute(text("SELECT created_at FROM users WHERE id = :id"), {"id": user.id}).scalar()
+    assert stored == "2026-01-01 12:00:00"
+    assert canonicalize_timestamps(db) == 0
@@ -0,0 +1,79 @@
+"""Batch re-validation corrects the uploaders' validation history."""
+
+import os
+
+from app.database import SessionLocal
+from app.models.tree import Tree, TreeImage
+from app.models.validation import UserValidationStats
+from app.services import revalidation
+from app.services.storage import UPLOADS_DIR, UPLOADS_URL_PREFIX
+from app.services.validation_policy import SAMPLED_OUT_LABEL, record_outcome
+
+
+def _photo(db, tree, user, name, valid, label):
+    folder = os.path.join(UPLOADS_DIR, user.username)
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, name), "wb") as f:
+        f.write(b"not really a jpeg")
+    image = TreeImage(
+        tree_id=tree.id, url=f"{UPLOADS_URL_PREFIX}/{user.username}/{name}",
+        uploaded_by=user.id, ai_valid=valid, ai_label=label,
+    )
+    db.add(image)
+    return image
+
+
+def _stats(db, user):
+    db.expire_all()
+    return db.get(UserValidationStats, user.id)
+
+
+def test_flipped_verdicts_update_validation_stats(db, make_user, monkeypatch):
+    user = make_user()
+    tree = Tree(name="Oak", owner_id=user.id)
+    db.add(tree)
+    db.flush()
+    accepted = _photo(db, tree, user, "a.jpg", True, "tree")
+    sampled = _photo(db, tree, user, "b.jpg", True, SAMPLED_OUT_LABEL)
+    unchanged = _photo(db, tree, user, "c.jpg", True, "tree")
+    for outcome in ("accepted", "skipped", "accepted"):
+        record_outcome(db, user.id, outcome)
+    db.commit()
+
+    # The current model now rejects a.jpg and scores the sampled-out b.jpg as valid;
+    # photos left in the archive by other tests stay valid
+    verdicts = {"a.jpg": False, "b.jpg": True, "c.jpg": True}
+    monkeypatch.setattr(revalidation, "_classify_chunk", lambda paths, batch_size: [
+        {"valid": verdicts.get(os.path.basename(p), True), "confidence": 0.9, "label": "plant"} for p in paths
+    ])
+    state = revalidation.revalidate_archive(SessionLocal, workers=1, checkpoint_path=None, log=lambda _: None)
+
+    assert state["flipped_to_invalid"] == 1
+    stats = _stats(db, user)
+    assert (stats.accepted_count, stats.rejected_count, stats.skipped_count) == (2, 1, 0)
+    assert stats.last_rejected_at is not None
+    # The last revised verdict (b.jpg accepted) comes after the rejection
+    assert stats.clean_streak == 1
+
+    # A second run changes nothing: the stored verdicts already match
+    revalidation.revalidate_archive(SessionLocal, workers=1, checkpoint_path=None, log=lambda _: None)
+    again = _stats(db, user)
+    assert (again.accepted_count, again.rejected_count, again.skipped_count) == (2, 1, 0)
+
+
+def test_dry_run_leaves_stats_alone(db, make_user, monkeypatch):
+    user = make_user()
+    tree = Tree(name="Neem", owner_id=user.id)
+    db.add(tree)
+    db.flush()
+    _photo(db, tree, user, "d.jpg", True, "tree")
+    record_outcome(db, user.id, "accepted")
+    db.commit()
+
+    monkeypatch.setattr(revalidation, "_classify_chunk", lambda paths, batch_size: [
+        {"valid": False, "confidence": 0.9, "label": "car"} for _ in paths
+    ])
+    revalidation.revalidate_archive(SessionLocal, workers=1, checkpoint_path=None, dry_run=True, log=lambda _: None)
+
+    stats = _stats(db, user)
+    assert (stats.accepted_count, stats.rejected_count) == (1, 0)
@@ -0,0 +1,18 @@
+"""Full-text search across trees, posts, reports and messages."""
+
+import pytest
+
+from app.services.search import search_available
+
+
+def test_repeated_types_return_each_hit_once(client, auth):
+    if not search_available():
+        pytest.skip("FTS5 is not available in this SQLite build")
+    _, headers = auth
+    tree = client.post("/api/trees/", json={"name": "Quillwort", "species": "fern"}, headers=headers)
+    assert tree.status_code == 201
+
+    response = client.get("/api/search/", params={"q": "quillwort", "types": "trees,trees"}, headers=headers)
+
+    assert response.status_code == 200
+    assert [(hit["type"], hit["id"]) for hit in response.json()] == [("trees", tree.json()["id"])]
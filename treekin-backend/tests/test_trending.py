@@ -0,0 +1,45 @@
+"""Which actions score trees and posts in the trending index."""
+
+import io
+
+from PIL import Image
+
+from app.services import trending
+
+
+def _recorded(monkeypatch):
+    events = []
+    monkeypatch.setattr(trending, "record", lambda kind, item_id, event: events.append((kind, item_id, event)))
+    return events
+
+
+def _jpeg():
+    buffer = io.BytesIO()
+    Image.new("RGB", (16, 16), (0, 128, 0)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def test_image_upload_scores_its_tree(client, auth, monkeypatch):
+    _, headers = auth
+    tree_id = client.post("/api/trees/", json={"name": "Oak"}, headers=headers).json()["id"]
+    events = _recorded(monkeypatch)
+
+    response = client.post(f"/api/trees/{tree_id}/upload-image", headers=headers,
+                           files={"file": ("a.jpg", _jpeg(), "image/jpeg")})
+
+    assert response.status_code == 200, response.text
+    assert ("tree", tree_id, "growth_update") in events
+
+
+def test_only_the_first_comment_of_a_user_scores_the_post(client, auth, monkeypatch):
+    _, headers = auth
+    tree_id = client.post("/api/trees/", json={"name": "Oak"}, headers=headers).json()["id"]
+    post_id = client.post("/api/posts/", json={"tree_id": tree_id, "content": "Hello"}, headers=headers).json()["id"]
+    events = _recorded(monkeypatch)
+
+    for text in ("Nice", "Really nice", "Still nice"):
+        comment = client.post(f"/api/posts/{post_id}/comments", headers=headers,
+                              json={"post_id": post_id, "content": text})
+        assert comment.status_code == 200, comment.text
+
+    assert events == [("post", post_id, "comment")]
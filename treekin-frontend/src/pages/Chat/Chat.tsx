@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { Send, ArrowLeft } from 'lucide-react';
 import { Card, Input, Button } from '../../components/common';
 import { chatAPI, usersAPI } from '../../services/api';
@@ -12,16 +12,29 @@ interface ChatRoom {
     last_message?: string;
     last_message_at?: string;
     unread_count: number;
+    other_user_online?: boolean;
 }
 
 interface Message {
     id: number;
+    room_id: number;
     content: string;
     sender_id: number;
     created_at: string;
     is_read: boolean;
 }
 
+type ChatEvent =
+    | { type: 'message'; message: Message }
+    | { type: 'read'; room_id: number; reader_id: number; read_at: string; up_to_id: number | null }
+    | { type: 'presence'; user_id: number; online: boolean }
+    | { type: 'sent' | 'marked_read' | 'pong' | 'error'; detail?: unknown };
+
+// Reconnect backoff for the chat socket: 1s, 2s, 4s ... up to 30s
+const SOCKET_RETRY_BASE_MS = 1000;
+const SOCKET_RETRY_MAX_MS = 30000;
+const SOCKET_AUTH_REFUSED = 1008;
+
 export const ChatPage: React.FC = () => {
     const { user } = useAuthStore();
     const [rooms, setRooms] = useState<ChatRoom[]>([]);
@@ -29,11 +42,86 @@ export const ChatPage: React.FC = () => {
     const [messages, setMessages] = useState<Message[]>([]);
     const [newMessage, setNewMessage] = useState('');
     const [loading, setLoading] = useState(true);
+    const [hasOlder, setHasOlder] = useState(false);
+    const socketRef = useRef<WebSocket | null>(null);
+    const selectedRoomRef = useRef<ChatRoom | null>(null);
+    const messagesRef = useRef<Message[]>([]);
 
     useEffect(() => {
         loadRooms();
     }, []);
 
+    // New messages and read receipts are pushed over the socket instead of polled.
+    // A dropped socket (slow consumer 1013, network blip, server restart) is
+    // reopened with backoff and the open conversation catches up via after_id.
+    useEffect(() => {
+        let closed = false;
+        let attempt = 0;
+        let retryTimer: ReturnType<typeof setTimeout> | undefined;
+
+        const connect = () => {
+            const socket = chatAPI.openSocket();
+            socketRef.current = socket;
+            socket.onopen = () => {
+                if (attempt > 0) {
+                    catchUp();
+                }
+                attempt = 0;
+            };
+            socket.onclose = (e) => {
+                if (socketRef.current === socket) {
+                    socketRef.current = null;
+                }
+                // 1008: the token was refused; retrying cannot help until the user logs in again
+                if (closed || e.code === SOCKET_AUTH_REFUSED) return;
+                const delay = Math.min(SOCKET_RETRY_MAX_MS, SOCKET_RETRY_BASE_MS * 2 ** attempt);
+                attempt += 1;
+                retryTimer = setTimeout(connect, delay);
+            };
+            socket.onmessage = (e) => {
+                const event: ChatEvent = JSON.parse(e.data);
+                const room = selectedRoomRef.current;
+                if (event.type === 'message') {
+                    if (room && event.message.room_id === room.id) {
+                        appendMessages([event.message]);
+                        if (event.message.sender_id !== user?.id) {
+                            socket.send(JSON.stringify({ type: 'read', room_id: room.id, up_to_id: event.message.id }));
+                        }
+                    } else {
+                        loadRooms();
+                    }
+                } else if (event.type === 'presence') {
+                    setRooms((prev) =>
+                        prev.map((r) => (r.other_user.id === event.user_id ? { ...r, other_user_online: event.online } : r))
+                    );
+                } else if (event.type === 'read' && room && event.room_id === room.id && event.reader_id !== user?.id) {
+                    const upToId = event.up_to_id;
+                    setMessages((prev) =>
+                        prev.map((m) =>
+                            m.sender_id === user?.id && (upToId === null || m.id <= upToId) ? { ...m, is_read: true } : m
+                        )
+                    );
+                }
+            };
+        };
+
+        connect();
+        return () => {
+            closed = true;
+            clearTimeout(retryTimer);
+            socketRef.current?.close();
+            socketRef.current = null;
+        };
+    }, [user?.id]);
+
+    useEffect(() => {
+        selectedRoomRef.current = selectedRoom;
+    }, [selectedRoom]);
+
+    useEffect(() => {
+        messagesRef.current = messages;
+    }, [messages]);
+
     useEffect(() => {
         if (selectedRoom) {
             loadMessages(selectedRoom.other_user.id);
@@ -54,16 +142,81 @@ export const ChatPage: React.FC = () => {
     const loadMessages = async (userId: number) => {
         try {
             const res = await chatAPI.getChat(userId);
-            setMessages(res.data.messages || []);
+            const loaded: Message[] = res.data.messages || [];
+            setMessages(loaded);
+            setHasOlder(res.data.has_more);
+
+            // Reading no longer marks messages read; say what we have seen
+            const unread = loaded.filter((m) => m.sender_id !== user?.id && !m.is_read);
+            if (unread.length > 0) {
+                await chatAPI.markRead(res.data.id, unread[unread.length - 1].id);
+            }
         } catch (error) {
             console.error('Failed to load messages:', error);
         }
     };
 
+    const appendMessages = (incoming: Message[]) => {
+        setMessages((prev) => {
+            const seen = new Set(prev.map((m) => m.id));
+            const fresh = incoming.filter((m) => !seen.has(m.id));
+            return fresh.length > 0 ? [...prev, ...fresh] : prev;
+        });
+    };
+
+    // After a reconnect: fetch what arrived while the socket was down
+    const catchUp = async () => {
+        loadRooms();
+        const room = selectedRoomRef.current;
+        const shown = messagesRef.current;
+        if (!room) return;
+        if (shown.length === 0) {
+            loadMessages(room.other_user.id);
+            return;
+        }
+        try {
+            let afterId = shown[shown.length - 1].id;
+            let hasMore = true;
+            while (hasMore) {
+                const res = await chatAPI.getChat(room.other_user.id, { after_id: afterId });
+                const missed: Message[] = res.data.messages || [];
+                if (missed.length === 0) break;
+                appendMessages(missed);
+                afterId = missed[missed.length - 1].id;
+                hasMore = res.data.has_more;
+
+                const unread = missed.filter((m) => m.sender_id !== user?.id && !m.is_read);
+                if (unread.length > 0) {
+                    await chatAPI.markRead(room.id, unread[unread.length - 1].id);
+                }
+            }
+        } catch (error) {
+            console.error('Failed to catch up on messages:', error);
+        }
+    };
+
+    const loadOlder = async () => {
+        if (!selectedRoom || messages.length === 0) return;
+        try {
+            const res = await chatAPI.getChat(selectedRoom.other_user.id, { before_id: messages[0].id });
+            setMessages((prev) => [...(res.data.messages || []), ...prev]);
+            setHasOlder(res.data.has_more);
+        } catch (error) {
+            console.error('Failed to load older messages:', error);
+        }
+    };
+
     const handleSend = async () => {
         if (!newMessage.trim() || !selectedRoom) return;
 
+        const socket = socketRef.current;
         try {
+            if (socket && socket.readyState === WebSocket.OPEN) {
+                // The message comes back as a 'message' event
+                socket.send(JSON.stringify({ type: 'send', receiver_id: selectedRoom.other_user.id, content: newMessage }));
+                setNewMessage('');
+                return;
+            }
             await chatAPI.sendMessage(selectedRoom.other_user.id, newMessage);
             setNewMessage('');
             loadMessages(selectedRoom.other_user.id);
@@ -112,6 +265,7 @@ export const ChatPage: React.FC = () => {
                                 <div className="chat-info">
                                     <span className="chat-name">
                                         {room.other_user.display_name || room.other_user.username}
+                                        {room.other_user_online && <span className="online-dot" title="Online" />}
                                     </span>
                                     <span className="chat-preview">{room.last_message || 'No messages'}</span>
                                 </div>
@@ -146,6 +300,11 @@ export const ChatPage: React.FC = () => {
             </div>
 
             <div className="messages-area">
+                {hasOlder && (
+                    <button className="load-older-btn" onClick={loadOlder}>
+                        Load earlier messages
+                    </button>
+                )}
                 {messages.length === 0 ? (
                     <p className="no-messages">Start the conversation!</p>
                 ) : (
@@ -104,6 +104,8 @@ export const ProfilePage: React.FC = () => {
     const [selectedTreeId, setSelectedTreeId] = useState<number | null>(null);
     const [treeUpdates, setTreeUpdates] = useState<TreeUpdateData[]>([]);
     const [updatesLoading, setUpdatesLoading] = useState(false);
+    const [updatesCursor, setUpdatesCursor] = useState<string | null>(null);
+    const [loadingMoreUpdates, setLoadingMoreUpdates] = useState(false);
     const [fadeKey, setFadeKey] = useState(0);
 
     // Add Growth Update modal state
@@ -161,14 +163,31 @@ export const ProfilePage: React.FC = () => {
         try {
             const res = await treesAPI.getTreeUpdates(treeId);
             setTreeUpdates(res.data);
+            setUpdatesCursor(res.headers['x-next-cursor'] || null);
         } catch (err) {
             console.error('Failed to fetch tree updates:', err);
             setTreeUpdates([]);
+            setUpdatesCursor(null);
         } finally {
             setUpdatesLoading(false);
         }
     };
 
+    // Updates come 20 at a time; follow X-Next-Cursor for older ones
+    const loadMoreUpdates = async () => {
+        if (!selectedTreeId || !updatesCursor) return;
+        setLoadingMoreUpdates(true);
+        try {
+            const res = await treesAPI.getTreeUpdates(selectedTreeId, { cursor: updatesCursor });
+            setTreeUpdates(prev => [...prev, ...res.data]);
+            setUpdatesCursor(res.headers['x-next-cursor'] || null);
+        } catch (err) {
+            console.error('Failed to load more tree updates:', err);
+        } finally {
+            setLoadingMoreUpdates(false);
+        }
+    };
+
     const handleTreeSelect = (treeId: number) => {
         if (treeId === selectedTreeId) return;
         setFadeKey(prev => prev + 1);
@@ -258,6 +277,7 @@ export const ProfilePage: React.FC = () => {
             if (selectedTreeId === deleteConfirmTree.id) {
                 setSelectedTreeId(null);
                 setTreeUpdates([]);
+                setUpdatesCursor(null);
             }
             // Refresh all profile data
             await loadProfileData();
@@ -580,6 +600,15 @@ export const ProfilePage: React.FC = () => {
                                                     <p>Add Update</p>
                                                 </div>
                                             </div>
+                                            {updatesCursor && (
+                                                <button
+                                                    className="load-more-updates-btn"
+                                                    onClick={loadMoreUpdates}
+                                                    disabled={loadingMoreUpdates}
+                                                >
+                                                    {loadingMoreUpdates ? 'Loading...' : 'Load more updates'}
+                                                </button>
+                                            )}
                                         </div>
                                     ) : (
                                         <div className="tree-updates-empty">
@@ -57,6 +57,9 @@ export const usersAPI = {
     updateProfile: (data: any) => api.put('/users/me', data),
     getStats: (id: number) => api.get(`/users/${id}/stats`),
     getNGOs: () => api.get('/users/ngos'),
+    getFollowing: () => api.get('/users/me/following'),
+    follow: (id: number) => api.post(`/users/${id}/follow`),
+    unfollow: (id: number) => api.delete(`/users/${id}/follow`),
 };
 
 // Trees API
@@ -69,7 +72,10 @@ export const treesAPI = {
     update: (id: number, data: any) => api.put(`/trees/${id}`, data),
     delete: (id: number) => api.delete(`/trees/${id}`),
     adopt: (treeId: number) => api.post('/trees/adopt', { tree_id: treeId }),
+    follow: (treeId: number) => api.post(`/trees/${treeId}/follow`),
+    unfollow: (treeId: number) => api.delete(`/trees/${treeId}/follow`),
     getMapTrees: () => api.get('/trees/map'),
+    trending: (limit?: number) => api.get('/trees/trending', { params: { limit } }),
     getNearby: (lat: number, lng: number, radius?: number) =>
         api.get('/trees/nearby', { params: { lat, lng, radius_km: radius || 5 } }),
     uploadImage: (treeId: number, file: File, latitude?: number, longitude?: number) => {
@@ -81,7 +87,9 @@ export const treesAPI = {
             headers: { 'Content-Type': 'multipart/form-data' },
         });
     },
-    getTreeUpdates: (treeId: number) => api.get(`/trees/${treeId}/updates`),
+    // Paginated: pass the X-Next-Cursor response header back as `cursor`
+    getTreeUpdates: (treeId: number, params?: { limit?: number; cursor?: string }) =>
+        api.get(`/trees/${treeId}/updates`, { params }),
     addTreeUpdate: (treeId: number, file: File, caption?: string, uploadedAt?: string) => {
         const formData = new FormData();
         formData.append('file', file);
@@ -91,6 +99,25 @@ export const treesAPI = {
             headers: { 'Content-Type': 'multipart/form-data' },
         });
     },
+    // Several growth updates (any of the user's trees) in one request; per-file results
+    addTreeUpdatesBatch: (updates: { treeId: number; file: File; caption?: string; uploadedAt?: string }[]) => {
+        const formData = new FormData();
+        updates.forEach((u) => formData.append('files', u.file));
+        formData.append('items', JSON.stringify(updates.map((u) => ({
+            tree_id: u.treeId,
+            caption: u.caption,
+            uploaded_at: u.uploadedAt,
+        }))));
+        return api.post('/trees/updates/batch', formData, {
+            headers: { 'Content-Type': 'multipart/form-data' },
+        });
+    },
+};
+
+// Search API
+export const searchAPI = {
+    search: (q: string, params?: { types?: string; limit?: number; cursor?: string }) =>
+        api.get('/search', { params: { q, ...params } }),
 };
 
 // Posts API
@@ -100,8 +127,12 @@ export const postsAPI = {
     get: (id: number) => api.get(`/posts/${id}`),
     create: (data: { content: string; tree_id: number; media_urls?: string[] }) =>
         api.post('/posts', data),
+    home: (params?: { limit?: number; cursor?: string }) => api.get('/posts/home', { params }),
     like: (id: number) => api.post(`/posts/${id}/like`),
-    getComments: (id: number) => api.get(`/posts/${id}/comments`),
+    trending: (limit?: number) => api.get('/posts/trending', { params: { limit } }),
+    getLiked: (ids: number[]) => api.get('/posts/liked', { params: { ids: ids.join(',') } }),
+    getComments: (id: number, params?: { limit?: number; cursor?: string; order?: 'oldest' | 'newest' }) =>
+        api.get(`/posts/${id}/comments`, { params }),
     addComment: (postId: number, content: string) =>
         api.post(`/posts/${postId}/comments`, { content, post_id: postId }),
     verify: (postId: number, isVerified: boolean) =>
@@ -121,11 +152,18 @@ export const carbonAPI = {
 
 // Chat API
 export const chatAPI = {
-    getRooms: () => api.get('/chat/rooms'),
+    getRooms: (params?: { limit?: number; cursor?: string }) => api.get('/chat/rooms', { params }),
     sendMessage: (receiverId: number, content: string) =>
         api.post('/chat/send', { receiver_id: receiverId, content }),
-    getChat: (userId: number) => api.get(`/chat/room/${userId}`),
-    markRead: (roomId: number) => api.post(`/chat/read/${roomId}`),
+    getChat: (userId: number, params?: { limit?: number; before_id?: number; after_id?: number }) =>
+        api.get(`/chat/room/${userId}`, { params }),
+    markRead: (roomId: number, upToId?: number) =>
+        api.post(`/chat/read/${roomId}`, null, { params: { up_to_id: upToId } }),
+    // Live messages and read receipts (browsers can't set headers on a WebSocket, so the token goes in the URL)
+    openSocket: () => {
+        const token = localStorage.getItem('treekin_token') || '';
+        return new WebSocket(`${API_URL.replace(/^http/, 'ws')}/chat/ws?token=${encodeURIComponent(token)}`);
+    },
 };
 
 // Reports API